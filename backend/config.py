@@ -5,9 +5,27 @@ load_dotenv()
 
 # OpenRouter Configuration
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")  # point at mock_openrouter.py for tests
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.1-70b-instruct")
 
+# LLM client: one pooled connection set shared by every OpenRouter call
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))  # in-flight LLM requests; further calls queue
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 16))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", 60))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() == "true"  # used when the h2 package is installed
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 10))  # seconds
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60))  # seconds per attempt, reading the completion included
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))  # retries on 429, 5xx and connection errors
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", 0.5))  # backoff before jitter doubles per retry
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", 20))  # also caps Retry-After
+LLM_LATENCY_WINDOW = 1000  # recent calls kept for latency percentiles
+
+# LLM response cache keyed by normalized question, context hash, model and temperature
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 512))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", 24 * 3600))  # 0 disables caching; identical calls still coalesce
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR")  # set to keep answers on disk across restarts
+LLM_CACHE_DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", 10_000))
+
 # Supabase Configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
@@ -19,7 +37,91 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./analytics.db")
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 ALLOWED_EXTENSIONS = ["csv", "xlsx"]
 UPLOAD_DIR = "uploads"
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB read per upload chunk
+SCAN_CHUNK_ROWS = 100_000  # rows per chunk when scanning an upload
+
+# Parsed DataFrame cache
+DATAFRAME_CACHE_MAX_BYTES = int(os.getenv("DATAFRAME_CACHE_MAX_BYTES", 512 * 1024 * 1024))  # 512MB
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 256))
+
+# Streaming (out-of-core) EDA
+STREAMING_EDA_THRESHOLD_BYTES = int(os.getenv("STREAMING_EDA_THRESHOLD_BYTES", MAX_FILE_SIZE))  # versions grown past this by appends stream unless mode=exact
+STREAMING_EDA_CHUNK_ROWS = int(os.getenv("STREAMING_EDA_CHUNK_ROWS", 100_000))
+STREAMING_EDA_WORKERS = int(os.getenv("STREAMING_EDA_WORKERS", 4))
+SKETCH_KLL_K = 200
+SKETCH_HLL_PRECISION = 12
+SKETCH_TOP_K_CAPACITY = 64
+HISTOGRAM_GRID_MAX_BINS = 200  # bins kept per delta-maintained histogram before pairs are combined
+
+# Approximate (sampled) analytics
+APPROX_SAMPLE_SIZE = int(os.getenv("APPROX_SAMPLE_SIZE", 50_000))
+APPROX_CONFIDENCE = 0.95
+
+# Arrow IPC responses
+ARROW_BATCH_ROWS = 65_536  # rows per streamed record batch
+
+# Row pages (outlier and anomaly rows)
+PAGE_SIZE_MAX_JSON = 1000
+PAGE_SIZE_MAX_ARROW = 100_000  # only when the client accepts Arrow IPC
+
+# Chart data
+CHART_MAX_BINS = 50
+CHART_TOP_K = 10
+CHART_MAX_POINTS = 200
+
+# Correlation engine
+CORRELATION_BLOCK_COLUMNS = 256  # columns per matrix-product block
+CORRELATION_DTYPE = os.getenv("CORRELATION_DTYPE", "float64")  # "float32" halves memory on wide data
+CORRELATION_TOP_K = 20
+
+# Worker pools for blocking work (both thread pools)
+LIGHT_POOL_WORKERS = int(os.getenv("LIGHT_POOL_WORKERS", 8))
+LIGHT_TASK_TIMEOUT = float(os.getenv("LIGHT_TASK_TIMEOUT", 60))  # seconds
+HEAVY_POOL_WORKERS = int(os.getenv("HEAVY_POOL_WORKERS", os.cpu_count() or 2))
+HEAVY_TASK_TIMEOUT = float(os.getenv("HEAVY_TASK_TIMEOUT", 600))  # seconds
+
+# Background jobs
+JOB_RESULT_TTL_SECONDS = int(os.getenv("JOB_RESULT_TTL_SECONDS", 3600))
 
 # ML Configuration
 TEST_SIZE = 0.2
 RANDOM_STATE = 42
+
+# Feature preprocessing
+FEATURE_CACHE_MAX_BYTES = int(os.getenv("FEATURE_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # 256MB
+CATEGORY_MIN_FREQUENCY = float(os.getenv("CATEGORY_MIN_FREQUENCY", 0.01))  # rarer categories share one "other" level
+CATEGORY_MAX_LEVELS = 255  # most frequent categories kept per column
+ONEHOT_MAX_LEVELS = 20  # "auto" encoding one-hot encodes up to this many levels, ordinal above
+IDENTIFIER_UNIQUE_RATIO = 0.5  # text columns with more distinct values than this share of rows are dropped
+
+# Large-data training: histogram boosting on float32 features with a learning curve
+LARGE_DATA_ROW_THRESHOLD = int(os.getenv("LARGE_DATA_ROW_THRESHOLD", 200_000))
+LARGE_DATA_INITIAL_SAMPLES = 20_000  # rows in the first learning-curve step
+LARGE_DATA_GROWTH_FACTOR = 2  # each step multiplies the rows by this factor
+LARGE_DATA_PLATEAU_TOLERANCE = float(os.getenv("LARGE_DATA_PLATEAU_TOLERANCE", 0.002))  # smallest validation gain worth more rows
+LARGE_DATA_VALIDATION_ROWS = 50_000
+
+# Forecasting
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", 32))  # fitted Prophet models kept in memory
+GROUP_FORECAST_MAX_GROUPS = int(os.getenv("GROUP_FORECAST_MAX_GROUPS", 10_000))
+GROUP_FORECAST_MIN_POINTS = int(os.getenv("GROUP_FORECAST_MIN_POINTS", 30))  # shorter series use exponential smoothing
+ETS_INTERVAL_WIDTH = float(os.getenv("ETS_INTERVAL_WIDTH", 0.8))  # matches Prophet's default interval_width
+FORECAST_BACKTEST_TOLERANCE = float(os.getenv("FORECAST_BACKTEST_TOLERANCE", 0.05))  # ETS wins within this relative MAE of Prophet
+GROUP_FORECAST_BATCH_GROUPS = int(os.getenv("GROUP_FORECAST_BATCH_GROUPS", 25))  # series fitted per heavy-pool task
+
+# Model leaderboard
+LEADERBOARD_CV_FOLDS = int(os.getenv("LEADERBOARD_CV_FOLDS", 5))
+LEADERBOARD_HALVING_FACTOR = 2  # each rung keeps the best 1/factor of the candidates
+LEADERBOARD_MIN_SAMPLES = 1_000  # fewest rows a rung is evaluated on
+
+# Model registry and online prediction
+MODEL_DIR = os.getenv("MODEL_DIR", "saved_models")
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", 16))
+PREDICT_BATCH_MAX_ROWS = 512
+PREDICT_BATCH_WAIT_MS = 5  # how long a request waits for others to join its batch
+BATCH_SCORE_CHUNK_ROWS = int(os.getenv("BATCH_SCORE_CHUNK_ROWS", 100_000))
+BATCH_SCORE_WORKERS = int(os.getenv("BATCH_SCORE_WORKERS", 4))  # chunks scored concurrently
+
+# Anomaly detectors
+DETECTOR_DIR = os.getenv("DETECTOR_DIR", "saved_detectors")
+DETECTOR_REFIT_SCORED_RATIO = float(os.getenv("DETECTOR_REFIT_SCORED_RATIO", 1.0))  # refit due once scored rows reach this x training rows; 0 never
@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import os
 from dotenv import load_dotenv
+from services.serialization import FastJSONResponse, FastJSONRoute
 
 # Load environment variables
 load_dotenv()
@@ -11,8 +12,10 @@ load_dotenv()
 app = FastAPI(
     title="AI Data Analytics Dashboard API",
     description="Backend API for data analytics, ML, and AI insights",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
+app.router.route_class = FastJSONRoute
 
 # Configure CORS
 app.add_middleware(
@@ -24,7 +27,14 @@ app.add_middleware(
 )
 
 # Import routes
-from routes import upload, eda, models, forecast, risk, ai_insights, reports
+from routes import upload, eda, models, forecast, risk, ai_insights, reports, jobs
+from services.cache_service import dataframe_cache, forecast_cache, model_cache
+from services.executor_service import ExecutorService
+from services.job_service import JobService
+from services.prediction_service import PredictionService
+from services.batch_scoring_service import BatchScoringService
+from services.llm_cache import llm_cache
+from services.llm_client import LLMClient
 
 # Include routers
 app.include_router(upload.router, prefix="/api", tags=["Upload"])
@@ -34,6 +44,7 @@ app.include_router(forecast.router, prefix="/api", tags=["Forecast"])
 app.include_router(risk.router, prefix="/api", tags=["Risk"])
 app.include_router(ai_insights.router, prefix="/api", tags=["AI Insights"])
 app.include_router(reports.router, prefix="/api", tags=["Reports"])
+app.include_router(jobs.router, prefix="/api", tags=["Jobs"])
 
 # Root endpoint
 @app.get("/")
@@ -49,6 +60,26 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+# Runtime metrics
+@app.get("/metrics")
+async def metrics():
+    return {
+        "dataframe_cache": dataframe_cache.stats(),
+        "worker_pools": ExecutorService.stats(),
+        "jobs": JobService.stats(),
+        "model_cache": model_cache.stats(),
+        "forecast_cache": forecast_cache.stats(),
+        "prediction_batches": PredictionService.stats(),
+        "batch_scoring": BatchScoringService.stats(),
+        "llm": LLMClient.stats(),
+        "llm_cache": llm_cache.stats()
+    }
+
+@app.on_event("shutdown")
+async def shutdown():
+    ExecutorService.shutdown()
+    await LLMClient.close()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,57 @@
+"""Local stand-in for the OpenRouter chat completions API.
+
+Answers every request with a canned completion after a configurable
+latency and fails a configurable share of requests with 429 or 503, so the
+LLM client's pooling, concurrency limit and retries can be exercised
+without a key or network access:
+
+    MOCK_LLM_LATENCY_MS=800 MOCK_LLM_FAILURE_RATE=0.2 uvicorn mock_openrouter:app --port 8001
+    OPENROUTER_BASE_URL=http://localhost:8001/api/v1 uvicorn main:app --port 8000
+"""
+import asyncio
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+MOCK_LLM_LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", 500))
+MOCK_LLM_FAILURE_RATE = float(os.getenv("MOCK_LLM_FAILURE_RATE", 0.0))  # share of requests answered 429 or 503
+
+app = FastAPI(title="Mock OpenRouter")
+stats = {"requests": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+@app.post("/api/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    stats["requests"] += 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(MOCK_LLM_LATENCY_MS / 1000)
+        if random.random() < MOCK_LLM_FAILURE_RATE:
+            stats["failed"] += 1
+            if random.random() < 0.5:
+                return JSONResponse(status_code=429, content={"error": "rate limited"}, headers={"Retry-After": "0.1"})
+            return JSONResponse(status_code=503, content={"error": "unavailable"})
+
+        question = next((m["content"] for m in reversed(payload.get("messages", [])) if m.get("role") == "user"), "")
+        answer = f"Mock answer to: {question[:200]}"
+        return {
+            "id": f"mock-{uuid.uuid4()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(answer.split()), "total_tokens": len(answer.split())},
+        }
+    finally:
+        stats["in_flight"] -= 1
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
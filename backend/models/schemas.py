@@ -8,6 +8,7 @@ class FileUploadResponse(BaseModel):
     rows: int
     columns: int
     column_names: List[str]
+    dtypes: Dict[str, str] = {}
     upload_time: str
 
 class EdaSummary(BaseModel):
@@ -27,6 +28,9 @@ class ModelTraining(BaseModel):
     target_column: str
     model_type: str  # "regression" or "classification"
     features: Optional[List[str]] = None
+    mode: str = "single"  # "single", "leaderboard" or "large_data"; single switches to large_data above LARGE_DATA_ROW_THRESHOLD rows
+    cv_folds: Optional[int] = None  # leaderboard folds, LEADERBOARD_CV_FOLDS by default
+    categorical_encoding: str = "auto"  # "auto", "onehot" or "ordinal"
 
 class ModelMetrics(BaseModel):
     model_type: str
@@ -37,10 +41,18 @@ class ModelMetrics(BaseModel):
     precision: Optional[float] = None
     recall: Optional[float] = None
 
+class PredictionRequest(BaseModel):
+    rows: List[Dict[str, Any]]
+
 class ForecastRequest(BaseModel):
     date_column: str
     value_column: str
     periods: int = 12
+    yearly_seasonality: bool = True
+    weekly_seasonality: Optional[bool] = None  # None lets Prophet decide from the data
+    daily_seasonality: bool = False
+    seasonality_mode: str = "additive"  # "additive" or "multiplicative"
+    group_by: Optional[str] = None  # forecast every series of this column
 
 class ForecastResponse(BaseModel):
     forecast: List[Dict[str, Any]]
@@ -59,6 +71,7 @@ class ChatMessage(BaseModel):
 class AIResponse(BaseModel):
     answer: str
     confidence: float
+    cached: bool = False
     sources: Optional[List[str]] = None
 
 class ReportRequest(BaseModel):
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, Body
 from services.ai_service import AIService
+from services.serialization import FastJSONRoute
 from models.schemas import ChatMessage, AIResponse
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 @router.post("/ai/chat", response_model=AIResponse)
 async def chat_with_data(message: ChatMessage = Body(...)):
@@ -12,7 +13,8 @@ async def chat_with_data(message: ChatMessage = Body(...)):
         
         return AIResponse(
             answer=result.get("answer", "No response"),
-            confidence=result.get("confidence", 0)
+            confidence=result.get("confidence", 0),
+            cached=result.get("cached", False)
         )
     
     except Exception as e:
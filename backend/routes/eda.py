@@ -1,56 +1,259 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, Request
+from services.file_service import FileService, VersionNotFoundError
+from services.streaming_eda_service import StreamingEDAService
+from services.approx_service import ApproxService
 from services.eda_service import EDAService
-from services.file_service import FileService
+from services.profile_service import ProfileService
+from services.chart_service import ChartService
+from services.correlation_service import CorrelationService
+from services.arrow_service import ArrowService, ARROW_STREAM_MEDIA_TYPE
+from services.executor_service import ExecutorService, TaskTimeoutError
+from services.serialization import FastJSONRoute
+from config import (
+    STREAMING_EDA_THRESHOLD_BYTES, CHART_MAX_BINS, CHART_MAX_POINTS, CHART_TOP_K,
+    CORRELATION_DTYPE, CORRELATION_TOP_K, PAGE_SIZE_MAX_JSON, PAGE_SIZE_MAX_ARROW
+)
+from typing import Optional
 import pandas as pd
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
+
+def _use_streaming(mode: Optional[str], file_id: str, filename: str) -> bool:
+    """Stream when asked to or, without an explicit mode, when the version is
+    too large to profile in memory; mode=exact is always exact"""
+    return mode == "stream" or (
+        mode is None and FileService.file_size(file_id, filename) > STREAMING_EDA_THRESHOLD_BYTES
+    )
+
+async def _analyze(kind: str, mode: str, file_id: str, filename: str, background_tasks: BackgroundTasks, **params):
+    """Run an EDA analysis exactly, or on the dataset sample with exact refinement queued"""
+    df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+    
+    if mode != "approx":
+        return await ExecutorService.run("light", ApproxService.compute_exact, kind, df, file_id, **params)
+    
+    result = await ExecutorService.run("light", ApproxService.compute_approx, kind, df, file_id, **params)
+    if result["mode"] == "approx":
+        background_tasks.add_task(ExecutorService.run, "light", ApproxService.compute_exact, kind, df, file_id, **params)
+    return result
 
 @router.get("/eda/summary")
-async def get_eda_summary(file_id: str = Query(...), filename: str = Query(...)):
-    """Get EDA summary for dataset"""
+async def get_eda_summary(
+    background_tasks: BackgroundTasks,
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    mode: Optional[str] = Query(None, regex="^(exact|stream|approx)$")
+):
+    """Get EDA summary for dataset; mode=stream profiles in chunks, mode=approx uses a sample"""
     try:
-        df = FileService.load_dataframe(file_id, filename)
-        summary = EDAService.get_summary(df)
-        return summary
+        file_id = FileService.resolve(file_id, version)
+        if _use_streaming(mode, file_id, filename):
+            profile = await ExecutorService.run("light", StreamingEDAService.get_profile, file_id, filename)
+            return StreamingEDAService.get_summary(profile)
+
+        return await _analyze("summary", mode or "exact", file_id, filename, background_tasks)
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/eda/stats")
-async def get_column_stats(file_id: str = Query(...), filename: str = Query(...)):
-    """Get column statistics"""
+async def get_column_stats(
+    background_tasks: BackgroundTasks,
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    mode: Optional[str] = Query(None, regex="^(exact|stream|approx)$")
+):
+    """Get column statistics; mode=stream profiles in chunks, mode=approx uses a sample"""
     try:
-        df = FileService.load_dataframe(file_id, filename)
-        stats = EDAService.get_column_stats(df)
-        return stats
+        file_id = FileService.resolve(file_id, version)
+        if _use_streaming(mode, file_id, filename):
+            profile = await ExecutorService.run("light", StreamingEDAService.get_profile, file_id, filename)
+            return StreamingEDAService.get_column_stats(profile)
+
+        return await _analyze("stats", mode or "exact", file_id, filename, background_tasks)
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/eda/correlation")
-async def get_correlation(file_id: str = Query(...), filename: str = Query(...)):
-    """Get correlation matrix"""
+async def get_correlation(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    mode: str = Query("exact", regex="^(exact|approx)$"),
+    method: str = Query("pearson", regex="^(pearson|spearman)$"),
+    dtype: str = Query(CORRELATION_DTYPE, regex="^(float32|float64)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated subset of numeric columns"),
+    orient: str = Query("dict", regex="^(dict|split)$")
+):
+    """Get correlation matrix, or the sub-matrix for the given columns, as a
+    nested dict or in split form; mode=approx uses a sample"""
     try:
-        df = FileService.load_dataframe(file_id, filename)
-        correlation = EDAService.get_correlation_matrix(df)
-        return correlation
+        file_id = FileService.resolve(file_id, version)
+        selected = tuple(col.strip() for col in columns.split(",") if col.strip()) if columns else None
+        if mode == "exact" and ArrowService.accepts_arrow(request):
+            df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+            result = await ExecutorService.run("light", CorrelationService.get_correlation, df, file_id, method, dtype)
+            return ArrowService.stream(CorrelationService.to_frame(result, selected), {"method": method})
+        
+        return await _analyze(
+            "correlation", mode, file_id, filename, background_tasks,
+            method=method, dtype=dtype, columns=selected, orient=orient
+        )
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/eda/correlation/top")
+async def get_top_correlations(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    mode: str = Query("exact", regex="^(exact|approx)$"),
+    method: str = Query("pearson", regex="^(pearson|spearman)$"),
+    dtype: str = Query(CORRELATION_DTYPE, regex="^(float32|float64)$"),
+    k: int = Query(CORRELATION_TOP_K, ge=1, le=1000),
+    threshold: float = Query(0.0, ge=0.0, le=1.0)
+):
+    """Get the k most strongly correlated column pairs with |r| >= threshold"""
+    try:
+        file_id = FileService.resolve(file_id, version)
+        if mode == "exact" and ArrowService.accepts_arrow(request):
+            df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+            result = await ExecutorService.run("light", CorrelationService.get_correlation, df, file_id, method, dtype)
+            return ArrowService.stream(CorrelationService.top_pairs_frame(result, k, threshold), {"method": method})
+        
+        return await _analyze(
+            "correlation_pairs", mode, file_id, filename, background_tasks,
+            method=method, dtype=dtype, k=k, threshold=threshold
+        )
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/eda/outliers")
-async def get_outliers(file_id: str = Query(...), filename: str = Query(...)):
-    """Detect outliers"""
+async def get_outliers(
+    background_tasks: BackgroundTasks,
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    mode: str = Query("exact", regex="^(exact|approx)$")
+):
+    """Detect outliers: per-column counts, IQR bounds and encoded row
+    positions; mode=approx takes IQR bounds from a sample"""
+    try:
+        file_id = FileService.resolve(file_id, version)
+        return await _analyze("outliers", mode, file_id, filename, background_tasks)
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/eda/outliers/rows")
+async def get_outlier_rows(
+    request: Request,
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    column: str = Query(...),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=PAGE_SIZE_MAX_ARROW),
+    sort: str = Query("severity", regex="^(severity|position)$"),
+    orient: str = Query("records", regex="^(records|split)$")
+):
+    """Get one page of a column's outlier rows, most severe first by default"""
+    if page_size > PAGE_SIZE_MAX_JSON and not ArrowService.accepts_arrow(request):
+        raise HTTPException(
+            status_code=400,
+            detail=f"page_size above {PAGE_SIZE_MAX_JSON} requires Accept: {ARROW_STREAM_MEDIA_TYPE}"
+        )
     try:
-        df = FileService.load_dataframe(file_id, filename)
-        outliers = EDAService.get_outliers(df)
-        return outliers
+        file_id = FileService.resolve(file_id, version)
+        df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+        profile = await ExecutorService.run("light", ProfileService.get_profile, df, file_id)
+        arrow = ArrowService.accepts_arrow(request)
+        result = await ExecutorService.run(
+            "light", EDAService.get_outlier_rows, df, column, profile, page, page_size, sort,
+            "frame" if arrow else orient
+        )
+        if arrow:
+            rows = result.pop("rows")
+            return ArrowService.stream(rows, result)
+        return result
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/eda/charts")
-async def get_chart_data(file_id: str = Query(...), filename: str = Query(...)):
-    """Get chart-ready data"""
+async def get_chart_data(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    mode: str = Query("exact", regex="^(exact|stream|approx)$"),
+    bins: Optional[int] = Query(None, ge=1, le=CHART_MAX_BINS),
+    top_k: int = Query(CHART_TOP_K, ge=1, le=100),
+    max_points: int = Query(CHART_MAX_POINTS, ge=3, le=5000)
+):
+    """Get chart-ready data: histograms (auto Freedman-Diaconis bins unless
+    bins is given), top-k category bars and LTTB-downsampled date series;
+    mode=stream serves histograms and bars from the mergeable aggregates"""
     try:
-        df = FileService.load_dataframe(file_id, filename)
-        charts = EDAService.get_chart_data(df)
+        file_id = FileService.resolve(file_id, version)
+        if mode == "stream":
+            aggregates = await ExecutorService.run("light", StreamingEDAService.get_aggregates, file_id, filename)
+            frames = StreamingEDAService.get_histograms(aggregates, bins) + StreamingEDAService.get_bars(aggregates.profile, top_k)
+            if ArrowService.accepts_arrow(request):
+                charts = [{key: value for key, value in chart.items() if key != "data"} for chart in frames]
+                return ArrowService.stream(ChartService.to_long_frame(frames), {"charts": charts, "mode": "stream"})
+            return {"charts": ChartService.to_records(frames), "mode": "stream"}
+
+        if mode == "exact" and ArrowService.accepts_arrow(request):
+            frames = await _analyze(
+                "chart_frames", mode, file_id, filename, background_tasks,
+                bins=bins, top_k=top_k, max_points=max_points
+            )
+            charts = [{key: value for key, value in chart.items() if key != "data"} for chart in frames]
+            return ArrowService.stream(ChartService.to_long_frame(frames), {"charts": charts})
+        
+        charts = await _analyze(
+            "charts", mode, file_id, filename, background_tasks,
+            bins=bins, top_k=top_k, max_points=max_points
+        )
+        if mode == "approx":
+            return charts
         return {"charts": charts}
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,36 +1,291 @@
-from fastapi import APIRouter, HTTPException, Query, Body
-from services.forecast_service import ForecastService
-from services.file_service import FileService
+import asyncio
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Query, Body, Request
+from fastapi.responses import JSONResponse
+from services.forecast_service import GROUP_FORECAST_COLUMNS, ForecastService
+from services.file_service import FileService, VersionNotFoundError
+from services.arrow_service import ArrowService
+from services.executor_service import ExecutorService, TaskTimeoutError
+from services.job_service import Job, JobService
+from services.serialization import FastJSONRoute, split_records
 from models.schemas import ForecastRequest
+from config import GROUP_FORECAST_BATCH_GROUPS
+from typing import Optional, Tuple
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
+
+SEASONALITY_MODES = ("additive", "multiplicative")
+
+def _seasonality(config: ForecastRequest) -> dict:
+    """Prophet seasonality settings of a request; part of the fit cache key"""
+    if config.seasonality_mode not in SEASONALITY_MODES:
+        raise ValueError(f"seasonality_mode must be one of: {', '.join(SEASONALITY_MODES)}")
+    return {
+        "yearly_seasonality": config.yearly_seasonality,
+        "weekly_seasonality": config.weekly_seasonality,
+        "daily_seasonality": config.daily_seasonality,
+        "seasonality_mode": config.seasonality_mode,
+    }
+
+async def _forecast(
+    file_id: str,
+    filename: str,
+    config: ForecastRequest,
+    orient: str = "records",
+    job: Optional[Job] = None
+) -> dict:
+    JobService.report(job, 0.1, "loading dataset")
+    df = await ExecutorService.run(
+        "light",
+        FileService.load_dataframe,
+        file_id,
+        filename,
+        columns=[config.date_column, config.value_column]
+    )
+    
+    JobService.report(job, 0.3, "fitting forecast model")
+    result = await ExecutorService.run(
+        "heavy",
+        ForecastService.forecast_time_series,
+        df,
+        config.date_column,
+        config.value_column,
+        config.periods,
+        file_id,
+        _seasonality(config)
+    )
+    
+    if "error" in result:
+        # Fallback to exponential smoothing
+        JobService.report(job, 0.8, "falling back to exponential smoothing")
+        result = await ExecutorService.run(
+            "light",
+            ForecastService.ets_forecast,
+            df,
+            config.date_column,
+            config.value_column,
+            config.periods
+        )
+    
+    if orient == "split" and "forecast" in result:
+        result["forecast"] = split_records(result["forecast"])
+    return result
+
+async def _forecast_arrow(file_id: str, filename: str, config: ForecastRequest):
+    """Forecast table streamed as Arrow, built from the forecast frame directly"""
+    df = await ExecutorService.run(
+        "light",
+        FileService.load_dataframe,
+        file_id,
+        filename,
+        columns=[config.date_column, config.value_column]
+    )
+    
+    try:
+        frame, fit_info = await ExecutorService.run(
+            "heavy", ForecastService.prophet_frame, df, config.date_column, config.value_column, config.periods,
+            file_id, _seasonality(config)
+        )
+        method = "prophet"
+    except TaskTimeoutError:
+        raise
+    except Exception:
+        # Fallback to exponential smoothing
+        try:
+            frame, model = await ExecutorService.run(
+                "light", ForecastService.ets_frame, df, config.date_column, config.value_column, config.periods
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        method = "exponential_smoothing"
+        fit_info = None
+    
+    metadata = {"method": method, "periods": config.periods}
+    if fit_info is not None:
+        metadata["fit"] = fit_info
+    else:
+        metadata["model"] = model
+    return ArrowService.stream(frame, metadata)
+
+async def _forecast_groups(
+    file_id: str,
+    filename: str,
+    config: ForecastRequest,
+    job: Optional[Job] = None
+) -> Tuple[pd.DataFrame, dict]:
+    """Forecast every series of config.group_by from one load of the dataset.
+
+    Groups are fitted in batches of GROUP_FORECAST_BATCH_GROUPS per heavy
+    task; progress advances as batches finish. Returns the long forecast
+    frame and a summary of methods used and groups that failed.
+    """
+    columns = [config.group_by, config.date_column, config.value_column]
+    source = FileService.read_metadata(file_id)
+    if source and source.get("column_names"):
+        missing = [col for col in columns if col not in source["column_names"]]
+        if missing:
+            raise ValueError(f"Columns not found: {', '.join(missing)}")
+    
+    JobService.report(job, 0.05, "loading dataset")
+    df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename, columns=columns)
+    groups = await ExecutorService.run("light", ForecastService.partition, df, config.group_by, config.date_column)
+    
+    seasonality = _seasonality(config)
+    batches = [groups[i:i + GROUP_FORECAST_BATCH_GROUPS] for i in range(0, len(groups), GROUP_FORECAST_BATCH_GROUPS)]
+    
+    async def run_batch(index: int, batch: list):
+        return index, await ExecutorService.run(
+            "heavy", ForecastService.forecast_groups, batch,
+            config.date_column, config.value_column, config.periods, seasonality
+        )
+    
+    tasks = [asyncio.ensure_future(run_batch(i, batch)) for i, batch in enumerate(batches)]
+    results = [None] * len(batches)
+    JobService.report(job, 0.1, f"forecasting {len(groups)} series")
+    try:
+        for done, next_batch in enumerate(asyncio.as_completed(tasks), start=1):
+            index, result = await next_batch
+            results[index] = result
+            JobService.report(job, 0.1 + 0.85 * done / len(batches), f"{done}/{len(batches)} batches forecast")
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    
+    # Batches finish out of order; results keep the sorted group order
+    frames = [frame for frame, _ in results if not frame.empty]
+    failed = [error for _, errors in results for error in errors]
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=GROUP_FORECAST_COLUMNS)
+    summary = {
+        "group_by": config.group_by,
+        "periods": config.periods,
+        "groups": len(groups),
+        "methods": {str(method): int(count) for method, count in frame.drop_duplicates("group")["method"].value_counts().items()},
+        "failed": failed,
+    }
+    return frame, summary
+
+async def _forecast_grouped(file_id: str, filename: str, config: ForecastRequest, job: Optional[Job] = None) -> dict:
+    """Grouped forecast as JSON, the forecast table column-oriented"""
+    frame, summary = await _forecast_groups(file_id, filename, config, job)
+    summary["forecast"] = {
+        "columns": frame.columns.tolist(),
+        "data": frame.astype(object).where(frame.notna(), None).to_numpy().tolist(),
+    }
+    return summary
 
 @router.post("/forecast")
 async def forecast(
+    request: Request,
     file_id: str = Query(...),
     filename: str = Query(...),
-    config: ForecastRequest = Body(...)
+    version: Optional[int] = Query(None, ge=1),
+    config: ForecastRequest = Body(...),
+    background: bool = Query(False),
+    orient: str = Query("records", regex="^(records|split)$")
 ):
-    """Generate time series forecast"""
+    """Generate time series forecast; orient=split returns the forecast table
+    column-oriented, background=true returns a job id immediately. With
+    group_by every series in that column is forecast and the table is always
+    column-oriented."""
     try:
-        df = FileService.load_dataframe(file_id, filename)
-        
-        result = ForecastService.forecast_time_series(
-            df,
-            config.date_column,
-            config.value_column,
-            config.periods
-        )
+        file_id = FileService.resolve(file_id, version)
+        _seasonality(config)
+        if config.group_by is not None:
+            if background:
+                job = JobService.submit(
+                    "forecast",
+                    {"file_id": file_id, "filename": filename, "config": config.model_dump()},
+                    lambda job: _forecast_grouped(file_id, filename, config, job)
+                )
+                return JSONResponse(status_code=202, content=job.to_dict(include_result=False))
+            if ArrowService.accepts_arrow(request):
+                frame, summary = await _forecast_groups(file_id, filename, config)
+                return ArrowService.stream(frame, summary)
+            return await _forecast_grouped(file_id, filename, config)
         
-        if "error" in result:
-            # Fallback to simple forecast
-            result = ForecastService.simple_forecast(
-                df,
-                config.value_column,
-                config.periods
+        if background:
+            job = JobService.submit(
+                "forecast",
+                {"file_id": file_id, "filename": filename, "config": config.model_dump(), "orient": orient},
+                lambda job: _forecast(file_id, filename, config, orient, job)
+            )
+            return JSONResponse(status_code=202, content=job.to_dict(include_result=False))
+
+        if ArrowService.accepts_arrow(request):
+            return await _forecast_arrow(file_id, filename, config)
+
+        return await _forecast(file_id, filename, config, orient)
+    
+    except HTTPException:
+        raise
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _backtest(
+    file_id: str,
+    filename: str,
+    config: ForecastRequest,
+    origins: int,
+    job: Optional[Job] = None
+) -> dict:
+    JobService.report(job, 0.1, "loading dataset")
+    df = await ExecutorService.run(
+        "light",
+        FileService.load_dataframe,
+        file_id,
+        filename,
+        columns=[config.date_column, config.value_column]
+    )
+    
+    JobService.report(job, 0.3, f"backtesting {origins} origins")
+    return await ExecutorService.run(
+        "heavy",
+        ForecastService.backtest,
+        df,
+        config.date_column,
+        config.value_column,
+        config.periods,
+        origins,
+        _seasonality(config)
+    )
+
+@router.post("/forecast/backtest")
+async def backtest(
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    config: ForecastRequest = Body(...),
+    origins: int = Query(3, ge=1, le=20),
+    background: bool = Query(False)
+):
+    """Rolling-origin backtest of exponential smoothing against Prophet over
+    the last origins * periods values; recommends the cheaper model unless
+    Prophet is clearly more accurate"""
+    try:
+        file_id = FileService.resolve(file_id, version)
+        _seasonality(config)
+        if background:
+            job = JobService.submit(
+                "forecast_backtest",
+                {"file_id": file_id, "filename": filename, "config": config.model_dump(), "origins": origins},
+                lambda job: _backtest(file_id, filename, config, origins, job)
             )
+            return JSONResponse(status_code=202, content=job.to_dict(include_result=False))
         
-        return result
+        return await _backtest(file_id, filename, config, origins)
     
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException, Query
+from services.job_service import JobService
+from services.serialization import FastJSONRoute
+
+router = APIRouter(route_class=FastJSONRoute)
+
+@router.get("/jobs")
+async def list_jobs():
+    """List known background jobs"""
+    return {"jobs": JobService.list_jobs(), "counts": JobService.stats()}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=60)):
+    """Get job status and result; wait > 0 long-polls until the job finishes"""
+    job = JobService.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    job = await JobService.wait(job, wait)
+    return job.to_dict()
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = JobService.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job.to_dict(include_result=False)
@@ -1,35 +1,224 @@
-from fastapi import APIRouter, HTTPException, Query, Body
+from fastapi import APIRouter, HTTPException, Query, Body, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from services.ml_service import MLService
-from services.file_service import FileService
-from models.schemas import ModelTraining, ModelMetrics
+from services.file_service import FileService, VersionNotFoundError
+from services.executor_service import ExecutorService, TaskTimeoutError
+from services.job_service import Job, JobService
+from services.model_registry import ModelRegistry, ModelNotFoundError
+from services.prediction_service import PredictionService
+from services.leaderboard_service import LeaderboardService
+from services.preprocessing_service import PreprocessingService
+from services.batch_scoring_service import BatchScoringService, PYARROW_AVAILABLE
+from services.arrow_service import ArrowService, ARROW_STREAM_MEDIA_TYPE
+from services.serialization import FastJSONRoute
+from models.schemas import ModelTraining, ModelMetrics, PredictionRequest
+from config import LARGE_DATA_ROW_THRESHOLD, LEADERBOARD_CV_FOLDS
+from typing import Optional
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
+
+async def _train(file_id: str, filename: str, training_config: ModelTraining, job: Optional[Job] = None) -> dict:
+    columns = None
+    if training_config.features:
+        columns = list(dict.fromkeys(training_config.features + [training_config.target_column]))
+
+    JobService.report(job, 0.1, "loading dataset")
+    df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename, columns=columns)
+    
+    JobService.report(job, 0.2, "encoding features")
+    prepared = await ExecutorService.run(
+        "light",
+        PreprocessingService.get_prepared,
+        df,
+        file_id,
+        training_config.target_column,
+        training_config.features,
+        training_config.categorical_encoding
+    )
+    
+    if training_config.mode == "leaderboard":
+        result = await LeaderboardService.run(
+            prepared,
+            training_config.model_type,
+            training_config.cv_folds or LEADERBOARD_CV_FOLDS,
+            job
+        )
+        JobService.report(job, 0.9, "registering model")
+        return await ExecutorService.run("light", _register, result, df, file_id, filename)
+    
+    JobService.report(job, 0.3, "training model")
+    if training_config.mode == "large_data" or len(df) > LARGE_DATA_ROW_THRESHOLD:
+        result = await ExecutorService.run(
+            "heavy",
+            MLService.train_large_model,
+            prepared,
+            training_config.model_type
+        )
+    elif training_config.model_type == "regression":
+        result = await ExecutorService.run(
+            "heavy",
+            MLService.train_regression_model,
+            prepared,
+            "linear"
+        )
+    else:
+        result = await ExecutorService.run(
+            "heavy",
+            MLService.train_classification_model,
+            prepared
+        )
+    
+    JobService.report(job, 0.9, "registering model")
+    return await ExecutorService.run("light", _register, result, df, file_id, filename)
+
+def _register(result: dict, df, file_id: str, filename: str) -> dict:
+    """Persist the fitted estimator and return the training result with its model_id"""
+    estimator = result.pop("estimator")
+    metadata = ModelRegistry.register(estimator, {
+        "file_id": file_id,
+        "filename": filename,
+        "dataset_fingerprint": FileService.fingerprint(file_id, df),
+        "estimator": type(estimator).__name__,
+        **result,
+    })
+    return {**result, "model_id": metadata["model_id"]}
 
 @router.post("/model/train")
 async def train_model(
     file_id: str = Query(...),
     filename: str = Query(...),
-    training_config: ModelTraining = Body(...)
+    version: Optional[int] = Query(None, ge=1),
+    training_config: ModelTraining = Body(...),
+    background: bool = Query(False)
 ):
-    """Train ML model"""
+    """Train ML model; background=true returns a job id immediately"""
     try:
-        df = FileService.load_dataframe(file_id, filename)
-        
-        if training_config.model_type == "regression":
-            result = MLService.train_regression_model(
-                df,
-                training_config.target_column,
-                "linear"
-            )
-        elif training_config.model_type == "classification":
-            result = MLService.train_classification_model(
-                df,
-                training_config.target_column
-            )
-        else:
+        file_id = FileService.resolve(file_id, version)
+        if training_config.model_type not in ("regression", "classification"):
             raise HTTPException(status_code=400, detail="Invalid model type")
-        
-        return result
+        if training_config.mode not in ("single", "leaderboard", "large_data"):
+            raise HTTPException(status_code=400, detail="Invalid training mode")
+        if training_config.categorical_encoding not in ("auto", "onehot", "ordinal"):
+            raise HTTPException(status_code=400, detail="Invalid categorical encoding")
+        if training_config.cv_folds is not None and not 2 <= training_config.cv_folds <= 20:
+            raise HTTPException(status_code=400, detail="cv_folds must be between 2 and 20")
+
+        if background:
+            job = JobService.submit(
+                "model_train",
+                {"file_id": file_id, "filename": filename, "config": training_config.model_dump()},
+                lambda job: _train(file_id, filename, training_config, job)
+            )
+            return JSONResponse(status_code=202, content=job.to_dict(include_result=False))
+
+        return await _train(file_id, filename, training_config)
     
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/models")
+async def list_models():
+    """List registered models, newest first"""
+    return await ExecutorService.run("light", ModelRegistry.list_models)
+
+@router.get("/model/{model_id}")
+async def get_model(model_id: str):
+    """Get a registered model's metadata: feature schema, metrics and dataset fingerprint"""
+    try:
+        return await ExecutorService.run("light", ModelRegistry.get_metadata, model_id)
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+@router.delete("/model/{model_id}")
+async def delete_model(model_id: str):
+    """Delete a registered model"""
+    try:
+        await ExecutorService.run("light", ModelRegistry.delete, model_id)
+        PredictionService.forget(model_id)
+        return {"model_id": model_id, "deleted": True}
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+@router.post("/model/{model_id}/predict")
+async def predict(model_id: str, request: PredictionRequest = Body(...)):
+    """Predict with a registered model; concurrent requests are micro-batched
+    into one vectorized predict call"""
+    try:
+        if not request.rows:
+            raise HTTPException(status_code=400, detail="No rows to predict")
+        return await PredictionService.predict(model_id, request.rows)
+    except HTTPException:
+        raise
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/model/{model_id}/score")
+async def score_dataset(
+    request: Request,
+    model_id: str,
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    output: str = Query("dataset", regex="^(dataset|stream)$"),
+    background: bool = Query(False)
+):
+    """Score a whole uploaded dataset with a registered model.
+
+    output=dataset writes the rows with a prediction column to a new
+    columnar dataset and reports throughput; output=stream returns them as
+    CSV, or as an Arrow IPC stream when requested via the Accept header.
+    """
+    try:
+        file_id = FileService.resolve(file_id, version)
+        await ExecutorService.run("light", BatchScoringService.check_schema, model_id, file_id)
+
+        if output == "stream":
+            if ArrowService.accepts_arrow(request):
+                return StreamingResponse(
+                    BatchScoringService.stream_arrow(model_id, file_id, filename),
+                    media_type=ARROW_STREAM_MEDIA_TYPE
+                )
+            return StreamingResponse(
+                BatchScoringService.stream_csv(model_id, file_id, filename),
+                media_type="text/csv"
+            )
+
+        if not PYARROW_AVAILABLE:
+            raise HTTPException(status_code=400, detail="Writing scored datasets requires pyarrow; use output=stream")
+
+        if background:
+            job = JobService.submit(
+                "model_score",
+                {"model_id": model_id, "file_id": file_id, "filename": filename},
+                lambda job: BatchScoringService.score_to_dataset(model_id, file_id, filename, job)
+            )
+            return JSONResponse(status_code=202, content=job.to_dict(include_result=False))
+
+        return await BatchScoringService.score_to_dataset(model_id, file_id, filename)
+
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except HTTPException:
+        raise
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,30 +1,58 @@
 from fastapi import APIRouter, HTTPException, Body, Query
+from fastapi.responses import JSONResponse
 from services.ai_service import AIService
-from services.file_service import FileService
+from services.file_service import FileService, VersionNotFoundError
 from services.eda_service import EDAService
+from services.profile_service import ProfileService
+from services.executor_service import ExecutorService, TaskTimeoutError
+from services.job_service import Job, JobService
+from services.serialization import FastJSONRoute
 from models.schemas import ReportRequest
+from typing import Optional
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
+
+async def _generate(file_id: str, filename: str, format: str, job: Optional[Job] = None) -> dict:
+    JobService.report(job, 0.1, "loading dataset")
+    df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+    profile = await ExecutorService.run("light", ProfileService.get_profile, df, file_id)
+    summary = await ExecutorService.run("light", EDAService.get_summary, df, profile)
+    
+    # Generate AI report
+    JobService.report(job, 0.3, "generating report")
+    report_result = await AIService.generate_report(str(summary))
+    
+    return {
+        "report": report_result.get("report"),
+        "format": format,
+        "status": report_result.get("status", "error"),
+        "cached": report_result.get("cached", False)
+    }
 
 @router.post("/report/generate")
 async def generate_report(
     file_id: str = Query(...),
     filename: str = Query(...),
-    format: str = Query("html", regex="^(html|pdf)$")
+    version: Optional[int] = Query(None, ge=1),
+    format: str = Query("html", regex="^(html|pdf)$"),
+    background: bool = Query(False)
 ):
-    """Generate AI-powered report"""
+    """Generate AI-powered report; background=true returns a job id immediately"""
     try:
-        df = FileService.load_dataframe(file_id, filename)
-        summary = EDAService.get_summary(df)
-        
-        # Generate AI report
-        report_result = await AIService.generate_report(str(summary))
-        
-        return {
-            "report": report_result.get("report"),
-            "format": format,
-            "status": report_result.get("status", "error")
-        }
+        file_id = FileService.resolve(file_id, version)
+        if background:
+            job = JobService.submit(
+                "report_generate",
+                {"file_id": file_id, "filename": filename, "format": format},
+                lambda job: _generate(file_id, filename, format, job)
+            )
+            return JSONResponse(status_code=202, content=job.to_dict(include_result=False))
+
+        return await _generate(file_id, filename, format)
     
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
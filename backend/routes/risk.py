@@ -1,29 +1,229 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Body, BackgroundTasks, Request
+from fastapi.responses import JSONResponse
+from services.file_service import FileService, VersionNotFoundError
+from services.approx_service import ApproxService
 from services.risk_service import RiskService
-from services.file_service import FileService
+from services.streaming_eda_service import StreamingEDAService
+from services.anomaly_service import AnomalyDetectorService, DetectorNotFoundError
+from services.arrow_service import ArrowService, ARROW_STREAM_MEDIA_TYPE
+from services.executor_service import ExecutorService, TaskTimeoutError
+from services.job_service import Job, JobService
+from services.serialization import FastJSONRoute
+from models.schemas import PredictionRequest
+from config import PAGE_SIZE_MAX_JSON, PAGE_SIZE_MAX_ARROW
+from typing import Optional
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
+
+async def _analyze(file_id: str, filename: str, contamination: float, mode: str = "exact", job: Optional[Job] = None) -> dict:
+    JobService.report(job, 0.1, "loading dataset")
+    df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+    
+    JobService.report(job, 0.3, "detecting anomalies")
+    compute = ApproxService.compute_approx if mode == "approx" else ApproxService.compute_exact
+    return await ExecutorService.run("heavy", compute, "anomalies", df, file_id, contamination=contamination)
 
 @router.post("/risk/analyze")
 async def analyze_risk(
+    request: Request,
+    background_tasks: BackgroundTasks,
     file_id: str = Query(...),
     filename: str = Query(...),
-    contamination: float = Query(0.1, ge=0.01, le=0.5)
+    version: Optional[int] = Query(None, ge=1),
+    contamination: float = Query(0.1, ge=0.01, le=0.5),
+    mode: str = Query("exact", regex="^(exact|approx)$"),
+    background: bool = Query(False)
 ):
-    """Detect anomalies and calculate risk"""
+    """Detect anomalies and calculate risk; mode=approx fits on a sample,
+    background=true returns a job id immediately and takes precedence: the
+    job runs the requested mode"""
     try:
-        df = FileService.load_dataframe(file_id, filename)
-        result = RiskService.detect_anomalies(df, contamination)
+        file_id = FileService.resolve(file_id, version)
+        if background:
+            job = JobService.submit(
+                "risk_analyze",
+                {"file_id": file_id, "filename": filename, "contamination": contamination, "mode": mode},
+                lambda job: _analyze(file_id, filename, contamination, mode, job)
+            )
+            return JSONResponse(status_code=202, content=job.to_dict(include_result=False))
+
+        if mode == "approx":
+            df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+            result = await ExecutorService.run(
+                "heavy", ApproxService.compute_approx, "anomalies", df, file_id, contamination=contamination
+            )
+            if result["mode"] == "approx":
+                background_tasks.add_task(
+                    ExecutorService.run, "heavy", ApproxService.compute_exact, "anomalies", df, file_id,
+                    contamination=contamination
+                )
+            return result
+
+        result = await _analyze(file_id, filename, contamination)
+        if ArrowService.accepts_arrow(request) and "total_anomalies" in result:
+            df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+            page = await ExecutorService.run(
+                "heavy", RiskService.get_anomaly_rows, df, contamination, file_id,
+                1, max(result["total_anomalies"], 1), "score", "frame"
+            )
+            summary = {key: value for key, value in result.items() if key not in ("anomalies", "anomaly_rows")}
+            return ArrowService.stream(page["rows"], summary)
         return result
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/risk/anomalies")
+async def get_anomaly_rows(
+    request: Request,
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    contamination: float = Query(0.1, ge=0.01, le=0.5),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=PAGE_SIZE_MAX_ARROW),
+    sort: str = Query("score", regex="^(score|position)$"),
+    orient: str = Query("records", regex="^(records|split)$")
+):
+    """Get one page of anomalous rows, highest anomaly score first by default"""
+    if page_size > PAGE_SIZE_MAX_JSON and not ArrowService.accepts_arrow(request):
+        raise HTTPException(
+            status_code=400,
+            detail=f"page_size above {PAGE_SIZE_MAX_JSON} requires Accept: {ARROW_STREAM_MEDIA_TYPE}"
+        )
+    try:
+        file_id = FileService.resolve(file_id, version)
+        df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+        arrow = ArrowService.accepts_arrow(request)
+        result = await ExecutorService.run(
+            "heavy", RiskService.get_anomaly_rows, df, contamination, file_id, page, page_size, sort,
+            "frame" if arrow else orient
+        )
+        if arrow:
+            rows = result.pop("rows")
+            return ArrowService.stream(rows, result)
+        return result
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _refit(file_id: str, filename: str, contamination: float, job: Optional[Job] = None) -> dict:
+    JobService.report(job, 0.1, "loading dataset")
+    df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+    
+    JobService.report(job, 0.3, "fitting anomaly detector")
+    entry, _ = await ExecutorService.run("heavy", AnomalyDetectorService.fit, df, file_id, contamination)
+    if entry is None:
+        raise ValueError("No numeric columns found")
+    return entry["metadata"]
+
+@router.post("/risk/detector/refit")
+async def refit_detector(
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    contamination: float = Query(0.1, ge=0.01, le=0.5),
+    background: bool = Query(False)
+):
+    """Refit and persist the anomaly detector of a dataset"""
+    try:
+        file_id = FileService.resolve(file_id, version)
+        if background:
+            job = JobService.submit(
+                "risk_refit",
+                {"file_id": file_id, "filename": filename, "contamination": contamination},
+                lambda job: _refit(file_id, filename, contamination, job)
+            )
+            return JSONResponse(status_code=202, content=job.to_dict(include_result=False))
+        
+        return await _refit(file_id, filename, contamination)
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/risk/detectors")
+async def list_detectors(file_id: Optional[str] = Query(None)):
+    """List persisted anomaly detectors, newest first"""
+    try:
+        detectors = await ExecutorService.run("light", AnomalyDetectorService.list_detectors, file_id)
+        return {"detectors": detectors}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/risk/score")
+async def score_anomalies(
+    file_id: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    contamination: float = Query(0.1, ge=0.01, le=0.5),
+    source_file_id: Optional[str] = Query(None),
+    source_filename: Optional[str] = Query(None),
+    request: Optional[PredictionRequest] = Body(None)
+):
+    """Score new rows, or every row of another upload, against the
+    dataset's persisted detector without refitting it"""
+    try:
+        file_id = FileService.resolve(file_id, version)
+        if request is not None:
+            return await ExecutorService.run(
+                "light", AnomalyDetectorService.score_rows, file_id, contamination, request.rows
+            )
+        if source_file_id is None or source_filename is None:
+            raise ValueError("Send rows in the body or give source_file_id and source_filename")
+        source_file_id = FileService.resolve(source_file_id)
+        return await ExecutorService.run(
+            "heavy", AnomalyDetectorService.score_file, file_id, contamination, source_file_id, source_filename
+        )
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except DetectorNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/risk/quality")
-async def get_data_quality(file_id: str = Query(...), filename: str = Query(...)):
-    """Get data quality score"""
+async def get_data_quality(
+    background_tasks: BackgroundTasks,
+    file_id: str = Query(...),
+    filename: str = Query(...),
+    version: Optional[int] = Query(None, ge=1),
+    mode: str = Query("exact", regex="^(exact|stream|approx)$")
+):
+    """Get data quality score; mode=approx estimates it from a sample,
+    mode=stream counts nulls in chunks. Appended versions always take it
+    from their delta-maintained null counts, which are exact"""
     try:
-        df = FileService.load_dataframe(file_id, filename)
-        score = RiskService.get_data_quality_score(df)
+        file_id = FileService.resolve(file_id, version)
+        if mode == "stream" or (mode == "exact" and FileService.split_version(file_id)[1] > 1):
+            profile = await ExecutorService.run("light", StreamingEDAService.get_profile, file_id, filename)
+            return {"quality_score": StreamingEDAService.get_quality_score(profile)}
+
+        df = await ExecutorService.run("light", FileService.load_dataframe, file_id, filename)
+        if mode == "approx":
+            result = await ExecutorService.run("light", ApproxService.compute_approx, "quality", df, file_id)
+            if result["mode"] == "approx":
+                background_tasks.add_task(ExecutorService.run, "light", ApproxService.compute_exact, "quality", df, file_id)
+            return result
+
+        score = await ExecutorService.run("light", ApproxService.compute_exact, "quality", df, file_id)
         return {"quality_score": score}
+    except VersionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
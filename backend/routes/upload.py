@@ -1,31 +1,91 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from services.file_service import FileService
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Query
+from services.file_service import FileService, FileTooLargeError
+from services.version_service import DatasetVersionService
+from services.executor_service import ExecutorService, TaskTimeoutError
+from services.serialization import FastJSONRoute
 from models.schemas import FileUploadResponse
+from datetime import datetime
+from config import UPLOAD_DIR
 import json
+import os
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 @router.post("/upload", response_model=FileUploadResponse)
-async def upload_dataset(file: UploadFile = File(...)):
+async def upload_dataset(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """Upload dataset file"""
     try:
-        content = await file.read()
-        
-        # Validate file
-        is_valid, message = FileService.validate_file(file.filename, len(content))
+        # Validate file type before reading anything
+        is_valid, message = FileService.validate_file(file.filename, 0)
         if not is_valid:
             raise HTTPException(status_code=400, detail=message)
         
-        # Save file
-        file_id = FileService.save_file(content, file.filename)
+        # Stream to disk, aborting once the size limit is crossed
+        try:
+            file_id, size, sha256 = await FileService.save_stream(file.read, file.filename)
+        except FileTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        
+        # Single incremental pass for shape and types
+        file_info = await ExecutorService.run("light", FileService.scan_file_info, file_id, file.filename)
+        file_info.update({
+            "id": file_id,
+            "filename": file.filename,
+            "size": size,
+            "upload_time": datetime.now().isoformat()
+        })
+        FileService.write_metadata(file_id, {**file_info, "sha256": sha256})
         
-        # Load and analyze
-        df = FileService.load_dataframe(file_id, file.filename)
-        file_info = FileService.get_file_info(df, file_id, file.filename)
+        # Full parse and columnar copy happen after the response is sent
+        background_tasks.add_task(ExecutorService.run, "light", FileService.build_columnar, file_id, file.filename)
         
         return FileUploadResponse(**file_info)
     
     except HTTPException:
         raise
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/upload/{file_id}/append")
+async def append_rows(file_id: str, filename: str = Query(...), file: UploadFile = File(...)):
+    """Append a CSV/XLSX batch with the dataset's columns as a new version;
+    its profile, null counts and histograms are updated from the batch alone"""
+    try:
+        is_valid, message = FileService.validate_file(file.filename, 0)
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=message)
+        
+        # Stream the batch to disk like an upload and parse it from there
+        try:
+            batch_id, _, _ = await FileService.save_stream(file.read, file.filename)
+        except FileTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        
+        batch_path = os.path.join(UPLOAD_DIR, f"{batch_id}_{file.filename}")
+        try:
+            batch = await ExecutorService.run("light", DatasetVersionService.parse_batch, batch_path, file.filename)
+            return await ExecutorService.run("light", DatasetVersionService.append, file_id, filename, batch)
+        finally:
+            os.remove(batch_path)
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TaskTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/upload/{file_id}/versions")
+async def list_versions(file_id: str):
+    """List every version of a dataset, oldest first"""
+    try:
+        versions = await ExecutorService.run("light", DatasetVersionService.list_versions, file_id)
+        return {"versions": versions}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,13 +1,34 @@
-import httpx
-import json
-from config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL, OPENROUTER_MODEL
+from config import OPENROUTER_MODEL
+from services.llm_cache import LLMResponseCache, llm_cache
+from services.llm_client import LLMClient
 from typing import Dict, Any, Optional
 
+CHAT_TEMPERATURE = 0.7
+REPORT_TEMPERATURE = 0.7
+
+REPORT_PROMPT = """Based on the following dataset analysis, generate a professional data report with:
+1. Executive Summary (2-3 sentences)
+2. Key Findings (3-5 bullet points)
+3. Recommendations (2-3 actionable items)
+
+Dataset Summary:
+{summary}
+
+Please format as structured JSON."""
+
 class AIService:
     @staticmethod
     async def query_ai(question: str, context: Optional[str] = None, model: str = OPENROUTER_MODEL) -> Dict[str, Any]:
-        """Query OpenRouter AI with data context"""
-        
+        """Query OpenRouter AI with data context; answers are served from
+        llm_cache when the same question was asked about the same context"""
+        key = LLMResponseCache.key("chat", question, context, model, CHAT_TEMPERATURE)
+        result, cached = await llm_cache.get_or_call(
+            key, lambda: AIService._query_ai(question, context, model), lambda result: "error" not in result
+        )
+        return {**result, "cached": cached}
+
+    @staticmethod
+    async def _query_ai(question: str, context: Optional[str], model: str) -> Dict[str, Any]:
         system_prompt = """You are a data analyst AI assistant. You have access to dataset information and should provide 
         clear, actionable insights based on the data context provided. Be concise and specific."""
         
@@ -20,27 +41,7 @@ class AIService:
         ]
         
         try:
-            headers = {
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "HTTP-Referer": "https://analytics-dashboard.app",
-                "X-Title": "AI Data Analytics Dashboard",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": model,
-                "messages": messages,
-                "temperature": 0.7,
-                "max_tokens": 1000
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{OPENROUTER_BASE_URL}/chat/completions",
-                    headers=headers,
-                    json=payload,
-                    timeout=30.0
-                )
+            response = await LLMClient.chat(messages, model, temperature=CHAT_TEMPERATURE, max_tokens=1000)
             
             if response.status_code == 200:
                 result = response.json()
@@ -67,42 +68,23 @@ class AIService:
     
     @staticmethod
     async def generate_report(dataset_summary: str, model: str = OPENROUTER_MODEL) -> Dict[str, Any]:
-        """Generate AI-powered report"""
-        
-        prompt = f"""Based on the following dataset analysis, generate a professional data report with:
-1. Executive Summary (2-3 sentences)
-2. Key Findings (3-5 bullet points)
-3. Recommendations (2-3 actionable items)
-
-Dataset Summary:
-{dataset_summary}
+        """Generate AI-powered report; a report for the same summary is
+        served from llm_cache"""
+        key = LLMResponseCache.key("report", REPORT_PROMPT, dataset_summary, model, REPORT_TEMPERATURE)
+        result, cached = await llm_cache.get_or_call(
+            key, lambda: AIService._generate_report(dataset_summary, model), lambda result: result["status"] == "success"
+        )
+        return {**result, "cached": cached}
 
-Please format as structured JSON."""
-        
+    @staticmethod
+    async def _generate_report(dataset_summary: str, model: str) -> Dict[str, Any]:
+        prompt = REPORT_PROMPT.format(summary=dataset_summary)
         messages = [
             {"role": "user", "content": prompt}
         ]
         
         try:
-            headers = {
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "HTTP-Referer": "https://analytics-dashboard.app",
-                "X-Title": "AI Data Analytics Dashboard"
-            }
-            
-            payload = {
-                "model": model,
-                "messages": messages,
-                "temperature": 0.7,
-                "max_tokens": 2000
-            }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{OPENROUTER_BASE_URL}/chat/completions",
-                    headers=headers,
-                    json=payload
-                )
+            response = await LLMClient.chat(messages, model, temperature=REPORT_TEMPERATURE, max_tokens=2000)
             
             if response.status_code == 200:
                 result = response.json()
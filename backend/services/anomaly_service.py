@@ -0,0 +1,356 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, Hashable, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from config import (
+    BATCH_SCORE_CHUNK_ROWS,
+    DETECTOR_DIR,
+    DETECTOR_REFIT_SCORED_RATIO,
+    RANDOM_STATE,
+)
+from services.cache_service import model_cache, result_cache
+from services.file_service import FileService
+from services.index_set import ROW_INDEX, IndexSet, fetch_rows, page_order
+
+TOP_ANOMALIES = 10
+
+
+class DetectorNotFoundError(KeyError):
+    """No fitted detector for the requested dataset and contamination"""
+
+
+class AnomalyDetectorService:
+    """IsolationForest detectors persisted per (upload, contamination).
+
+    A detector is stored with joblib next to a JSON metadata file holding
+    its numeric columns, the column means used to impute missing values,
+    the score threshold, the version and fingerprint of the data it was
+    fitted on and how many rows have been scored against it since. New rows
+    are scored against that baseline without refitting. All versions of an
+    upload share its detector, so appending rows keeps the baseline.
+
+    Refits happen explicitly through ``fit``, or on the next analysis of a
+    version newer than (or, for legacy uploads, different from) the one
+    fitted. Scoring never refits; it reports ``refit_due`` when the latest
+    version differs from the fitted one or the rows scored reach
+    DETECTOR_REFIT_SCORED_RATIO times the rows the detector was fitted on.
+    """
+
+    _locks: Dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    @staticmethod
+    def _lock(detector_id: str) -> threading.Lock:
+        with AnomalyDetectorService._locks_guard:
+            return AnomalyDetectorService._locks.setdefault(detector_id, threading.Lock())
+
+    @staticmethod
+    def detector_id(file_id: str, contamination: float) -> str:
+        """Id of the detector shared by every version of ``file_id``'s upload"""
+        upload_id, _ = FileService.split_version(file_id)
+        return f"{upload_id}_{contamination:g}"
+
+    @staticmethod
+    def model_path(detector_id: str) -> str:
+        return os.path.join(DETECTOR_DIR, f"{detector_id}.joblib")
+
+    @staticmethod
+    def metadata_path(detector_id: str) -> str:
+        return os.path.join(DETECTOR_DIR, f"{detector_id}.json")
+
+    @staticmethod
+    def labels(df: pd.DataFrame, columns: List[str]) -> List[Hashable]:
+        """Labels of ``df`` for column names from detector metadata, which are
+        strings even where the frame's labels are not (numeric Excel headers);
+        names the frame lacks are returned unchanged"""
+        by_name = {str(col): col for col in df.columns}
+        return [by_name.get(str(col), col) for col in columns]
+
+    @staticmethod
+    def matrix(df: pd.DataFrame, columns: List[str], means: List[float]) -> np.ndarray:
+        """float32 matrix of ``columns`` with missing and non-numeric values
+        replaced by ``means``, built column by column without copying the frame"""
+        X = np.empty((len(df), len(columns)), dtype=np.float32)
+        for j, (col, mean) in enumerate(zip(AnomalyDetectorService.labels(df, columns), means)):
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            X[:, j] = np.where(np.isnan(values), mean, values)
+        return X
+
+    @staticmethod
+    def fit_detector(df: pd.DataFrame, contamination: float) -> Optional[Dict[str, Any]]:
+        """Fitted IsolationForest with its columns and imputation means, and
+        the scores of the training rows; None without numeric columns"""
+        labels = list(df.select_dtypes(include=[np.number]).columns)
+        if not labels:
+            return None
+
+        means = [float(df[col].mean()) if df[col].notna().any() else 0.0 for col in labels]
+        X = AnomalyDetectorService.matrix(df, labels, means)
+        detector = IsolationForest(contamination=contamination, random_state=RANDOM_STATE)
+        detector.fit(X)
+        return {
+            "detector": detector,
+            "columns": [str(col) for col in labels],
+            "means": means,
+            "scores": -detector.score_samples(X),
+        }
+
+    @staticmethod
+    def _write(path: str, write: Callable[[BinaryIO], Any]) -> None:
+        """Write ``path`` through a uniquely named temporary file, so readers
+        never see a partial file and concurrent writers never share one"""
+        fd, tmp_path = tempfile.mkstemp(dir=DETECTOR_DIR, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _write_metadata(metadata: Dict[str, Any]) -> None:
+        AnomalyDetectorService._write(
+            AnomalyDetectorService.metadata_path(metadata["detector_id"]),
+            lambda f: f.write(json.dumps(metadata).encode("utf-8"))
+        )
+
+    @staticmethod
+    def save(detector: IsolationForest, metadata: Dict[str, Any]) -> None:
+        os.makedirs(DETECTOR_DIR, exist_ok=True)
+        detector_id = metadata["detector_id"]
+        with AnomalyDetectorService._lock(detector_id):
+            AnomalyDetectorService._write(AnomalyDetectorService.model_path(detector_id), lambda f: joblib.dump(detector, f))
+            AnomalyDetectorService._write_metadata(metadata)
+
+    @staticmethod
+    def fit(df: pd.DataFrame, file_id: str, contamination: float) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """Fit the detector of an upload on version ``file_id`` and persist
+        it; returns the cached entry and the training rows' scores, or
+        (None, None) without numeric columns"""
+        started_at = time.perf_counter()
+        fitted = AnomalyDetectorService.fit_detector(df, contamination)
+        if fitted is None:
+            return None, None
+
+        detector = fitted["detector"]
+        detector_id = AnomalyDetectorService.detector_id(file_id, contamination)
+        upload_id, version = FileService.split_version(file_id)
+        metadata = {
+            "detector_id": detector_id,
+            "file_id": upload_id,
+            "dataset_key": file_id,
+            "version": version,
+            "contamination": contamination,
+            "columns": fitted["columns"],
+            "means": fitted["means"],
+            # Rows scoring above the threshold are anomalies
+            "threshold": float(-detector.offset_),
+            "rows": len(df),
+            "fingerprint": FileService.fingerprint(file_id, df),
+            "fitted_at": datetime.now().isoformat(),
+            "fit_seconds": round(time.perf_counter() - started_at, 3),
+            "scored_rows": 0,
+        }
+        AnomalyDetectorService.save(detector, metadata)
+
+        entry = {"detector": detector, "metadata": metadata}
+        model_cache.put(("detector", detector_id), entry)
+        # Scores of any version cached from the previous detector no longer apply
+        def stale(key: Any) -> bool:
+            if not isinstance(key, tuple):
+                return False
+            if key[:1] == ("anomaly_scores",) and key[2:] == (contamination,):
+                dataset_key = key[1]
+            elif key[:2] == ("exact", "anomalies") and key[3:] == ((("contamination", contamination),),):
+                dataset_key = key[2]
+            else:
+                return False
+            return FileService.split_version(str(dataset_key))[0] == upload_id
+
+        result_cache.invalidate(stale)
+        return entry, fitted["scores"]
+
+    @staticmethod
+    def load(file_id: str, contamination: float) -> Dict[str, Any]:
+        """Detector of ``file_id``'s upload and its metadata, from the
+        in-memory LRU or from disk"""
+        detector_id = AnomalyDetectorService.detector_id(file_id, contamination)
+
+        def read() -> Dict[str, Any]:
+            path = AnomalyDetectorService.metadata_path(detector_id)
+            if not os.path.exists(path):
+                raise DetectorNotFoundError(
+                    f"No anomaly detector for {FileService.split_version(file_id)[0]} at contamination {contamination:g}; "
+                    "run /api/risk/analyze or /api/risk/detector/refit first"
+                )
+            with open(path) as f:
+                metadata = json.load(f)
+            return {"detector": joblib.load(AnomalyDetectorService.model_path(detector_id)), "metadata": metadata}
+
+        return model_cache.get_or_load(("detector", detector_id), read)
+
+    @staticmethod
+    def refit_reason(metadata: Dict[str, Any], fingerprint: Optional[str] = None) -> Optional[str]:
+        """Why the detector should be refitted, or None while it is current"""
+        if fingerprint is not None and fingerprint != metadata["fingerprint"]:
+            return "dataset changed"
+        if DETECTOR_REFIT_SCORED_RATIO and metadata["scored_rows"] >= DETECTOR_REFIT_SCORED_RATIO * metadata["rows"]:
+            return f"{metadata['scored_rows']} rows scored since the fit"
+        return None
+
+    @staticmethod
+    def current_fingerprint(metadata: Dict[str, Any]) -> Optional[str]:
+        """Fingerprint of the latest version of the detector's upload, when
+        its upload metadata records one"""
+        try:
+            return FileService.fingerprint(FileService.resolve(metadata["file_id"]))
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def get_scores(df: pd.DataFrame, file_id: str, contamination: float) -> Optional[Dict[str, np.ndarray]]:
+        """Scores and anomaly positions of the rows of version ``file_id``
+        from its upload's persisted detector, refitting first when the
+        version is newer than (or differs from) the one fitted"""
+        try:
+            entry = AnomalyDetectorService.load(file_id, contamination)
+        except DetectorNotFoundError:
+            entry = None
+
+        _, version = FileService.split_version(file_id)
+        if entry is not None and entry["metadata"]["fingerprint"] == FileService.fingerprint(file_id, df):
+            metadata = entry["metadata"]
+            scores = -entry["detector"].score_samples(
+                AnomalyDetectorService.matrix(df, metadata["columns"], metadata["means"])
+            )
+            threshold = metadata["threshold"]
+        elif entry is not None and version < entry["metadata"].get("version", 1):
+            # An older version keeps the newer baseline; its own fit is not persisted
+            fitted = AnomalyDetectorService.fit_detector(df, contamination)
+            if fitted is None:
+                return None
+            scores, threshold = fitted["scores"], float(-fitted["detector"].offset_)
+        else:
+            entry, scores = AnomalyDetectorService.fit(df, file_id, contamination)
+            if entry is None:
+                return None
+            threshold = entry["metadata"]["threshold"]
+
+        return {"scores": scores, "positions": np.flatnonzero(scores > threshold)}
+
+    @staticmethod
+    def score_frame(entry: Dict[str, Any], rows: pd.DataFrame) -> np.ndarray:
+        """Anomaly scores of ``rows`` (higher is more anomalous); raises
+        ValueError when columns the detector was fitted on are missing"""
+        metadata = entry["metadata"]
+        missing = [
+            str(label) for label in AnomalyDetectorService.labels(rows, metadata["columns"])
+            if label not in rows.columns
+        ]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        return -entry["detector"].score_samples(
+            AnomalyDetectorService.matrix(rows, metadata["columns"], metadata["means"])
+        )
+
+    @staticmethod
+    def record_scored(entry: Dict[str, Any], rows: int) -> Optional[str]:
+        """Count rows scored against a detector and return its refit reason"""
+        metadata = entry["metadata"]
+        with AnomalyDetectorService._lock(metadata["detector_id"]):
+            metadata["scored_rows"] += rows
+            # A refit since this entry was loaded owns the metadata file now
+            with open(AnomalyDetectorService.metadata_path(metadata["detector_id"])) as f:
+                current = json.load(f)
+            if current["fitted_at"] == metadata["fitted_at"]:
+                AnomalyDetectorService._write_metadata(metadata)
+        return AnomalyDetectorService.refit_reason(metadata, AnomalyDetectorService.current_fingerprint(metadata))
+
+    @staticmethod
+    def score_rows(file_id: str, contamination: float, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Scores of ad-hoc rows against the dataset's detector"""
+        entry = AnomalyDetectorService.load(file_id, contamination)
+        scores = AnomalyDetectorService.score_frame(entry, pd.DataFrame(rows))
+        threshold = entry["metadata"]["threshold"]
+        return {
+            "detector_id": entry["metadata"]["detector_id"],
+            "scores": scores.tolist(),
+            "is_anomaly": (scores > threshold).tolist(),
+            "threshold": threshold,
+            "refit_due": AnomalyDetectorService.record_scored(entry, len(scores)),
+        }
+
+    @staticmethod
+    def score_file(
+        file_id: str,
+        contamination: float,
+        source_file_id: str,
+        source_filename: str,
+        chunk_rows: int = BATCH_SCORE_CHUNK_ROWS
+    ) -> Dict[str, Any]:
+        """Score another upload against the dataset's detector, chunk by
+        chunk; returns the most anomalous rows and the anomaly set as an
+        IndexSet encoding"""
+        entry = AnomalyDetectorService.load(file_id, contamination)
+        metadata = entry["metadata"]
+        threshold = metadata["threshold"]
+        started_at = time.perf_counter()
+
+        rows = 0
+        flagged: List[np.ndarray] = []
+        top: List[Dict[str, Any]] = []
+        for chunk in FileService.iter_chunks(source_file_id, source_filename, chunk_rows):
+            scores = AnomalyDetectorService.score_frame(entry, chunk)
+            local = np.flatnonzero(scores > threshold)
+            flagged.append(local + rows)
+
+            best = local[page_order(scores[local], 1, TOP_ANOMALIES)]
+            records = fetch_rows(chunk, best, {"anomaly_score": scores[best]})
+            for record in records:
+                record[ROW_INDEX] += rows
+            top = sorted(top + records, key=lambda record: record["_anomaly_score"], reverse=True)[:TOP_ANOMALIES]
+            rows += len(chunk)
+
+        positions = np.concatenate(flagged) if flagged else np.empty(0, dtype=np.int64)
+        seconds = time.perf_counter() - started_at
+        return {
+            "detector_id": metadata["detector_id"],
+            "source_file_id": source_file_id,
+            "rows": rows,
+            "total_anomalies": int(len(positions)),
+            "anomaly_rate": float(len(positions) / rows * 100) if rows else 0.0,
+            "threshold": threshold,
+            "anomalies": top,
+            "anomaly_rows": IndexSet(positions, rows).encode(),
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(rows / seconds, 1) if seconds else 0.0,
+            "refit_due": AnomalyDetectorService.record_scored(entry, rows),
+        }
+
+    @staticmethod
+    def list_detectors(file_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Persisted detectors, newest first, of every upload or of
+        ``file_id``'s upload"""
+        if not os.path.isdir(DETECTOR_DIR):
+            return []
+        upload_id = FileService.split_version(file_id)[0] if file_id is not None else None
+        detectors = []
+        for name in os.listdir(DETECTOR_DIR):
+            if name.endswith(".json"):
+                with open(os.path.join(DETECTOR_DIR, name)) as f:
+                    metadata = json.load(f)
+                if upload_id is None or metadata["file_id"] == upload_id:
+                    reason = AnomalyDetectorService.refit_reason(metadata, AnomalyDetectorService.current_fingerprint(metadata))
+                    detectors.append({**metadata, "refit_due": reason})
+        return sorted(detectors, key=lambda metadata: metadata["fitted_at"], reverse=True)
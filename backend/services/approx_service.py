@@ -0,0 +1,321 @@
+import math
+from statistics import NormalDist
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import APPROX_CONFIDENCE, APPROX_SAMPLE_SIZE, RANDOM_STATE
+from services.cache_service import result_cache
+from services.chart_service import ChartService
+from services.correlation_service import CorrelationService
+from services.index_set import ROW_INDEX, IndexSet
+from services.serialization import split_matrix
+from services.eda_service import EDAService
+from services.profile_service import ProfileService
+from services.risk_service import RiskService
+
+Z = NormalDist().inv_cdf(0.5 + APPROX_CONFIDENCE / 2)
+
+
+def _interval(low: float, high: float) -> List[float]:
+    return [float(low), float(high)]
+
+
+def _proportion_interval(successes: int, n: int, population: int) -> List[float]:
+    """Wilson interval for a proportion, scaled to a population count"""
+    if n == 0:
+        return _interval(0, population)
+    p = successes / n
+    denominator = 1 + Z * Z / n
+    center = (p + Z * Z / (2 * n)) / denominator
+    half_width = Z * math.sqrt(p * (1 - p) / n + Z * Z / (4 * n * n)) / denominator
+    return _interval(max(0.0, center - half_width) * population, min(1.0, center + half_width) * population)
+
+
+def _mean_interval(mean: float, std: float, n: int, population: int) -> List[float]:
+    """Normal interval for a mean with finite population correction"""
+    if n < 2 or math.isnan(std):
+        return _interval(math.nan, math.nan)
+    correction = math.sqrt((population - n) / (population - 1)) if population > 1 else 0.0
+    half_width = Z * std / math.sqrt(n) * correction
+    return _interval(mean - half_width, mean + half_width)
+
+
+def _quantile_interval(sorted_values: np.ndarray, q: float) -> List[float]:
+    """Distribution-free interval for a quantile from order statistics"""
+    n = len(sorted_values)
+    if n == 0:
+        return _interval(math.nan, math.nan)
+    spread = Z * math.sqrt(n * q * (1 - q))
+    low = int(min(max(math.floor(n * q - spread), 0), n - 1))
+    high = int(min(max(math.ceil(n * q + spread), 0), n - 1))
+    return _interval(sorted_values[low], sorted_values[high])
+
+
+def _correlation_interval(r: float, n: int, method: str = "pearson") -> List[float]:
+    """Fisher z interval for a correlation (Fieller's variance for Spearman)"""
+    if n <= 3 or math.isnan(r):
+        return _interval(math.nan, math.nan)
+    if abs(r) >= 1:
+        return _interval(r, r)
+    z = math.atanh(r)
+    variance = 1.06 if method == "spearman" else 1.0
+    half_width = Z * math.sqrt(variance / (n - 3))
+    return _interval(math.tanh(z - half_width), math.tanh(z + half_width))
+
+
+class ApproxService:
+    """Sample-based answers for interactive endpoints.
+
+    Every analysis exists in an exact form, cached per dataset once computed,
+    and an approximate form computed on one reproducible uniform sample per
+    dataset. Approximate responses are wrapped in an envelope carrying the
+    sample size and confidence intervals; once the exact result has been
+    refined into the cache, the same envelope returns it with mode "exact".
+    """
+
+    @staticmethod
+    def get_sample(df: pd.DataFrame, dataset_key: Hashable, size: int = APPROX_SAMPLE_SIZE) -> Dict[str, Any]:
+        """Uniform sample without replacement, drawn once per dataset with a fixed seed"""
+        def draw() -> Dict[str, Any]:
+            if len(df) <= size:
+                positions = np.arange(len(df))
+            else:
+                rng = np.random.default_rng(RANDOM_STATE)
+                positions = np.sort(rng.choice(len(df), size=size, replace=False))
+            frame = df.iloc[positions]
+            return {
+                "frame": frame,
+                "positions": positions,
+                "population": len(df),
+                "profile": ProfileService.build_profile(frame),
+            }
+
+        return result_cache.get_or_load(("sample", dataset_key, size), draw)
+
+    @staticmethod
+    def _exact_loaders(df: pd.DataFrame, dataset_key: Hashable, params: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+        profile = lambda: ProfileService.get_profile(df, dataset_key)
+        return {
+            "summary": lambda: EDAService.get_summary(df, profile()),
+            "stats": lambda: EDAService.get_column_stats(df, profile()),
+            "outliers": lambda: EDAService.get_outliers(df, profile()),
+            "charts": lambda: ChartService.to_records(ApproxService.compute_exact("chart_frames", df, dataset_key, **params)),
+            "chart_frames": lambda: EDAService.get_chart_frames(df, profile(), **params),
+            "correlation": lambda: EDAService.get_correlation_matrix(df, dataset_key, **params),
+            "correlation_pairs": lambda: EDAService.get_top_correlations(df, dataset_key, **params),
+            "anomalies": lambda: RiskService.detect_anomalies(df, params["contamination"], dataset_key),
+            "quality": lambda: RiskService.get_data_quality_score(df),
+        }
+
+    @staticmethod
+    def _exact_key(kind: str, dataset_key: Hashable, params: Dict[str, Any]) -> Tuple:
+        return ("exact", kind, dataset_key, tuple(sorted(params.items())))
+
+    @staticmethod
+    def compute_exact(kind: str, df: pd.DataFrame, dataset_key: Hashable, **params) -> Any:
+        """Exact result, computed once per dataset and parameters"""
+        loader = ApproxService._exact_loaders(df, dataset_key, params)[kind]
+        return result_cache.get_or_load(ApproxService._exact_key(kind, dataset_key, params), loader)
+
+    @staticmethod
+    def compute_approx(kind: str, df: pd.DataFrame, dataset_key: Hashable, **params) -> Dict[str, Any]:
+        """Sample-based result envelope, or the exact one if it is already cached"""
+        cached = result_cache.get(ApproxService._exact_key(kind, dataset_key, params))
+        if cached is not None:
+            return {"mode": "exact", "result": cached, "population_size": len(df), "sample_size": len(df)}
+
+        sample = ApproxService.get_sample(df, dataset_key)
+        approximate = getattr(ApproxService, f"_approx_{kind}")
+        result, intervals = approximate(df, sample, **params)
+        return {
+            "mode": "approx",
+            "result": result,
+            "population_size": sample["population"],
+            "sample_size": len(sample["positions"]),
+            "confidence_level": APPROX_CONFIDENCE,
+            "confidence_intervals": intervals,
+        }
+
+    @staticmethod
+    def _sorted_numeric(sample: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        frame = sample["frame"]
+        return {
+            col: np.sort(frame[col].dropna().to_numpy(dtype=np.float64))
+            for col in sample["profile"]["numeric"]
+        }
+
+    @staticmethod
+    def _numeric_intervals(sample: Dict[str, Any]) -> Dict[str, Dict[str, List[float]]]:
+        sorted_values = ApproxService._sorted_numeric(sample)
+        intervals = {}
+        for col, stats in sample["profile"]["numeric"].items():
+            values = sorted_values[col]
+            intervals[col] = {
+                "mean": _mean_interval(stats["mean"], stats["std"], stats["count"], sample["population"]),
+                "q25": _quantile_interval(values, 0.25),
+                "median": _quantile_interval(values, 0.5),
+                "q75": _quantile_interval(values, 0.75),
+            }
+        return intervals
+
+    @staticmethod
+    def _approx_summary(df: pd.DataFrame, sample: Dict[str, Any]) -> Tuple[dict, dict]:
+        n, population = len(sample["positions"]), sample["population"]
+        scale = population / n if n else 0.0
+        summary = EDAService.get_summary(sample["frame"], sample["profile"])
+
+        summary["row_count"] = population
+        summary["memory_usage"] = f"{sample['profile']['memory_bytes'] * scale / 1024**2:.2f} MB"
+        summary["missing_values"] = {
+            col: int(round(count * scale)) for col, count in sample["profile"]["missing_values"].items()
+        }
+        for stats in summary["numeric_summary"].values():
+            if "count" in stats:
+                stats["count"] = float(round(stats["count"] * scale))
+
+        numeric = ApproxService._numeric_intervals(sample)
+        intervals = {
+            "missing_values": {
+                col: _proportion_interval(count, n, population)
+                for col, count in sample["profile"]["missing_values"].items()
+            },
+            "numeric_summary": {
+                col: {"mean": ci["mean"], "25%": ci["q25"], "50%": ci["median"], "75%": ci["q75"]}
+                for col, ci in numeric.items()
+            },
+        }
+        return summary, intervals
+
+    @staticmethod
+    def _approx_stats(df: pd.DataFrame, sample: Dict[str, Any]) -> Tuple[dict, dict]:
+        stats = EDAService.get_column_stats(sample["frame"], sample["profile"])
+        return stats, ApproxService._numeric_intervals(sample)
+
+    @staticmethod
+    def _approx_outliers(df: pd.DataFrame, sample: Dict[str, Any]) -> Tuple[dict, dict]:
+        """IQR bounds from the sample, applied to every row with one comparison pass"""
+        numeric_stats = sample["profile"]["numeric"]
+        columns = list(numeric_stats)
+        if not columns:
+            return {}, {}
+
+        values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        lower = np.array([numeric_stats[col]["iqr_lower"] for col in columns])
+        upper = np.array([numeric_stats[col]["iqr_upper"] for col in columns])
+        with np.errstate(invalid="ignore"):
+            mask = (values < lower) | (values > upper)
+
+        outliers = {}
+        for j, col in enumerate(columns):
+            positions = np.flatnonzero(mask[:, j])
+            outliers[col] = {
+                "count": int(len(positions)),
+                "lower": float(lower[j]),
+                "upper": float(upper[j]),
+                "rows": IndexSet(positions, len(df)).encode()
+            }
+
+        numeric = ApproxService._numeric_intervals(sample)
+        intervals = {"bounds": {}}
+        for col in columns:
+            q25_low, q25_high = numeric[col]["q25"]
+            q75_low, q75_high = numeric[col]["q75"]
+            intervals["bounds"][col] = {
+                "lower": _interval(2.5 * q25_low - 1.5 * q75_high, 2.5 * q25_high - 1.5 * q75_low),
+                "upper": _interval(2.5 * q75_low - 1.5 * q25_high, 2.5 * q75_high - 1.5 * q25_low),
+            }
+        return outliers, intervals
+
+    @staticmethod
+    def _approx_charts(df: pd.DataFrame, sample: Dict[str, Any], **chart_params) -> Tuple[list, dict]:
+        n, population = len(sample["positions"]), sample["population"]
+        scale = population / n if n else 0.0
+        charts = EDAService.get_chart_data(sample["frame"], sample["profile"], **chart_params)
+
+        intervals = {}
+        for chart in charts:
+            if chart["type"] == "line":
+                continue
+            intervals[chart["name"]] = [
+                _proportion_interval(point["count"], n, population) for point in chart["data"]
+            ]
+            for point in chart["data"]:
+                point["count"] = int(round(point["count"] * scale))
+        return charts, intervals
+
+    @staticmethod
+    def _approx_correlation(
+        df: pd.DataFrame,
+        sample: Dict[str, Any],
+        method: str,
+        dtype: str,
+        columns: Optional[Tuple[str, ...]] = None,
+        orient: str = "dict"
+    ) -> Tuple[dict, dict]:
+        result = CorrelationService.compute(sample["frame"], method, dtype)
+        matrix = CorrelationService.to_dict(result, columns)
+        positions = {col: i for i, col in enumerate(result["columns"])}
+        pair_counts = result["pair_counts"]
+        intervals = {
+            a: {
+                b: _correlation_interval(r, int(pair_counts[positions[a], positions[b]]), method)
+                for b, r in row.items()
+            }
+            for a, row in matrix.items()
+        }
+        if orient == "split":
+            return split_matrix(matrix), split_matrix(intervals)
+        return matrix, intervals
+
+    @staticmethod
+    def _approx_correlation_pairs(
+        df: pd.DataFrame,
+        sample: Dict[str, Any],
+        method: str,
+        dtype: str,
+        k: int,
+        threshold: float
+    ) -> Tuple[list, dict]:
+        result = CorrelationService.compute(sample["frame"], method, dtype)
+        pairs = CorrelationService.top_pairs(result, k, threshold)
+        intervals = {
+            "correlation": [
+                _correlation_interval(pair["correlation"], pair["pair_count"], method) for pair in pairs
+            ]
+        }
+        return pairs, intervals
+
+    @staticmethod
+    def _approx_anomalies(df: pd.DataFrame, sample: Dict[str, Any], contamination: float) -> Tuple[dict, dict]:
+        n, population = len(sample["positions"]), sample["population"]
+        result = RiskService.detect_anomalies(sample["frame"], contamination)
+        if "total_anomalies" not in result:
+            return result, {}
+
+        found = result["total_anomalies"]
+        for anomaly in result["anomalies"]:
+            anomaly[ROW_INDEX] = int(sample["positions"][anomaly[ROW_INDEX]])
+        sampled = IndexSet.decode(result["anomaly_rows"]).positions
+        result["anomaly_rows"] = IndexSet(sample["positions"][sampled], population).encode()
+
+        estimate = int(round(found / n * population))
+        result["total_anomalies"] = estimate
+        result["summary"] = f"Estimated {estimate} anomalies ({result['risk_score']:.1f}% of data) from a {n}-row sample"
+
+        total_interval = _proportion_interval(found, n, population)
+        intervals = {
+            "total_anomalies": total_interval,
+            "risk_score": [bound / population * 100 for bound in total_interval],
+        }
+        return result, intervals
+
+    @staticmethod
+    def _approx_quality(df: pd.DataFrame, sample: Dict[str, Any]) -> Tuple[float, dict]:
+        frame = sample["frame"]
+        cells = frame.shape[0] * frame.shape[1]
+        nulls = int(frame.isnull().sum().sum())
+        score = RiskService.get_data_quality_score(frame)
+        low, high = _proportion_interval(cells - nulls, cells, 100) if cells else (0.0, 0.0)
+        return score, {"quality_score": _interval(low, high)}
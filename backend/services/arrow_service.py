@@ -0,0 +1,71 @@
+import io
+import pandas as pd
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from config import ARROW_BATCH_ROWS
+from services.serialization import dumps
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_METADATA_KEY = b"metadata"
+
+
+class ArrowService:
+    """Arrow IPC stream responses for tabular results.
+
+    Endpoints check ``accepts_arrow`` and, when the client asked for
+    ``application/vnd.apache.arrow.stream``, return their DataFrame through
+    ``stream`` instead of building JSON. Scalar fields of the result travel
+    as JSON in the schema metadata under ``metadata``.
+    """
+
+    @staticmethod
+    def accepts_arrow(request: Request) -> bool:
+        return PYARROW_AVAILABLE and ARROW_STREAM_MEDIA_TYPE in request.headers.get("accept", "")
+
+    @staticmethod
+    def to_table(frame: pd.DataFrame, metadata: Optional[Dict[str, Any]] = None) -> "pa.Table":
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        schema_metadata = dict(table.schema.metadata or {})
+        schema_metadata.pop(b"pandas", None)
+        if metadata:
+            schema_metadata[ARROW_METADATA_KEY] = dumps(metadata)
+        return table.replace_schema_metadata(schema_metadata)
+
+    @staticmethod
+    def new_stream(schema: "pa.Schema") -> Tuple["pa.ipc.RecordBatchStreamWriter", Callable[[], bytes]]:
+        """IPC stream writer over an in-memory buffer, and a function that
+        returns and clears the bytes written so far"""
+        buffer = io.BytesIO()
+
+        def drain() -> bytes:
+            data = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return data
+
+        return pa.ipc.new_stream(buffer, schema), drain
+
+    @staticmethod
+    def iter_ipc(table: "pa.Table", batch_rows: int = ARROW_BATCH_ROWS) -> Iterator[bytes]:
+        """The IPC stream of ``table`` as one chunk per record batch"""
+        writer, drain = ArrowService.new_stream(table.schema)
+        with writer:
+            yield drain()
+            for batch in table.to_batches(max_chunksize=batch_rows):
+                writer.write_batch(batch)
+                yield drain()
+        yield drain()
+
+    @staticmethod
+    def stream(frame: pd.DataFrame, metadata: Optional[Dict[str, Any]] = None) -> StreamingResponse:
+        table = ArrowService.to_table(frame, metadata)
+        return StreamingResponse(ArrowService.iter_ipc(table), media_type=ARROW_STREAM_MEDIA_TYPE)
@@ -0,0 +1,277 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from config import BATCH_SCORE_CHUNK_ROWS, BATCH_SCORE_WORKERS
+from services.arrow_service import ArrowService
+from services.executor_service import ExecutorService
+from services.file_service import FileService
+from services.job_service import Job, JobService
+from services.model_registry import ModelRegistry
+
+PREDICTION_COLUMN = "prediction"
+
+
+class ScoringRun:
+    """Row counts and timing of one batch scoring pass"""
+
+    def __init__(self, model_id: str, file_id: str):
+        self.model_id = model_id
+        self.file_id = file_id
+        self.rows = 0
+        self.invalid_rows = 0
+        self.chunks = 0
+        self.started_at = time.perf_counter()
+        self.seconds = 0.0
+
+    def add(self, scored: pd.DataFrame) -> None:
+        self.rows += len(scored)
+        self.invalid_rows += int(scored[PREDICTION_COLUMN].isna().sum())
+        self.chunks += 1
+        self.seconds = time.perf_counter() - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model_id": self.model_id,
+            "source_file_id": self.file_id,
+            "rows": self.rows,
+            "invalid_rows": self.invalid_rows,
+            "chunks": self.chunks,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+
+class BatchScoringService:
+    """Scores whole uploads against a registered model, chunk by chunk.
+
+    Chunks are read in order in the light pool and scored concurrently in
+    the heavy pool with at most BATCH_SCORE_WORKERS in flight, so memory is
+    bounded by the chunk size rather than the file size. Results come back
+    in file order with a ``prediction`` column appended; rows the model's
+    preprocessing cannot encode get a null prediction instead of failing
+    the whole file.
+    """
+
+    recent: Deque[Dict[str, Any]] = deque(maxlen=20)
+
+    @staticmethod
+    def check_schema(model_id: str, file_id: str) -> Dict[str, Any]:
+        """Model metadata, after checking the upload has every feature column.
+
+        Uploads without metadata are checked chunk by chunk instead.
+        """
+        metadata = ModelRegistry.get_metadata(model_id)
+        source = FileService.read_metadata(file_id)
+        if source and source.get("column_names"):
+            ModelRegistry.check_columns(metadata, source["column_names"])
+        return metadata
+
+    @staticmethod
+    def score_chunk(model_id: str, chunk: pd.DataFrame) -> pd.DataFrame:
+        """``chunk`` with the model's predictions appended"""
+        entry = ModelRegistry.load(model_id)
+        X, valid = ModelRegistry.transform(entry["metadata"], chunk)
+
+        if valid.all():
+            prediction = pd.Series(entry["model"].predict(X), index=chunk.index)
+        elif valid.any():
+            prediction = pd.Series(entry["model"].predict(X[valid]), index=chunk.index[valid]).reindex(chunk.index)
+        else:
+            prediction = pd.Series(np.nan, index=chunk.index)
+        return chunk.assign(**{PREDICTION_COLUMN: prediction})
+
+    @staticmethod
+    async def iter_scored(
+        model_id: str,
+        file_id: str,
+        filename: str,
+        chunk_rows: int = BATCH_SCORE_CHUNK_ROWS,
+        workers: int = BATCH_SCORE_WORKERS
+    ) -> AsyncIterator[pd.DataFrame]:
+        """Scored chunks of an upload, in file order"""
+        chunks = FileService.iter_chunks(file_id, filename, chunk_rows)
+        pending: Deque[asyncio.Future] = deque()
+        try:
+            while True:
+                chunk = await ExecutorService.run("light", next, chunks, None)
+                if chunk is None:
+                    break
+                pending.append(asyncio.ensure_future(
+                    ExecutorService.run("heavy", BatchScoringService.score_chunk, model_id, chunk)
+                ))
+                if len(pending) >= workers:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+            chunks.close()
+
+    @staticmethod
+    def arrow_type(dtype: str) -> "pa.DataType":
+        """Arrow type for a pandas dtype name; anything not numeric, boolean
+        or a timestamp is written as strings"""
+        try:
+            np_dtype = pd.api.types.pandas_dtype(dtype)
+        except TypeError:
+            return pa.string()
+        if isinstance(np_dtype, np.dtype):
+            if np_dtype.kind in "iuf":
+                return pa.from_numpy_dtype(np_dtype)
+            if np_dtype.kind == "b":
+                return pa.bool_()
+            if np_dtype.kind == "M":
+                return pa.timestamp(np.datetime_data(np_dtype)[0])
+        return pa.string()
+
+    @staticmethod
+    def output_schema(metadata: Dict[str, Any], source_dtypes: Dict[str, str], first: pd.DataFrame) -> "pa.Schema":
+        """Schema of the scored output.
+
+        Input columns take the dtypes the upload scan merged over the whole
+        file, so chunks that inferred narrower types still fit; predictions
+        are float64 for regression and the type of the class labels for
+        classification.
+        """
+        fields = [
+            pa.field(col, BatchScoringService.arrow_type(source_dtypes.get(col, str(first[col].dtype))))
+            for col in first.columns if col != PREDICTION_COLUMN
+        ]
+        prediction_type = pa.array(metadata["classes"]).type if metadata.get("classes") else pa.float64()
+        return pa.schema(fields + [pa.field(PREDICTION_COLUMN, prediction_type)])
+
+    @staticmethod
+    def to_table(scored: pd.DataFrame, schema: "pa.Schema") -> "pa.Table":
+        """A scored chunk as an Arrow table cast to ``schema``.
+
+        Columns written as strings are formatted by pandas whatever dtype the
+        chunk inferred, so a value reads the same whichever chunk it is in.
+        """
+        frame = scored.copy(deep=False)
+        for field in schema:
+            if pa.types.is_string(field.type) and not isinstance(frame[field.name].dtype, pd.StringDtype):
+                column = frame[field.name]
+                frame[field.name] = column.where(column.isna(), column.astype(str))
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        return table.replace_schema_metadata(None).cast(schema)
+
+    @staticmethod
+    def record(run: ScoringRun, **extra: Any) -> Dict[str, Any]:
+        report = {**run.to_dict(), **extra}
+        BatchScoringService.recent.append(report)
+        return report
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    async def score_to_dataset(model_id: str, file_id: str, filename: str, job: Optional[Job] = None) -> Dict[str, Any]:
+        """Score an upload into a new columnar dataset and return its id with
+        the run's throughput"""
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is required to write scored datasets")
+
+        metadata = await ExecutorService.run("light", BatchScoringService.check_schema, model_id, file_id)
+        source = FileService.read_metadata(file_id) or {}
+        total_rows = source.get("rows")
+
+        output_id = str(uuid.uuid4())
+        output_name = f"{os.path.splitext(filename)[0]}_scored.parquet"
+        path = FileService.columnar_path(output_id)
+        tmp_path = f"{path}.tmp"
+        run = ScoringRun(model_id, file_id)
+        writer = None
+        schema = None
+
+        try:
+            async for scored in BatchScoringService.iter_scored(model_id, file_id, filename):
+                if writer is None:
+                    schema = BatchScoringService.output_schema(metadata, source.get("dtypes", {}), scored)
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                table = await ExecutorService.run("light", BatchScoringService.to_table, scored, schema)
+                await ExecutorService.run("light", writer.write_table, table)
+                run.add(scored)
+                if total_rows:
+                    JobService.report(job, min(run.rows / total_rows, 1.0) * 0.95, f"scored {run.rows} rows")
+            if writer is None:
+                raise ValueError("Dataset has no rows to score")
+            writer.close()
+            os.replace(tmp_path, path)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        columns: List[str] = schema.names
+        FileService.write_metadata(output_id, {
+            "id": output_id,
+            "filename": output_name,
+            "rows": run.rows,
+            "columns": len(columns),
+            "column_names": columns,
+            "dtypes": schema.empty_table().to_pandas().dtypes.astype(str).to_dict(),
+            "size": os.path.getsize(path),
+            "sha256": await ExecutorService.run("light", BatchScoringService._sha256, path),
+            "upload_time": datetime.now().isoformat(),
+            "scored_from": {"file_id": file_id, "filename": filename, "model_id": model_id},
+        })
+        return BatchScoringService.record(run, file_id=output_id, filename=output_name)
+
+    @staticmethod
+    async def stream_csv(model_id: str, file_id: str, filename: str) -> AsyncIterator[bytes]:
+        """Scored rows as CSV, one chunk at a time"""
+        run = ScoringRun(model_id, file_id)
+        async for scored in BatchScoringService.iter_scored(model_id, file_id, filename):
+            text = await ExecutorService.run("light", scored.to_csv, index=False, header=run.chunks == 0)
+            run.add(scored)
+            yield text.encode("utf-8")
+        BatchScoringService.record(run)
+
+    @staticmethod
+    async def stream_arrow(model_id: str, file_id: str, filename: str) -> AsyncIterator[bytes]:
+        """Scored rows as an Arrow IPC stream, one record batch per chunk"""
+        metadata = ModelRegistry.get_metadata(model_id)
+        source = FileService.read_metadata(file_id) or {}
+        run = ScoringRun(model_id, file_id)
+        writer = None
+        async for scored in BatchScoringService.iter_scored(model_id, file_id, filename):
+            if writer is None:
+                schema = BatchScoringService.output_schema(metadata, source.get("dtypes", {}), scored)
+                writer, drain = ArrowService.new_stream(schema)
+            table = await ExecutorService.run("light", BatchScoringService.to_table, scored, schema)
+            writer.write_table(table)
+            run.add(scored)
+            yield drain()
+        if writer is not None:
+            writer.close()
+            yield drain()
+        BatchScoringService.record(run)
+
+    @staticmethod
+    def stats() -> List[Dict[str, Any]]:
+        """Reports of the most recent scoring runs, newest last"""
+        return list(BatchScoringService.recent)
@@ -0,0 +1,167 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import pandas as pd
+
+from config import (
+    DATAFRAME_CACHE_MAX_BYTES,
+    FEATURE_CACHE_MAX_BYTES,
+    FORECAST_CACHE_MAX_ENTRIES,
+    MODEL_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_MAX_ENTRIES,
+)
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Real in-memory size of a DataFrame, including object payloads"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class _Pending:
+    """Load in progress for one key; other callers wait on it"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class LRUCache:
+    """Thread-safe weighted LRU cache with single-flight loading.
+
+    Entries are weighed with ``weigh`` and the least recently used ones are
+    evicted once the total weight exceeds ``capacity``. An entry heavier than
+    the whole capacity is returned to the caller but never stored.
+    """
+
+    def __init__(self, capacity: int, weigh: Callable[[Any], int] = lambda value: 1):
+        self.capacity = capacity
+        self.weigh = weigh
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self._pending: Dict[Hashable, _Pending] = {}
+        self._lock = threading.Lock()
+        self.total_weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        weight = self.weigh(value)
+        with self._lock:
+            self._store(key, value, weight)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value, loading it once even under concurrent calls"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = _Pending()
+                self._pending[key] = pending
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            value = loader()
+            weight = self.weigh(value)
+            pending.value = value
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                if pending.error is None:
+                    self._store(key, pending.value, weight)
+                del self._pending[key]
+            pending.event.set()
+
+        return value
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches ``predicate``"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self.total_weight = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "weight": self.total_weight,
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "loading": len(self._pending),
+            }
+
+    def _store(self, key: Hashable, value: Any, weight: int) -> None:
+        if key in self._entries:
+            self._remove(key)
+        if weight > self.capacity:
+            return
+
+        self._entries[key] = value
+        self._weights[key] = weight
+        self.total_weight += weight
+
+        while self.total_weight > self.capacity and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        del self._entries[key]
+        self.total_weight -= self._weights.pop(key)
+
+
+# Parsed uploads keyed by file_id. Cached frames are shared between requests
+# and must be treated as read-only by callers.
+dataframe_cache = LRUCache(DATAFRAME_CACHE_MAX_BYTES, weigh=frame_nbytes)
+
+# Derived per-dataset results (profiles, samples, matrices) keyed by
+# (kind, dataset key, ...); weighed by entry count.
+result_cache = LRUCache(RESULT_CACHE_MAX_ENTRIES)
+
+# Fitted estimators loaded from the model registry, keyed by model id.
+model_cache = LRUCache(MODEL_CACHE_MAX_ENTRIES)
+
+# Encoded training matrices keyed by (dataset key, target, features,
+# encoding); weighed by the bytes of the matrix and target.
+feature_cache = LRUCache(FEATURE_CACHE_MAX_BYTES, weigh=lambda prepared: prepared.nbytes)
+
+# Fitted forecast models keyed by (dataset fingerprint, columns, seasonality),
+# plus the last fitted parameters per upload (shared by its versions) for warm starts.
+forecast_cache = LRUCache(FORECAST_CACHE_MAX_ENTRIES)
@@ -0,0 +1,218 @@
+import math
+import warnings
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_datetime64_any_dtype, is_object_dtype, is_string_dtype
+from typing import Any, Dict, List, Optional
+
+from config import CHART_MAX_BINS, CHART_MAX_POINTS, CHART_TOP_K
+
+DATE_PROBE_ROWS = 100
+DATE_PARSE_RATIO = 0.9
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling; returns kept positions.
+
+    ``x`` must be sorted. The first and last points are always kept and one
+    point per bucket is chosen to preserve the visual shape of the series.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[next_start:next_end].mean() if next_end > next_start else x[-1]
+        next_y = y[next_start:next_end].mean() if next_end > next_start else y[-1]
+
+        bucket_x, bucket_y = x[start:end], y[start:end]
+        areas = np.abs(
+            (x[previous] - next_x) * (bucket_y - y[previous])
+            - (x[previous] - bucket_x) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+
+    return kept
+
+
+class ChartService:
+    @staticmethod
+    def histogram_bins(count: int, distinct: int, q25: float, q75: float, low: float, high: float, bins: Optional[int]) -> int:
+        """Bin count: fixed when given, otherwise Freedman-Diaconis with a Sturges
+        fallback, never more bins than distinct values"""
+        if bins:
+            return int(min(max(bins, 1), CHART_MAX_BINS))
+        if count == 0 or high <= low:
+            return 1
+        iqr = q75 - q25
+        if iqr > 0:
+            width = 2 * iqr / count ** (1 / 3)
+            auto = math.ceil((high - low) / width)
+        else:
+            auto = math.ceil(math.log2(count) + 1)
+        return int(min(max(auto, 1), distinct, CHART_MAX_BINS))
+
+    @staticmethod
+    def histograms(df: pd.DataFrame, profile: Dict[str, Any], bins: Optional[int] = None) -> List[dict]:
+        """True histograms for every numeric column from one bincount over the block"""
+        numeric_stats = profile["numeric"]
+        columns = list(numeric_stats)
+        if not columns:
+            return []
+
+        values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        lows = np.array([numeric_stats[col]["min"] for col in columns])
+        highs = np.array([numeric_stats[col]["max"] for col in columns])
+        bin_counts = np.array([
+            ChartService.histogram_bins(
+                numeric_stats[col]["count"], numeric_stats[col]["distinct"],
+                numeric_stats[col]["q25"], numeric_stats[col]["q75"],
+                numeric_stats[col]["min"], numeric_stats[col]["max"], bins
+            )
+            for col in columns
+        ])
+        widths = np.where(highs > lows, (highs - lows) / bin_counts, 1.0)
+        offsets = np.r_[0, np.cumsum(bin_counts)[:-1]]
+
+        valid = ~np.isnan(values)
+        with np.errstate(invalid="ignore"):
+            positions = np.floor((values - lows) / widths)
+        positions = np.clip(np.nan_to_num(positions), 0, bin_counts - 1).astype(np.int64) + offsets
+        counts = np.bincount(positions[valid], minlength=int(bin_counts.sum()))
+
+        charts = []
+        for j, col in enumerate(columns):
+            if numeric_stats[col]["count"] == 0:
+                continue
+            edges = lows[j] + widths[j] * np.arange(bin_counts[j] + 1)
+            edges[-1] = max(highs[j], edges[-1])
+            charts.append({
+                "name": col,
+                "type": "histogram",
+                "data": pd.DataFrame({
+                    "bin_start": edges[:-1],
+                    "bin_end": edges[1:],
+                    "count": counts[offsets[j]:offsets[j] + bin_counts[j]]
+                })
+            })
+        return charts
+
+    @staticmethod
+    def date_columns(df: pd.DataFrame, profile: Dict[str, Any]) -> Dict[str, pd.Series]:
+        """Datetime columns, including text columns whose values parse as dates"""
+        dates = {}
+        for col in df.columns:
+            if col in profile["numeric"]:
+                continue
+            series = df[col]
+            if is_datetime64_any_dtype(series):
+                dates[col] = series
+                continue
+            if not (is_object_dtype(series) or is_string_dtype(series)):
+                continue
+
+            probe = series.dropna().head(DATE_PROBE_ROWS)
+            if probe.empty:
+                continue
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                if pd.to_datetime(probe, errors="coerce").notna().mean() < DATE_PARSE_RATIO:
+                    continue
+                dates[col] = pd.to_datetime(series, errors="coerce")
+        return dates
+
+    @staticmethod
+    def line_series(df: pd.DataFrame, profile: Dict[str, Any], dates: Dict[str, pd.Series], max_points: int) -> List[dict]:
+        """Each numeric column over each date column, LTTB-downsampled to max_points"""
+        charts = []
+        for date_col, date_values in dates.items():
+            if getattr(date_values.dt, "tz", None) is not None:
+                date_values = date_values.dt.tz_convert(None)
+            order = np.argsort(date_values.to_numpy(), kind="stable")
+            sorted_dates = date_values.to_numpy()[order]
+            has_date = ~pd.isna(sorted_dates)
+            timestamps = sorted_dates.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+
+            for col in profile["numeric"]:
+                y = df[col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+                keep = has_date & ~np.isnan(y)
+                x_values, y_values = timestamps[keep], y[keep]
+                if len(x_values) == 0:
+                    continue
+                kept = lttb(x_values, y_values, max_points)
+                charts.append({
+                    "name": f"{col} over {date_col}",
+                    "type": "line",
+                    "x": date_col,
+                    "y": col,
+                    "data": pd.DataFrame({
+                        "x": x_values[kept].astype(np.int64).astype("datetime64[ns]"),
+                        "y": y_values[kept]
+                    })
+                })
+        return charts
+
+    @staticmethod
+    def bars(profile: Dict[str, Any], exclude: List[str], top_k: int) -> List[dict]:
+        """Top-k category counts for non-numeric, non-date columns"""
+        charts = []
+        for col, stats in profile["categorical"].items():
+            if col in exclude:
+                continue
+            top = stats["top_values"][:top_k]
+            labels = [label for label, _ in top]
+            counts = [count for _, count in top]
+            other = profile["row_count"] - profile["missing_values"][col] - sum(counts)
+            if other > 0:
+                labels.append("Other")
+                counts.append(int(other))
+            charts.append({
+                "name": col,
+                "type": "bar",
+                "data": pd.DataFrame({"label": pd.Series(labels, dtype=object), "count": pd.Series(counts, dtype=np.int64)})
+            })
+        return charts
+
+    @staticmethod
+    def build_chart_frames(
+        df: pd.DataFrame,
+        profile: Dict[str, Any],
+        bins: Optional[int] = None,
+        top_k: int = CHART_TOP_K,
+        max_points: int = CHART_MAX_POINTS
+    ) -> List[dict]:
+        """Histograms, category bars and downsampled date series for a
+        dataset, each with its points as a DataFrame under the data key"""
+        dates = ChartService.date_columns(df, profile)
+        return (
+            ChartService.histograms(df, profile, bins)
+            + ChartService.bars(profile, list(dates), top_k)
+            + ChartService.line_series(df, profile, dates, max_points)
+        )
+
+    @staticmethod
+    def to_records(charts: List[dict]) -> List[dict]:
+        """Chart frames with their points as lists of records"""
+        return [{**chart, "data": chart["data"].to_dict("records")} for chart in charts]
+
+    @staticmethod
+    def to_long_frame(charts: List[dict]) -> pd.DataFrame:
+        """Every chart's points stacked into one frame keyed by chart name and type"""
+        frames = [
+            chart["data"].assign(chart=chart["name"], type=chart["type"])
+            for chart in charts
+        ]
+        if not frames:
+            return pd.DataFrame({"chart": pd.Series(dtype=object), "type": pd.Series(dtype=object)})
+        long_frame = pd.concat(frames, ignore_index=True)
+        leading = ["chart", "type"]
+        long_frame[leading] = long_frame[leading].astype("category")
+        return long_frame[leading + [col for col in long_frame.columns if col not in leading]]
@@ -0,0 +1,197 @@
+import pandas as pd
+import numpy as np
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+from config import CORRELATION_BLOCK_COLUMNS, CORRELATION_DTYPE, CORRELATION_TOP_K
+from services.cache_service import result_cache
+
+METHODS = ("pearson", "spearman")
+DTYPES = ("float32", "float64")
+
+
+class CorrelationService:
+    """Correlation matrices for wide numeric data.
+
+    Columns are standardized once (ranked first for Spearman) and the matrix
+    is computed as Z^T Z one column block at a time. Missing values are
+    handled pairwise like DataFrame.corr(): with NaNs present, the pairwise
+    counts, sums and sums of squares are themselves matrix products of the
+    validity masks. Spearman ranks depend on which rows a pair shares, so
+    pairs of columns whose missing values differ are re-ranked over their
+    shared rows one pair at a time; columns with the same missing rows keep
+    the blockwise result.
+    """
+
+    @staticmethod
+    def _standardize(numeric_df: pd.DataFrame, method: str, dtype: str):
+        if method == "spearman":
+            numeric_df = numeric_df.rank(method="average")
+
+        values = numeric_df.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(values)
+        counts = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(valid, values, 0.0).sum(axis=0) / counts
+            centered = np.where(valid, values - mean, 0.0)
+            std = np.sqrt((centered ** 2).sum(axis=0) / counts)
+        std = np.where((std > 0) & np.isfinite(std), std, 1.0)
+
+        standardized = (centered / std).astype(dtype)
+        return numeric_df.columns.tolist(), standardized, valid
+
+    @staticmethod
+    def _block(z_a: np.ndarray, z_b: np.ndarray, m_a: Optional[np.ndarray], m_b: Optional[np.ndarray], rows: int):
+        """Correlations and pair counts between two column blocks"""
+        products = z_a.T @ z_b
+        if m_a is None:
+            sq_a = np.einsum("ij,ij->j", z_a, z_a)[:, None]
+            sq_b = np.einsum("ij,ij->j", z_b, z_b)[None, :]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                corr = products / np.sqrt(sq_a * sq_b)
+            return corr, np.full(corr.shape, rows, dtype=np.int64)
+
+        pairs = m_a.T @ m_b
+        sum_a, sum_b = z_a.T @ m_b, m_a.T @ z_b
+        sq_a, sq_b = (z_a * z_a).T @ m_b, m_a.T @ (z_b * z_b)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = products - sum_a * sum_b / pairs
+            var_a = sq_a - sum_a * sum_a / pairs
+            var_b = sq_b - sum_b * sum_b / pairs
+            corr = cov / np.sqrt(var_a * var_b)
+        return corr, np.rint(pairs).astype(np.int64)
+
+    @staticmethod
+    def _rerank_pairs(numeric_df: pd.DataFrame, valid: np.ndarray, matrix: np.ndarray, pair_counts: np.ndarray) -> None:
+        """Spearman correlations, in place, of the pairs whose columns are
+        missing different rows, ranked over the rows both have"""
+        values = numeric_df.to_numpy(dtype=np.float64, na_value=np.nan)
+        _, pattern = np.unique(valid.T, axis=0, return_inverse=True)
+        pattern = pattern.ravel()
+        rows, cols = np.triu_indices(len(pattern), k=1)
+        mixed = (pattern[rows] != pattern[cols]) & (pair_counts[rows, cols] >= 2)
+        for a, b in zip(rows[mixed], cols[mixed]):
+            shared = valid[:, a] & valid[:, b]
+            ranks = pd.DataFrame(values[shared][:, [a, b]]).rank(method="average").to_numpy()
+            with np.errstate(invalid="ignore", divide="ignore"):
+                r = np.corrcoef(ranks[:, 0], ranks[:, 1])[0, 1]
+            matrix[a, b] = matrix[b, a] = r
+
+    @staticmethod
+    def compute(
+        df: pd.DataFrame,
+        method: str = "pearson",
+        dtype: str = CORRELATION_DTYPE,
+        block_columns: int = CORRELATION_BLOCK_COLUMNS
+    ) -> Dict[str, Any]:
+        """Full correlation matrix plus pairwise observation counts"""
+        if method not in METHODS:
+            raise ValueError(f"Unknown correlation method: {method}")
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown correlation dtype: {dtype}")
+
+        numeric_df = df.select_dtypes(include=[np.number])
+        columns, z, valid = CorrelationService._standardize(numeric_df, method, dtype)
+        p, rows = len(columns), len(z)
+        masks = None if valid.all() else valid.astype(dtype)
+
+        matrix = np.empty((p, p), dtype=dtype)
+        pair_counts = np.empty((p, p), dtype=np.int64)
+        for start_a in range(0, p, block_columns):
+            block_a = slice(start_a, min(start_a + block_columns, p))
+            for start_b in range(start_a, p, block_columns):
+                block_b = slice(start_b, min(start_b + block_columns, p))
+                corr, pairs = CorrelationService._block(
+                    z[:, block_a], z[:, block_b],
+                    None if masks is None else masks[:, block_a],
+                    None if masks is None else masks[:, block_b],
+                    rows
+                )
+                corr[pairs < 2] = np.nan
+                matrix[block_a, block_b] = corr
+                matrix[block_b, block_a] = corr.T
+                pair_counts[block_a, block_b] = pairs
+                pair_counts[block_b, block_a] = pairs.T
+
+        if method == "spearman" and masks is not None:
+            CorrelationService._rerank_pairs(numeric_df, valid, matrix, pair_counts)
+        np.clip(matrix, -1.0, 1.0, out=matrix)
+        diagonal = np.diag_indices(p)
+        matrix[diagonal] = np.where(np.isnan(matrix[diagonal]), np.nan, 1.0)
+        return {
+            "method": method,
+            "dtype": dtype,
+            "columns": columns,
+            "matrix": matrix,
+            "pair_counts": pair_counts,
+        }
+
+    @staticmethod
+    def get_correlation(
+        df: pd.DataFrame,
+        dataset_key: Optional[Hashable] = None,
+        method: str = "pearson",
+        dtype: str = CORRELATION_DTYPE
+    ) -> Dict[str, Any]:
+        """Correlation result, cached per dataset, method and dtype when a key is given"""
+        if dataset_key is None:
+            return CorrelationService.compute(df, method, dtype)
+        return result_cache.get_or_load(
+            ("correlation", dataset_key, method, dtype),
+            lambda: CorrelationService.compute(df, method, dtype)
+        )
+
+    @staticmethod
+    def submatrix(result: Dict[str, Any], columns: Optional[Sequence[str]] = None):
+        """Column names and the float64 matrix restricted to ``columns``"""
+        names = result["columns"]
+        if columns:
+            missing = [col for col in columns if col not in names]
+            if missing:
+                raise KeyError(f"Not numeric columns: {', '.join(missing)}")
+            names = list(columns)
+        positions = [result["columns"].index(col) for col in names]
+        return names, result["matrix"][np.ix_(positions, positions)].astype(np.float64)
+
+    @staticmethod
+    def to_dict(result: Dict[str, Any], columns: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, float]]:
+        """Nested {column: {column: r}} mapping, optionally for a subset of columns"""
+        names, sub = CorrelationService.submatrix(result, columns)
+        return {a: dict(zip(names, sub[i].tolist())) for i, a in enumerate(names)}
+
+    @staticmethod
+    def to_split(result: Dict[str, Any], columns: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """{"index", "columns", "data"} form; data stays a numpy matrix for the encoder"""
+        names, sub = CorrelationService.submatrix(result, columns)
+        return {"index": names, "columns": names, "data": sub}
+
+    @staticmethod
+    def to_frame(result: Dict[str, Any], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Matrix as a frame with a leading "column" name column"""
+        names, sub = CorrelationService.submatrix(result, columns)
+        frame = pd.DataFrame(sub, columns=names)
+        frame.insert(0, "column", names)
+        return frame
+
+    @staticmethod
+    def top_pairs_frame(result: Dict[str, Any], k: int = CORRELATION_TOP_K, threshold: float = 0.0) -> pd.DataFrame:
+        """The k most strongly correlated column pairs with |r| >= threshold"""
+        matrix = result["matrix"]
+        rows, cols = np.triu_indices(len(result["columns"]), k=1)
+        strength = np.abs(matrix[rows, cols]).astype(np.float64)
+        keep = np.flatnonzero(~np.isnan(strength) & (strength >= threshold))
+        if len(keep) > k:
+            keep = keep[np.argpartition(-strength[keep], k - 1)[:k]]
+        keep = keep[np.argsort(-strength[keep], kind="stable")]
+
+        names = np.asarray(result["columns"], dtype=object)
+        return pd.DataFrame({
+            "column_a": names[rows[keep]],
+            "column_b": names[cols[keep]],
+            "correlation": matrix[rows[keep], cols[keep]].astype(np.float64),
+            "pair_count": result["pair_counts"][rows[keep], cols[keep]],
+        })
+
+    @staticmethod
+    def top_pairs(result: Dict[str, Any], k: int = CORRELATION_TOP_K, threshold: float = 0.0) -> List[dict]:
+        """The k most strongly correlated column pairs as records"""
+        return CorrelationService.top_pairs_frame(result, k, threshold).to_dict("records")
@@ -1,83 +1,180 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Hashable, Optional, Sequence
+from services.profile_service import ProfileService
+from services.chart_service import ChartService
+from services.correlation_service import CorrelationService
+from services.index_set import IndexSet, fetch_rows, page_order
+from config import CHART_MAX_POINTS, CHART_TOP_K, CORRELATION_DTYPE, CORRELATION_TOP_K
 
 class EDAService:
     @staticmethod
-    def get_summary(df: pd.DataFrame) -> dict:
+    def get_summary(df: pd.DataFrame, profile: Optional[Dict[str, Any]] = None) -> dict:
         """Generate EDA summary"""
+        profile = profile or ProfileService.build_profile(df)
+        
+        if profile["numeric"]:
+            numeric_summary = {
+                col: {
+                    "count": float(stats["count"]),
+                    "mean": stats["mean"],
+                    "std": stats["std"],
+                    "min": stats["min"],
+                    "25%": stats["q25"],
+                    "50%": stats["median"],
+                    "75%": stats["q75"],
+                    "max": stats["max"]
+                }
+                for col, stats in profile["numeric"].items()
+            }
+        else:
+            numeric_summary = df.describe().to_dict()
+        
         return {
-            "row_count": len(df),
-            "column_count": len(df.columns),
-            "memory_usage": f"{df.memory_usage(deep=True).sum() / 1024**2:.2f} MB",
-            "missing_values": df.isnull().sum().to_dict(),
-            "data_types": df.dtypes.astype(str).to_dict(),
-            "numeric_summary": df.describe().to_dict()
+            "row_count": profile["row_count"],
+            "column_count": profile["column_count"],
+            "memory_usage": f"{profile['memory_bytes'] / 1024**2:.2f} MB",
+            "missing_values": profile["missing_values"],
+            "data_types": profile["data_types"],
+            "numeric_summary": numeric_summary
         }
     
     @staticmethod
-    def get_column_stats(df: pd.DataFrame) -> Dict[str, Any]:
+    def get_column_stats(df: pd.DataFrame, profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Get statistics for each column"""
+        profile = profile or ProfileService.build_profile(df)
         stats = {}
         
         for col in df.columns:
-            if df[col].dtype in ["int64", "float64"]:
+            if col in profile["numeric"]:
+                col_stats = profile["numeric"][col]
                 stats[col] = {
                     "type": "numeric",
-                    "mean": float(df[col].mean()),
-                    "median": float(df[col].median()),
-                    "std": float(df[col].std()),
-                    "min": float(df[col].min()),
-                    "max": float(df[col].max()),
-                    "q25": float(df[col].quantile(0.25)),
-                    "q75": float(df[col].quantile(0.75))
+                    "mean": col_stats["mean"],
+                    "median": col_stats["median"],
+                    "std": col_stats["std"],
+                    "min": col_stats["min"],
+                    "max": col_stats["max"],
+                    "q25": col_stats["q25"],
+                    "q75": col_stats["q75"]
                 }
             else:
+                col_stats = profile["categorical"][col]
                 stats[col] = {
                     "type": "categorical",
-                    "unique": int(df[col].nunique()),
-                    "mode": str(df[col].mode().values[0]) if len(df[col].mode()) > 0 else None
+                    "unique": col_stats["unique"],
+                    "mode": col_stats["mode"]
                 }
         
         return stats
     
     @staticmethod
-    def get_correlation_matrix(df: pd.DataFrame) -> dict:
-        """Get correlation matrix for numeric columns"""
-        numeric_df = df.select_dtypes(include=[np.number])
-        if numeric_df.empty:
-            return {}
-        
-        corr_matrix = numeric_df.corr()
-        return corr_matrix.to_dict()
+    def get_correlation_matrix(
+        df: pd.DataFrame,
+        dataset_key: Optional[Hashable] = None,
+        method: str = "pearson",
+        dtype: str = CORRELATION_DTYPE,
+        columns: Optional[Sequence[str]] = None,
+        orient: str = "dict"
+    ) -> dict:
+        """Get correlation matrix for numeric columns, or for a subset of them,
+        as a nested dict or in "split" form"""
+        result = CorrelationService.get_correlation(df, dataset_key, method, dtype)
+        if orient == "split":
+            return CorrelationService.to_split(result, columns)
+        return CorrelationService.to_dict(result, columns)
     
     @staticmethod
-    def get_outliers(df: pd.DataFrame) -> Dict[str, List[int]]:
-        """Detect outliers using IQR method"""
-        outliers = {}
-        
-        for col in df.select_dtypes(include=[np.number]).columns:
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            
-            outlier_indices = df[(df[col] < Q1 - 1.5 * IQR) | (df[col] > Q3 + 1.5 * IQR)].index.tolist()
-            outliers[col] = outlier_indices
-        
-        return outliers
+    def get_top_correlations(
+        df: pd.DataFrame,
+        dataset_key: Optional[Hashable] = None,
+        method: str = "pearson",
+        dtype: str = CORRELATION_DTYPE,
+        k: int = CORRELATION_TOP_K,
+        threshold: float = 0.0
+    ) -> List[dict]:
+        """Get the k most strongly correlated numeric column pairs"""
+        result = CorrelationService.get_correlation(df, dataset_key, method, dtype)
+        return CorrelationService.top_pairs(result, k, threshold)
     
     @staticmethod
-    def get_chart_data(df: pd.DataFrame) -> List[dict]:
-        """Prepare data for charts"""
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        charts = []
+    def get_outliers(df: pd.DataFrame, profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Detect outliers using IQR method.
+
+        Each numeric column reports its outlier count, IQR bounds and the
+        outlier row positions as a compact IndexSet encoding.
+        """
+        profile = profile or ProfileService.build_profile(df)
         
-        for col in numeric_cols[:5]:  # Limit to 5 columns
-            chart_data = {
-                "name": col,
-                "type": "histogram",
-                "data": df[col].value_counts().head(10).to_dict()
+        return {
+            col: {
+                "count": int(len(positions)),
+                "lower": profile["numeric"][col]["iqr_lower"],
+                "upper": profile["numeric"][col]["iqr_upper"],
+                "rows": IndexSet(positions, profile["row_count"]).encode()
             }
-            charts.append(chart_data)
+            for col, positions in profile["outlier_positions"].items()
+        }
+    
+    @staticmethod
+    def outlier_severity(values: np.ndarray, lower: float, upper: float) -> np.ndarray:
+        """Distance beyond the nearest IQR bound, in units of the IQR"""
+        iqr = (upper - lower) / 4
+        distance = np.maximum(lower - values, values - upper)
+        return distance / iqr if iqr > 0 else distance
+    
+    @staticmethod
+    def get_outlier_rows(
+        df: pd.DataFrame,
+        column: str,
+        profile: Optional[Dict[str, Any]] = None,
+        page: int = 1,
+        page_size: int = 50,
+        sort: str = "severity",
+        orient: str = "records"
+    ) -> Dict[str, Any]:
+        """One page of a column's outlier rows, most severe first or in row order"""
+        profile = profile or ProfileService.build_profile(df)
+        if column not in profile["outlier_positions"]:
+            raise KeyError(f"Not a numeric column: {column}")
         
-        return charts
+        positions = profile["outlier_positions"][column]
+        stats = profile["numeric"][column]
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)[positions]
+        severity = EDAService.outlier_severity(values, stats["iqr_lower"], stats["iqr_upper"])
+        
+        if sort == "severity":
+            selected = page_order(severity, page, page_size)
+        else:
+            selected = np.arange(len(positions))[(page - 1) * page_size:page * page_size]
+        
+        return {
+            "column": column,
+            "total": int(len(positions)),
+            "page": page,
+            "page_size": page_size,
+            "rows": fetch_rows(df, positions[selected], {"severity": severity[selected]}, orient)
+        }
+    
+    @staticmethod
+    def get_chart_data(
+        df: pd.DataFrame,
+        profile: Optional[Dict[str, Any]] = None,
+        bins: Optional[int] = None,
+        top_k: int = CHART_TOP_K,
+        max_points: int = CHART_MAX_POINTS
+    ) -> List[dict]:
+        """Prepare data for charts: histograms, category bars and date series"""
+        return ChartService.to_records(EDAService.get_chart_frames(df, profile, bins, top_k, max_points))
+    
+    @staticmethod
+    def get_chart_frames(
+        df: pd.DataFrame,
+        profile: Optional[Dict[str, Any]] = None,
+        bins: Optional[int] = None,
+        top_k: int = CHART_TOP_K,
+        max_points: int = CHART_MAX_POINTS
+    ) -> List[dict]:
+        """Chart data with each chart's points kept as a DataFrame"""
+        profile = profile or ProfileService.build_profile(df)
+        return ChartService.build_chart_frames(df, profile, bins, top_k, max_points)
@@ -0,0 +1,266 @@
+import itertools
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import ETS_INTERVAL_WIDTH
+
+MODELS = ("simple", "holt", "holt_winters")
+
+# Coarse grid; the best point per series is then refined by REFINE_FACTORS.
+# beta is the trend's share of alpha and gamma the season's share of
+# 1 - alpha, which keeps every combination inside the admissible region.
+ALPHA_GRID = (0.05, 0.15, 0.3, 0.5, 0.8)
+BETA_GRID = (0.02, 0.1, 0.3)
+GAMMA_GRID = (0.05, 0.2, 0.5)
+REFINE_FACTORS = (0.7, 1.0, 1.4)
+
+# Season length by the median spacing of the dates, in days
+SEASON_LENGTHS = ((1 / 24, 24), (1, 7), (7, 52), (31, 12), (92, 4))
+
+
+def _nanmean(values: np.ndarray) -> np.ndarray:
+    """Row means ignoring NaN; NaN for rows without values, without warnings"""
+    present = ~np.isnan(values)
+    counts = present.sum(axis=1)
+    return np.where(counts > 0, np.where(present, values, 0.0).sum(axis=1) / np.maximum(counts, 1), np.nan)
+
+
+class ETSFit:
+    """Additive exponential smoothing fitted to every row of a 2-D array.
+
+    Each row keeps its own model, smoothing parameters and final states;
+    simple and Holt rows have zero trend and season. Rows with fewer than
+    three observations have no model and forecast NaN.
+    """
+
+    def __init__(self, models: np.ndarray, params: Dict[str, np.ndarray], states: Dict[str, np.ndarray],
+                 sigma2: np.ndarray, aic: np.ndarray, observations: np.ndarray, length: int, season_length: int):
+        self.models = models
+        self.alpha = params["alpha"]
+        self.beta = params["beta"]
+        self.gamma = params["gamma"]
+        self.level = states["level"]
+        self.trend = states["trend"]
+        self.season = states["season"]
+        self.sigma2 = sigma2
+        self.aic = aic
+        self.observations = observations
+        self.length = length
+        self.season_length = season_length
+
+    def forecast(self, periods: int, width: float = ETS_INTERVAL_WIDTH) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Point forecasts and the lower and upper bounds of ``width``
+        prediction intervals, each of shape (rows, periods)"""
+        m = self.season_length
+        steps = np.arange(1, periods + 1)
+        rows = np.arange(len(self.level))[:, None]
+        phases = (self.length - 1 + steps) % m
+        mean = self.level[:, None] + steps * self.trend[:, None] + self.season[rows, phases]
+
+        # Variance of the h-step error: sigma2 * (1 + sum of c_j^2 for j < h)
+        # with c_j = alpha * (1 + j * beta) + gamma when j is a whole season
+        j = steps[:-1]
+        c = self.alpha[:, None] * (1 + j * self.beta[:, None]) + self.gamma[:, None] * (j % m == 0)
+        variance = self.sigma2[:, None] * (1 + np.concatenate([np.zeros((len(c), 1)), np.cumsum(c ** 2, axis=1)], axis=1))
+        spread = NormalDist().inv_cdf(0.5 + width / 2) * np.sqrt(variance)
+        return mean, mean - spread, mean + spread
+
+    def describe(self, row: int = 0) -> Dict[str, Any]:
+        """Model and parameters of one row, JSON-ready"""
+        model = self.models[row]
+        return {
+            "model": model or None,
+            "alpha": float(self.alpha[row]) if model else None,
+            "beta": float(self.alpha[row] * self.beta[row]) if model in ("holt", "holt_winters") else None,
+            "gamma": float(self.gamma[row]) if model == "holt_winters" else None,
+            "season_length": self.season_length if model == "holt_winters" else None,
+            "aic": float(self.aic[row]) if model else None,
+        }
+
+
+class ETSService:
+    """Vectorized additive exponential smoothing: simple, Holt (trend) and
+    Holt-Winters (trend and season).
+
+    The recursions run once over time for a whole (series x parameter
+    candidates) array, so a batch of series and the full parameter grid cost
+    one pass per search stage. Series are rows aligned on their last
+    observation; leading NaN pads shorter series and inner NaN are treated
+    as missing, with the one-step forecast standing in for the value.
+    """
+
+    @staticmethod
+    def season_length(dates: pd.Series) -> Optional[int]:
+        """Seasonal period implied by the spacing of ``dates``: 24 for hourly,
+        7 for daily, 52 for weekly, 12 for monthly and 4 for quarterly data"""
+        dates = pd.to_datetime(dates, errors="coerce").dropna().sort_values()
+        if len(dates) < 2:
+            return None
+        days = dates.diff().median() / pd.Timedelta(days=1)
+        for max_days, length in SEASON_LENGTHS:
+            if days <= max_days * 1.1:
+                return length
+        return None
+
+    @staticmethod
+    def align(series: List[np.ndarray]) -> np.ndarray:
+        """Stack 1-D series of different lengths into rows aligned on their
+        last value, padding the start with NaN"""
+        width = max(len(values) for values in series)
+        Y = np.full((len(series), width), np.nan)
+        for i, values in enumerate(series):
+            Y[i, width - len(values):] = values
+        return Y
+
+    @staticmethod
+    def initial_states(Y: np.ndarray, first: np.ndarray, model: str, m: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Level, trend and season (rows x m) before each row's first observation"""
+        rows, length = Y.shape
+        index = np.arange(rows)[:, None]
+
+        def window(start: np.ndarray, width: int) -> np.ndarray:
+            positions = start[:, None] + np.arange(width)
+            return np.where(positions < length, Y[index, np.minimum(positions, length - 1)], np.nan)
+
+        season = np.zeros((rows, m))
+        if model == "holt_winters":
+            first_season = window(first, m)
+            level = _nanmean(first_season)
+            trend = (_nanmean(window(first + m, m)) - level) / m
+            offsets = np.nan_to_num(first_season - level[:, None])
+            offsets -= offsets.mean(axis=1, keepdims=True)
+            season[index, (first[:, None] + np.arange(m)) % m] = offsets
+        else:
+            level = Y[np.arange(rows), first]
+            trend = _nanmean(np.diff(window(first, min(length, 4)), axis=1)) if model == "holt" else np.zeros(rows)
+        return np.nan_to_num(level), np.nan_to_num(trend), season
+
+    @staticmethod
+    def run(Y: np.ndarray, first: np.ndarray, model: str, m: int,
+            alpha: np.ndarray, beta: np.ndarray, gamma: np.ndarray) -> Dict[str, np.ndarray]:
+        """One-step-ahead squared errors and final states for every
+        (row, candidate); parameters have shape (rows or 1, candidates)"""
+        rows, length = Y.shape
+        candidates = alpha.shape[1]
+        level0, trend0, season0 = ETSService.initial_states(Y, first, model, m)
+        level = np.repeat(level0[:, None], candidates, axis=1)
+        trend = np.repeat(trend0[:, None], candidates, axis=1)
+        # Season is stored phase-major so each step touches one contiguous slice
+        season = np.repeat(season0.T[:, :, None], candidates, axis=2)
+        sse = np.zeros((rows, candidates))
+
+        has_trend = model != "simple"
+        has_season = model == "holt_winters"
+        trend_gain = alpha * beta
+        season_gain = (1 - alpha) * gamma
+        padded_until = int(first.max())
+
+        for t in range(int(first.min()), length):
+            y = Y[:, t, None]
+            phase = t % m
+            forecast = level + trend if has_trend else level
+            if has_season:
+                forecast = forecast + season[phase]
+            error = np.nan_to_num(y - forecast)
+            sse += error * error
+
+            new_level = forecast - season[phase] + alpha * error if has_season else forecast + alpha * error
+            if t < padded_until:
+                # Rows whose series has not started yet keep their initial states
+                started = (t >= first)[:, None]
+                level = np.where(started, new_level, level)
+                if has_trend:
+                    trend = np.where(started, trend + trend_gain * error, trend)
+                if has_season:
+                    season[phase] = np.where(started, season[phase] + season_gain * error, season[phase])
+            else:
+                level = new_level
+                if has_trend:
+                    trend = trend + trend_gain * error
+                if has_season:
+                    season[phase] += season_gain * error
+
+        return {"sse": sse, "level": level, "trend": trend, "season": np.moveaxis(season, 0, 2)}
+
+    @staticmethod
+    def search(Y: np.ndarray, first: np.ndarray, model: str, m: int) -> Dict[str, np.ndarray]:
+        """Best parameters and final states per row for one model: a coarse
+        grid shared by every row, then a finer grid around each row's best"""
+        grids = [ALPHA_GRID, BETA_GRID if model != "simple" else (0.0,), GAMMA_GRID if model == "holt_winters" else (0.0,)]
+        coarse = np.array(list(itertools.product(*grids))).T[:, None, :]
+        result = ETSService.run(Y, first, model, m, *coarse)
+        best = result["sse"].argmin(axis=1)
+
+        factors = [REFINE_FACTORS, REFINE_FACTORS if model != "simple" else (1.0,),
+                   REFINE_FACTORS if model == "holt_winters" else (1.0,)]
+        scale = np.array(list(itertools.product(*factors))).T[:, None, :]
+        fine = np.clip(coarse[:, 0, best][:, :, None] * scale, 0.001, 0.999)
+        if model == "simple":
+            fine[1:] = 0.0
+        elif model == "holt":
+            fine[2] = 0.0
+        refined = ETSService.run(Y, first, model, m, *fine)
+
+        index = np.arange(len(Y))
+        best = refined["sse"].argmin(axis=1)
+        return {
+            "alpha": fine[0, index, best],
+            "beta": fine[1, index, best],
+            "gamma": (1 - fine[0, index, best]) * fine[2, index, best],
+            "sse": refined["sse"][index, best],
+            "level": refined["level"][index, best],
+            "trend": refined["trend"][index, best],
+            "season": refined["season"][index, best],
+        }
+
+    @staticmethod
+    def fit(Y: np.ndarray, season_length: Optional[int] = None, model: str = "auto") -> ETSFit:
+        """Fit every row of ``Y`` (rows x time).
+
+        ``model="auto"`` fits all three models and keeps the lowest AIC per
+        row; Holt-Winters needs a season length of at least 2 and two full
+        seasons of observations.
+        """
+        if model != "auto" and model not in MODELS:
+            raise ValueError(f"model must be auto or one of: {', '.join(MODELS)}")
+        Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+        present = ~np.isnan(Y)
+        observations = present.sum(axis=1)
+        first = np.where(observations > 0, present.argmax(axis=1), Y.shape[1] - 1)
+        m = season_length if season_length and season_length >= 2 else 1
+
+        candidates = [model] if model != "auto" else list(MODELS)
+        if m == 1 and "holt_winters" in candidates:
+            if model == "holt_winters":
+                raise ValueError("Holt-Winters needs a season length of at least 2")
+            candidates.remove("holt_winters")
+
+        rows = len(Y)
+        chosen = np.full(rows, "", dtype=object)
+        best_aic = np.full(rows, np.inf)
+        fitted: Dict[str, np.ndarray] = {
+            "alpha": np.zeros(rows), "beta": np.zeros(rows), "gamma": np.zeros(rows), "sse": np.zeros(rows),
+            "level": np.full(rows, np.nan), "trend": np.zeros(rows), "season": np.zeros((rows, m)),
+        }
+        parameters = {"simple": 2, "holt": 4, "holt_winters": m + 4}
+        minimum = {"simple": 3, "holt": 4, "holt_winters": 2 * m}
+        for name in candidates:
+            result = ETSService.search(Y, first, name, m)
+            k = parameters[name]
+            n = np.maximum(observations, 1)
+            aic = n * np.log(np.maximum(result["sse"], 1e-12) / n) + 2 * k
+            aic = np.where(observations >= max(minimum[name], k + 1), aic, np.inf)
+            better = aic < best_aic
+            best_aic = np.where(better, aic, best_aic)
+            chosen[better] = name
+            for key, values in result.items():
+                fitted[key][better] = values[better]
+
+        parameters_used = np.array([parameters.get(name, 0) for name in chosen])
+        sigma2 = fitted["sse"] / np.maximum(observations - parameters_used, 1)
+        states = {"level": fitted["level"], "trend": fitted["trend"], "season": fitted["season"]}
+        params = {"alpha": fitted["alpha"], "beta": fitted["beta"], "gamma": fitted["gamma"]}
+        return ETSFit(chosen, params, states, sigma2, best_aic, observations, Y.shape[1], m)
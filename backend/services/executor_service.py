@@ -0,0 +1,141 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import (
+    HEAVY_POOL_WORKERS,
+    HEAVY_TASK_TIMEOUT,
+    LIGHT_POOL_WORKERS,
+    LIGHT_TASK_TIMEOUT,
+)
+
+
+class TaskTimeoutError(Exception):
+    """Raised when a pooled task does not finish within its timeout"""
+
+
+class WorkerPool:
+    """Runs blocking callables off the event loop with a concurrency cap.
+
+    At most ``max_concurrency`` tasks are handed to the executor at once;
+    further callers wait in an asyncio queue, which is what ``queued``
+    reports. A task that times out releases its caller immediately but keeps
+    its slot until the worker actually finishes, so the cap stays honest.
+    """
+
+    def __init__(self, name: str, max_workers: int, timeout: Optional[float], max_concurrency: Optional[int] = None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=f"{self.name}-pool"
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run ``func(*args, **kwargs)`` in the pool and await its result"""
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+
+        queued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        self.running += 1
+
+        try:
+            future = loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._finish(started_at, failed=True)
+            raise
+        future.add_done_callback(
+            lambda f: self._finish(started_at, failed=f.cancelled() or f.exception() is not None)
+        )
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise TaskTimeoutError(
+                f"{getattr(func, '__qualname__', func)} exceeded {timeout:g}s in the {self.name} pool"
+            )
+
+    def _finish(self, started_at: float, failed: bool) -> None:
+        self.running -= 1
+        self.total_run_seconds += time.perf_counter() - started_at
+        if failed:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": self.total_wait_seconds / (finished + self.running) * 1000 if finished + self.running else 0.0,
+            "avg_run_ms": self.total_run_seconds / finished * 1000 if finished else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class ExecutorService:
+    """Named worker pools shared by all routes.
+
+    ``light`` handles file loading and EDA-sized work. ``heavy`` handles
+    model training, forecasting and anomaly detection. Both are thread
+    pools: heavy-pool callees read and fill the module-level caches (fitted
+    detectors, Prophet models, exact results), which a process pool would
+    leave behind in its children.
+    """
+
+    pools: Dict[str, WorkerPool] = {
+        "light": WorkerPool("light", LIGHT_POOL_WORKERS, LIGHT_TASK_TIMEOUT),
+        "heavy": WorkerPool("heavy", HEAVY_POOL_WORKERS, HEAVY_TASK_TIMEOUT),
+    }
+
+    @staticmethod
+    async def run(pool: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable in the named pool"""
+        return await ExecutorService.pools[pool].run(func, *args, **kwargs)
+
+    @staticmethod
+    def stats() -> Dict[str, Dict[str, Any]]:
+        return {name: pool.stats() for name, pool in ExecutorService.pools.items()}
+
+    @staticmethod
+    def shutdown() -> None:
+        for pool in ExecutorService.pools.values():
+            pool.shutdown()
@@ -1,11 +1,49 @@
 import pandas as pd
 import os
-from typing import Optional, Tuple
+
+try:
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+import numpy as np
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+import hashlib
 import json
 from datetime import datetime
-from config import UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_EXTENSIONS
+from config import UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_EXTENSIONS, UPLOAD_CHUNK_SIZE, SCAN_CHUNK_ROWS
+from services.cache_service import dataframe_cache
 import uuid
 
+
+VERSION_SEPARATOR = "@v"
+
+
+class FileTooLargeError(ValueError):
+    """Raised when an upload stream exceeds MAX_FILE_SIZE"""
+
+
+class VersionNotFoundError(KeyError):
+    """The requested version of a dataset does not exist"""
+
+
+def merge_dtype(current: Optional[np.dtype], incoming: np.dtype) -> np.dtype:
+    """Widen a column dtype seen in earlier chunks with the dtype of a new chunk"""
+    if current is None or current == incoming:
+        return incoming
+    if (
+        is_numeric_dtype(current) and is_numeric_dtype(incoming)
+        and not is_bool_dtype(current) and not is_bool_dtype(incoming)
+    ):
+        return np.result_type(current, incoming)
+    # Mixed columns parse as text; pandas with a string dtype reads them into it
+    for dtype in (current, incoming):
+        if isinstance(dtype, pd.StringDtype):
+            return dtype
+    return np.dtype(object)
+
 class FileService:
     @staticmethod
     def validate_file(filename: str, size: int) -> Tuple[bool, str]:
@@ -30,19 +68,297 @@ class FileService:
             f.write(file_content)
         
         return file_id
+
+    @staticmethod
+    async def save_stream(read_chunk: Callable[[int], Awaitable[bytes]], filename: str) -> Tuple[str, int, str]:
+        """Stream an upload to disk chunk by chunk.
+
+        Returns the file ID, the size in bytes and the SHA-256 of the content.
+        Raises FileTooLargeError as soon as MAX_FILE_SIZE is crossed, removing
+        the partial file.
+        """
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        file_id = str(uuid.uuid4())
+        file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{filename}")
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            with open(file_path, "wb") as f:
+                while True:
+                    chunk = await read_chunk(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > MAX_FILE_SIZE:
+                        raise FileTooLargeError(f"File size exceeds {MAX_FILE_SIZE} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+
+        return file_id, size, digest.hexdigest()
+
+    @staticmethod
+    def scan_file_info(file_id: str, filename: str) -> Dict[str, Any]:
+        """Row count, column names and dtypes from one incremental pass.
+
+        CSV files are read in SCAN_CHUNK_ROWS chunks so memory stays bounded;
+        a column that is entirely null within a chunk does not widen its dtype.
+        Excel files cannot be read incrementally and go through load_dataframe,
+        which also leaves the parsed frame in the cache for the first request.
+        """
+        if not filename.endswith(".csv"):
+            df = FileService.load_dataframe(file_id, filename)
+            return {
+                "rows": len(df),
+                "columns": len(df.columns),
+                "column_names": df.columns.tolist(),
+                "dtypes": df.dtypes.astype(str).to_dict()
+            }
+
+        file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{filename}")
+        rows = 0
+        column_names: List[str] = []
+        dtypes: Dict[str, Optional[np.dtype]] = {}
+
+        for chunk in pd.read_csv(file_path, chunksize=SCAN_CHUNK_ROWS):
+            if not column_names:
+                column_names = chunk.columns.tolist()
+                dtypes = {col: None for col in column_names}
+            rows += len(chunk)
+            all_null = chunk.isna().all()
+            for col, dtype in chunk.dtypes.items():
+                if all_null[col] and dtypes[col] is not None:
+                    continue
+                dtypes[col] = merge_dtype(dtypes[col], dtype)
+
+        if not column_names:
+            column_names = pd.read_csv(file_path, nrows=0).columns.tolist()
+            dtypes = {col: np.dtype(object) for col in column_names}
+
+        return {
+            "rows": rows,
+            "columns": len(column_names),
+            "column_names": column_names,
+            "dtypes": {col: str(dtype) for col, dtype in dtypes.items()}
+        }
+
+    @staticmethod
+    def metadata_path(file_id: str) -> str:
+        """Path of the JSON metadata written next to an upload"""
+        return os.path.join(UPLOAD_DIR, f"{file_id}.json")
+
+    @staticmethod
+    def write_metadata(file_id: str, metadata: Dict[str, Any]) -> None:
+        """Persist upload metadata (size, checksum, schema)"""
+        with open(FileService.metadata_path(file_id), "w") as f:
+            json.dump(metadata, f)
+
+    @staticmethod
+    def read_metadata(file_id: str) -> Optional[Dict[str, Any]]:
+        """Load upload metadata, or None for uploads that predate it"""
+        path = FileService.metadata_path(file_id)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def fingerprint(file_id: str, df: Optional[pd.DataFrame] = None) -> str:
+        """Content fingerprint of an upload: its sha256 from the metadata, or a
+        hash of the parsed frame for uploads that predate it"""
+        metadata = FileService.read_metadata(file_id)
+        if metadata and metadata.get("sha256"):
+            return metadata["sha256"]
+        if df is None:
+            raise FileNotFoundError(f"No metadata for upload {file_id}")
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+    @staticmethod
+    def version_key(file_id: str, version: int) -> str:
+        """Dataset key of a version: the upload's own id for version 1,
+        ``<file_id>@v<n>`` for the versions appended after it"""
+        return file_id if version == 1 else f"{file_id}{VERSION_SEPARATOR}{version}"
+
+    @staticmethod
+    def split_version(key: str) -> Tuple[str, int]:
+        """Upload id and version number of a dataset key"""
+        file_id, separator, version = key.rpartition(VERSION_SEPARATOR)
+        if separator and version.isdigit():
+            return file_id, int(version)
+        return key, 1
+
+    @staticmethod
+    def latest_version(file_id: str) -> int:
+        metadata = FileService.read_metadata(file_id)
+        return metadata.get("latest_version", 1) if metadata else 1
+
+    @staticmethod
+    def resolve(file_id: str, version: Optional[int] = None) -> str:
+        """Dataset key of ``version`` of an upload, or of its latest version.
+
+        ``file_id`` may itself be a version key, which pins that version
+        unless ``version`` overrides it. Raises VersionNotFoundError for
+        versions that were never appended.
+        """
+        base_id, pinned = FileService.split_version(file_id)
+        if version is None and pinned > 1:
+            version = pinned
+        latest = FileService.latest_version(base_id)
+        if version is None:
+            version = latest
+        if version > latest:
+            raise VersionNotFoundError(f"Dataset {base_id} has no version {version}; latest is {latest}")
+        return FileService.version_key(base_id, version)
+
+    @staticmethod
+    def segment_path(key: str) -> str:
+        """Path of the Parquet segment holding the rows a version appended"""
+        return os.path.join(UPLOAD_DIR, f"{key}.segment.parquet")
+
+    @staticmethod
+    def aggregates_path(key: str) -> str:
+        """Path of the persisted profile and histograms of a version"""
+        return os.path.join(UPLOAD_DIR, f"{key}.aggregates.joblib")
+
+    @staticmethod
+    def segment_paths(key: str) -> List[str]:
+        """Segments of versions 2..n, in order, for the dataset key of version n"""
+        file_id, version = FileService.split_version(key)
+        return [FileService.segment_path(FileService.version_key(file_id, v)) for v in range(2, version + 1)]
+
+    @staticmethod
+    def build_columnar(file_id: str, filename: str) -> bool:
+        """Parse an upload once, warming the cache, and write its Parquet sidecar"""
+        df = FileService.load_dataframe(file_id, filename)
+        return FileService.write_columnar(df, file_id)
     
     @staticmethod
-    def load_dataframe(file_id: str, filename: str) -> pd.DataFrame:
-        """Load uploaded file as DataFrame"""
+    def columnar_path(file_id: str) -> str:
+        """Path of the Parquet sidecar written next to an upload"""
+        return os.path.join(UPLOAD_DIR, f"{file_id}.parquet")
+
+    @staticmethod
+    def write_columnar(df: pd.DataFrame, file_id: str) -> bool:
+        """Write a typed Parquet copy of a parsed upload; returns False if skipped"""
+        if not PYARROW_AVAILABLE:
+            return False
+
+        path = FileService.columnar_path(file_id)
+        tmp_path = f"{path}.tmp"
+        try:
+            df.to_parquet(tmp_path, engine="pyarrow", index=False)
+            os.replace(tmp_path, path)
+            return True
+        except Exception:
+            # Mixed-type object columns cannot always be expressed in Arrow;
+            # the raw file stays the source of truth in that case.
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    @staticmethod
+    def load_dataframe(file_id: str, filename: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load uploaded file as DataFrame, served from the shared cache when possible.
+
+        Pass ``columns`` to read only those columns. The returned frame may be
+        shared with concurrent requests; do not mutate it.
+        """
+        if columns is not None:
+            full_df = dataframe_cache.get(file_id)
+            if full_df is not None:
+                return full_df[columns]
+            key = (file_id, tuple(columns))
+        else:
+            key = file_id
+
+        return dataframe_cache.get_or_load(
+            key, lambda: FileService._read_file(file_id, filename, columns)
+        )
+
+    @staticmethod
+    def _read_file(file_id: str, filename: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Parse uploaded file from disk, preferring the columnar sidecar.
+
+        A version key reads the original upload followed by the segments of
+        every version up to it.
+        """
+        base_id, version = FileService.split_version(file_id)
+        if version > 1:
+            frames = [FileService.load_dataframe(base_id, filename, columns)] + [
+                pq.read_table(path, columns=columns).to_pandas() for path in FileService.segment_paths(file_id)
+            ]
+            return pd.concat(frames, ignore_index=True)
+
+        columnar_path = FileService.columnar_path(file_id)
+        if PYARROW_AVAILABLE and os.path.exists(columnar_path):
+            table = pq.read_table(columnar_path, columns=columns, memory_map=True)
+            return table.to_pandas()
+
         file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{filename}")
         
         if filename.endswith(".csv"):
-            return pd.read_csv(file_path)
+            df = pd.read_csv(file_path, usecols=columns)
         elif filename.endswith(".xlsx"):
-            return pd.read_excel(file_path)
+            df = pd.read_excel(file_path, usecols=columns)
         else:
             raise ValueError(f"Unsupported file format: {filename}")
+        # usecols keeps the file's column order; Parquet and the cache keep the requested one
+        return df if columns is None else df[columns]
     
+    @staticmethod
+    def iter_chunks(file_id: str, filename: str, chunk_rows: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Yield an upload as DataFrames of at most ``chunk_rows`` rows.
+
+        Reads Parquet row batches from the sidecar when present, otherwise
+        chunked read_csv. Excel files cannot be streamed and are sliced from
+        the cached full frame. Version keys continue with the row batches of
+        each appended segment.
+        """
+        base_id, version = FileService.split_version(file_id)
+        if version > 1:
+            yield from FileService.iter_chunks(base_id, filename, chunk_rows, columns)
+            for path in FileService.segment_paths(file_id):
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+                    yield batch.to_pandas()
+            return
+
+        columnar_path = FileService.columnar_path(file_id)
+        if PYARROW_AVAILABLE and os.path.exists(columnar_path):
+            parquet_file = pq.ParquetFile(columnar_path, memory_map=True)
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+                yield batch.to_pandas()
+            return
+
+        file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{filename}")
+        if filename.endswith(".csv"):
+            for chunk in pd.read_csv(file_path, chunksize=chunk_rows, usecols=columns):
+                yield chunk if columns is None else chunk[columns]
+            return
+
+        df = FileService.load_dataframe(file_id, filename, columns=columns)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+
+    @staticmethod
+    def file_size(file_id: str, filename: str) -> int:
+        """Size in bytes of the raw upload, or of the columnar copy for
+        datasets written by the server without a raw file; versions add
+        the size of their segments"""
+        base_id, version = FileService.split_version(file_id)
+        if version > 1:
+            return FileService.file_size(base_id, filename) + sum(
+                os.path.getsize(path) for path in FileService.segment_paths(file_id)
+            )
+        file_path = os.path.join(UPLOAD_DIR, f"{file_id}_{filename}")
+        if not os.path.exists(file_path) and os.path.exists(FileService.columnar_path(file_id)):
+            return os.path.getsize(FileService.columnar_path(file_id))
+        return os.path.getsize(file_path)
+
     @staticmethod
     def get_file_info(df: pd.DataFrame, file_id: str, filename: str) -> dict:
         """Extract file information"""
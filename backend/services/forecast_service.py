@@ -7,11 +7,140 @@ try:
 except ImportError:
     PROPHET_AVAILABLE = False
 
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import FORECAST_BACKTEST_TOLERANCE, GROUP_FORECAST_MAX_GROUPS, GROUP_FORECAST_MIN_POINTS
+from services.cache_service import forecast_cache
+from services.ets_service import ETSService
+from services.file_service import FileService
+
+DEFAULT_SEASONALITY = {
+    "yearly_seasonality": True,
+    "weekly_seasonality": None,
+    "daily_seasonality": False,
+    "seasonality_mode": "additive",
+}
+
+GROUP_FORECAST_COLUMNS = ["group", "step", "ds", "yhat", "yhat_lower", "yhat_upper", "method"]
 
 class ForecastService:
     @staticmethod
-    def forecast_time_series(df: pd.DataFrame, date_col: str, value_col: str, periods: int = 12) -> Dict[str, Any]:
+    def seasonality_key(seasonality: Optional[Dict[str, Any]] = None) -> Tuple:
+        """Hashable form of the seasonality settings, defaults filled in"""
+        return tuple(sorted({**DEFAULT_SEASONALITY, **(seasonality or {})}.items()))
+    
+    @staticmethod
+    def warm_start_params(model: "Prophet") -> Dict[str, Any]:
+        """Fitted Stan parameters of ``model`` in the form Prophet.fit accepts as init"""
+        params = {name: float(model.params[name][0][0]) for name in ("k", "m", "sigma_obs")}
+        for name in ("delta", "beta"):
+            params[name] = model.params[name][0]
+        return params
+    
+    @staticmethod
+    def fit_prophet(series: pd.DataFrame, seasonality: Tuple, init: Optional[Dict[str, Any]] = None) -> "Prophet":
+        settings = dict(seasonality)
+        model = Prophet(
+            yearly_seasonality=settings["yearly_seasonality"],
+            weekly_seasonality="auto" if settings["weekly_seasonality"] is None else settings["weekly_seasonality"],
+            daily_seasonality=settings["daily_seasonality"],
+            seasonality_mode=settings["seasonality_mode"],
+        )
+        if init is None:
+            return model.fit(series)
+        return model.fit(series, init=init)
+    
+    @staticmethod
+    def get_prophet_model(
+        df: pd.DataFrame,
+        date_col: str,
+        value_col: str,
+        dataset_key: Optional[str] = None,
+        seasonality: Optional[Dict[str, Any]] = None
+    ) -> Tuple["Prophet", Dict[str, Any]]:
+        """Fitted Prophet model and how it was obtained.
+
+        Models are cached by (dataset fingerprint, date_col, value_col,
+        seasonality), so a request that only changes the horizon skips the
+        Stan optimization. The last fit's parameters are kept per upload,
+        shared by all of its versions, so the refit after an append (or any
+        other content change) starts from them instead of from scratch,
+        falling back to a cold fit if they no longer match (for example a
+        different number of changepoints).
+        """
+        settings = ForecastService.seasonality_key(seasonality)
+        if dataset_key is not None:
+            upload_id, _ = FileService.split_version(dataset_key)
+            lineage_key = ("prophet_params", upload_id, date_col, value_col, settings)
+        
+        def fit() -> Dict[str, Any]:
+            series = df[[date_col, value_col]].copy()
+            series.columns = ['ds', 'y']
+            series['ds'] = pd.to_datetime(series['ds'])
+            
+            init = forecast_cache.get(lineage_key) if dataset_key is not None else None
+            started_at = time.perf_counter()
+            warm_start = False
+            if init is not None:
+                try:
+                    model = ForecastService.fit_prophet(series, settings, init)
+                    warm_start = True
+                except Exception:
+                    model = None
+            if not warm_start:
+                model = ForecastService.fit_prophet(series, settings)
+            fit_seconds = time.perf_counter() - started_at
+            
+            if dataset_key is not None:
+                forecast_cache.put(lineage_key, ForecastService.warm_start_params(model))
+            return {"model": model, "warm_start": warm_start, "fit_seconds": round(fit_seconds, 3)}
+        
+        if dataset_key is None:
+            entry = fit()
+            return entry["model"], {"cached": False, "warm_start": False, "fit_seconds": entry["fit_seconds"]}
+        
+        key = ("prophet", FileService.fingerprint(dataset_key, df), date_col, value_col, settings)
+        cached = forecast_cache.get(key)
+        entry = cached if cached is not None else forecast_cache.get_or_load(key, fit)
+        return entry["model"], {
+            "cached": cached is not None,
+            "warm_start": entry["warm_start"],
+            "fit_seconds": entry["fit_seconds"],
+        }
+    
+    @staticmethod
+    def prophet_frame(
+        df: pd.DataFrame,
+        date_col: str,
+        value_col: str,
+        periods: int = 12,
+        dataset_key: Optional[str] = None,
+        seasonality: Optional[Dict[str, Any]] = None
+    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Prophet forecast for the next ``periods`` steps (ds, yhat,
+        yhat_lower, yhat_upper) and the fit info from get_prophet_model"""
+        if not PROPHET_AVAILABLE:
+            raise RuntimeError("Prophet library not installed")
+        
+        model, fit_info = ForecastService.get_prophet_model(df, date_col, value_col, dataset_key, seasonality)
+        
+        # Predict only the future steps; the fitted history is not returned
+        future = model.make_future_dataframe(periods=periods, include_history=False)
+        forecast = model.predict(future)
+        
+        # Extract relevant columns
+        return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].reset_index(drop=True), fit_info
+    
+    @staticmethod
+    def forecast_time_series(
+        df: pd.DataFrame,
+        date_col: str,
+        value_col: str,
+        periods: int = 12,
+        dataset_key: Optional[str] = None,
+        seasonality: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Forecast using time series data"""
         if not PROPHET_AVAILABLE:
             return {
@@ -19,51 +148,246 @@ class ForecastService:
                 "message": "Install with: pip install prophet"
             }
         
-        # Prepare data for Prophet
-        forecast_df = df[[date_col, value_col]].copy()
-        forecast_df.columns = ['ds', 'y']
-        forecast_df['ds'] = pd.to_datetime(forecast_df['ds'])
-        
         try:
-            # Train model
-            model = Prophet(daily_seasonality=False, yearly_seasonality=True)
-            model.fit(forecast_df)
-            
-            # Make forecast
-            future = model.make_future_dataframe(periods=periods)
-            forecast = model.predict(future)
-            
-            # Extract relevant columns
-            forecast_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(periods)
+            forecast_data, fit_info = ForecastService.prophet_frame(
+                df, date_col, value_col, periods, dataset_key, seasonality
+            )
             
             return {
                 "forecast": forecast_data[['ds', 'yhat']].to_dict('records'),
                 "lower_bound": forecast_data['yhat_lower'].tolist(),
                 "upper_bound": forecast_data['yhat_upper'].tolist(),
-                "periods": periods
+                "periods": periods,
+                "fit": fit_info
             }
         except Exception as e:
             return {"error": str(e)}
     
     @staticmethod
-    def simple_forecast(df: pd.DataFrame, value_col: str, periods: int = 12) -> Dict[str, Any]:
-        """Simple exponential smoothing forecast"""
-        values = df[value_col].dropna().values
-        
-        if len(values) < 3:
-            return {"error": "Insufficient data for forecasting"}
+    def future_dates(dates: pd.Series, periods: int) -> pd.Series:
+        """The next ``periods`` dates at the series' median spacing; NaT when
+        the spacing cannot be inferred"""
+        dates = pd.to_datetime(dates).dropna().sort_values()
+        step = dates.diff().median() if len(dates) > 1 else pd.NaT
+        if pd.isna(step) or step <= pd.Timedelta(0):
+            return pd.Series(pd.NaT, index=range(periods), dtype="datetime64[ns]")
+        return pd.Series(dates.iloc[-1] + step * np.arange(1, periods + 1))
+    
+    @staticmethod
+    def partition(df: pd.DataFrame, group_by: str, date_col: str) -> List[Tuple[Any, pd.DataFrame]]:
+        """(group key, series sorted by date) pairs of a long-format frame;
+        rows without a group key are dropped"""
+        if group_by not in df.columns:
+            raise ValueError(f"Column '{group_by}' not found")
+        count = df[group_by].nunique()
+        if count > GROUP_FORECAST_MAX_GROUPS:
+            raise ValueError(f"{count} groups in '{group_by}' exceed the limit of {GROUP_FORECAST_MAX_GROUPS}")
         
-        # Simple exponential smoothing
-        alpha = 0.3
-        forecast = []
-        last_value = values[-1]
+        df = df.assign(**{date_col: pd.to_datetime(df[date_col], errors="coerce")}).dropna(subset=[date_col])
+        return [
+            (key.item() if isinstance(key, np.generic) else key, series.sort_values(date_col))
+            for key, series in df.groupby(group_by, sort=True, observed=True)
+        ]
+    
+    @staticmethod
+    def numeric_series(df: pd.DataFrame, date_col: str, value_col: str) -> pd.DataFrame:
+        """Rows with a parseable date and a numeric value, sorted by date"""
+        series = pd.DataFrame({
+            date_col: pd.to_datetime(df[date_col], errors="coerce"),
+            value_col: pd.to_numeric(df[value_col], errors="coerce"),
+        })
+        return series.dropna().sort_values(date_col, kind="stable")
+    
+    @staticmethod
+    def ets_frames(
+        series_list: List[pd.DataFrame],
+        date_col: str,
+        value_col: str,
+        periods: int
+    ) -> List[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """ETS forecast frames (ds, yhat, yhat_lower, yhat_upper) and fitted
+        model of each date-sorted series, fitted as one 2-D batch per
+        season length"""
+        by_season: Dict[Optional[int], List[int]] = {}
+        for i, series in enumerate(series_list):
+            by_season.setdefault(ETSService.season_length(series[date_col]), []).append(i)
         
-        for _ in range(periods):
-            last_value = alpha * last_value + (1 - alpha) * np.mean(values[-5:])
-            forecast.append(last_value)
+        results: List[Tuple[pd.DataFrame, Dict[str, Any]]] = [None] * len(series_list)
+        for season_length, indices in by_season.items():
+            Y = ETSService.align([series_list[i][value_col].to_numpy(dtype=np.float64) for i in indices])
+            fit = ETSService.fit(Y, season_length)
+            mean, lower, upper = fit.forecast(periods)
+            for row, i in enumerate(indices):
+                frame = pd.DataFrame({
+                    "ds": ForecastService.future_dates(series_list[i][date_col], periods).to_numpy(),
+                    "yhat": mean[row],
+                    "yhat_lower": lower[row],
+                    "yhat_upper": upper[row],
+                })
+                results[i] = (frame, fit.describe(row))
+        return results
+    
+    @staticmethod
+    def ets_frame(df: pd.DataFrame, date_col: str, value_col: str, periods: int = 12) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Exponential smoothing forecast frame (ds, yhat, yhat_lower,
+        yhat_upper) and the model the AIC picked: simple, Holt or Holt-Winters"""
+        series = ForecastService.numeric_series(df, date_col, value_col)
+        if len(series) < 3:
+            raise ValueError("Insufficient data for forecasting")
+        return ForecastService.ets_frames([series], date_col, value_col, periods)[0]
+    
+    @staticmethod
+    def ets_forecast(df: pd.DataFrame, date_col: str, value_col: str, periods: int = 12) -> Dict[str, Any]:
+        """Exponential smoothing forecast, shaped like the Prophet result"""
+        try:
+            forecast, model = ForecastService.ets_frame(df, date_col, value_col, periods)
+        except ValueError as e:
+            return {"error": str(e)}
         
         return {
-            "forecast": [{"value": v} for v in forecast],
+            "forecast": forecast[['ds', 'yhat']].to_dict('records'),
+            "lower_bound": forecast['yhat_lower'].tolist(),
+            "upper_bound": forecast['yhat_upper'].tolist(),
             "method": "exponential_smoothing",
+            "model": model,
             "periods": periods
         }
+    
+    @staticmethod
+    def forecast_groups(
+        groups: List[Tuple[Any, pd.DataFrame]],
+        date_col: str,
+        value_col: str,
+        periods: int,
+        seasonality: Optional[Dict[str, Any]] = None
+    ) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+        """Forecasts of a batch of (group key, series) pairs as one long frame
+        (group, step, ds, yhat, yhat_lower, yhat_upper, method), plus the
+        groups that could not be forecast. Runs as one heavy-pool task.
+        
+        Series with at least GROUP_FORECAST_MIN_POINTS values use Prophet.
+        Shorter ones, and those whose Prophet fit fails, share one batched
+        exponential smoothing fit; with fewer than three values the last
+        value is carried forward without bounds.
+        """
+        forecasts: Dict[int, Tuple[pd.DataFrame, str]] = {}
+        errors = []
+        smoothed: List[int] = []
+        prepared: List[pd.DataFrame] = []
+        
+        for i, (key, series) in enumerate(groups):
+            series = ForecastService.numeric_series(series, date_col, value_col)
+            prepared.append(series)
+            if series.empty:
+                errors.append({"group": key, "error": "No values to forecast"})
+            elif len(series) < 3:
+                forecasts[i] = (pd.DataFrame({
+                    "ds": ForecastService.future_dates(series[date_col], periods).to_numpy(),
+                    "yhat": np.full(periods, float(series[value_col].iloc[-1])),
+                    "yhat_lower": np.nan,
+                    "yhat_upper": np.nan,
+                }), "last_value")
+            elif PROPHET_AVAILABLE and len(series) >= GROUP_FORECAST_MIN_POINTS:
+                try:
+                    frame, _ = ForecastService.prophet_frame(series, date_col, value_col, periods, None, seasonality)
+                    forecasts[i] = (frame, "prophet")
+                except Exception:
+                    smoothed.append(i)
+            else:
+                smoothed.append(i)
+        
+        if smoothed:
+            fitted = ForecastService.ets_frames([prepared[i] for i in smoothed], date_col, value_col, periods)
+            for i, (frame, _) in zip(smoothed, fitted):
+                forecasts[i] = (frame, "exponential_smoothing")
+        
+        frames = []
+        for i, (key, _) in enumerate(groups):
+            if i not in forecasts:
+                continue
+            frame, method = forecasts[i]
+            frame.insert(0, "step", np.arange(1, len(frame) + 1))
+            frame.insert(0, "group", key)
+            frame["method"] = method
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=GROUP_FORECAST_COLUMNS), errors
+        return pd.concat(frames, ignore_index=True), errors
+    
+    @staticmethod
+    def backtest_scores(actual: np.ndarray, predicted: np.ndarray, fit_seconds: float) -> Dict[str, Any]:
+        """Error metrics of (origins x horizon) forecasts against the actuals"""
+        errors = predicted - actual
+        denominator = np.abs(actual) + np.abs(predicted)
+        smape = np.where(denominator > 0, 2 * np.abs(errors) / np.where(denominator > 0, denominator, 1), 0.0)
+        return {
+            "mae": float(np.abs(errors).mean()),
+            "rmse": float(np.sqrt((errors ** 2).mean())),
+            "smape": float(smape.mean() * 100),
+            "origin_mae": np.abs(errors).mean(axis=1).tolist(),
+            "fit_seconds": round(fit_seconds, 3),
+        }
+    
+    @staticmethod
+    def backtest(
+        df: pd.DataFrame,
+        date_col: str,
+        value_col: str,
+        horizon: int = 12,
+        origins: int = 3,
+        seasonality: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Rolling-origin backtest of exponential smoothing against Prophet.
+
+        The last ``origins * horizon`` values are held out in ``origins``
+        consecutive windows; each window is forecast from the values before
+        it. All origins of the ETS model are fitted as one 2-D batch, Prophet
+        is fitted once per origin. Exponential smoothing is recommended
+        unless Prophet's MAE beats it by more than FORECAST_BACKTEST_TOLERANCE.
+        """
+        series = ForecastService.numeric_series(df, date_col, value_col)
+        values = series[value_col].to_numpy(dtype=np.float64)
+        dates = series[date_col]
+        if len(values) - origins * horizon < 3:
+            raise ValueError(f"Need at least {origins * horizon + 3} values for {origins} origins of {horizon} steps")
+        
+        ends = [len(values) - (origins - i) * horizon for i in range(origins)]
+        actual = np.vstack([values[end:end + horizon] for end in ends])
+        
+        started_at = time.perf_counter()
+        fit = ETSService.fit(ETSService.align([values[:end] for end in ends]), ETSService.season_length(dates))
+        predicted, _, _ = fit.forecast(horizon)
+        methods: Dict[str, Dict[str, Any]] = {
+            "exponential_smoothing": {
+                **ForecastService.backtest_scores(actual, predicted, time.perf_counter() - started_at),
+                "models": [fit.describe(row) for row in range(origins)],
+            }
+        }
+        
+        if not PROPHET_AVAILABLE:
+            methods["prophet"] = {"error": "Prophet library not installed"}
+        else:
+            settings = ForecastService.seasonality_key(seasonality)
+            history = series.rename(columns={date_col: "ds", value_col: "y"})
+            started_at = time.perf_counter()
+            try:
+                predicted = np.vstack([
+                    ForecastService.fit_prophet(history.iloc[:end], settings)
+                    .predict(pd.DataFrame({"ds": dates.iloc[end:end + horizon].to_numpy()}))["yhat"].to_numpy()
+                    for end in ends
+                ])
+                methods["prophet"] = ForecastService.backtest_scores(actual, predicted, time.perf_counter() - started_at)
+            except Exception as e:
+                methods["prophet"] = {"error": str(e)}
+        
+        ets_mae = methods["exponential_smoothing"]["mae"]
+        prophet_mae = methods["prophet"].get("mae")
+        prophet_wins = prophet_mae is not None and ets_mae > prophet_mae * (1 + FORECAST_BACKTEST_TOLERANCE)
+        return {
+            "horizon": horizon,
+            "origins": origins,
+            "train_sizes": ends,
+            "methods": methods,
+            "recommended": "prophet" if prophet_wins else "exponential_smoothing",
+            "tolerance": FORECAST_BACKTEST_TOLERANCE,
+        }
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config import JOB_RESULT_TTL_SECONDS
+
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+
+class Job:
+    """A background computation with progress and a retained result"""
+
+    def __init__(self, kind: str, key: str, params: Dict[str, Any]):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.key = key
+        self.params = params
+        self.status = "queued"
+        self.progress = 0.0
+        self.message: Optional[str] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def report(self, progress: float, message: Optional[str] = None) -> None:
+        self.progress = max(0.0, min(1.0, float(progress)))
+        if message is not None:
+            self.message = message
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobService:
+    """In-process registry of background jobs.
+
+    Submissions with the same kind and parameters are coalesced onto the job
+    that is already queued, running or holding a result. Finished jobs are
+    retained for JOB_RESULT_TTL_SECONDS and swept lazily.
+    """
+
+    jobs: Dict[str, Job] = {}
+    jobs_by_key: Dict[str, str] = {}
+
+    @staticmethod
+    def job_key(kind: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps({"kind": kind, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def submit(kind: str, params: Dict[str, Any], work: Callable[[Job], Awaitable[Any]]) -> Job:
+        """Start ``work(job)`` in the background, or return the identical job already known"""
+        JobService.sweep()
+
+        key = JobService.job_key(kind, params)
+        existing_id = JobService.jobs_by_key.get(key)
+        if existing_id is not None:
+            existing = JobService.jobs.get(existing_id)
+            if existing is not None and existing.status not in ("failed", "cancelled"):
+                return existing
+
+        job = Job(kind, key, params)
+        JobService.jobs[job.id] = job
+        JobService.jobs_by_key[key] = job.id
+        job.task = asyncio.create_task(JobService._run(job, work))
+        return job
+
+    @staticmethod
+    async def _run(job: Job, work: Callable[[Job], Awaitable[Any]]) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = await work(job)
+            job.status = "succeeded"
+            job.report(1.0, "done")
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e) or type(e).__name__
+        finally:
+            job.finished_at = time.time()
+            job.done.set()
+
+    @staticmethod
+    def get(job_id: str) -> Optional[Job]:
+        JobService.sweep()
+        return JobService.jobs.get(job_id)
+
+    @staticmethod
+    async def wait(job: Job, timeout: float) -> Job:
+        """Long-poll: return once the job finishes or ``timeout`` seconds pass"""
+        if timeout > 0 and not job.finished:
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    @staticmethod
+    def cancel(job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job.
+
+        Work already handed to a worker pool runs to completion there, but its
+        result is discarded.
+        """
+        job = JobService.get(job_id)
+        if job is not None and not job.finished and job.task is not None:
+            job.message = "cancellation requested"
+            job.task.cancel()
+            if job.status == "queued":
+                # A task cancelled before its first step never runs _run
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                job.done.set()
+        return job
+
+    @staticmethod
+    def list_jobs() -> List[Dict[str, Any]]:
+        JobService.sweep()
+        return [job.to_dict(include_result=False) for job in JobService.jobs.values()]
+
+    @staticmethod
+    def sweep() -> None:
+        """Forget finished jobs whose results have outlived their TTL"""
+        cutoff = time.time() - JOB_RESULT_TTL_SECONDS
+        expired = [
+            job for job in JobService.jobs.values()
+            if job.finished and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job in expired:
+            del JobService.jobs[job.id]
+            if JobService.jobs_by_key.get(job.key) == job.id:
+                del JobService.jobs_by_key[job.key]
+
+    @staticmethod
+    def report(job: Optional[Job], progress: float, message: Optional[str] = None) -> None:
+        """Record progress when running as a job; no-op for inline requests"""
+        if job is not None:
+            job.report(progress, message)
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        counts = {"total": len(JobService.jobs)}
+        for job in JobService.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
@@ -0,0 +1,158 @@
+import asyncio
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sklearn.model_selection import KFold, StratifiedKFold
+
+from config import (
+    LEADERBOARD_CV_FOLDS,
+    LEADERBOARD_HALVING_FACTOR,
+    LEADERBOARD_MIN_SAMPLES,
+    RANDOM_STATE,
+)
+from services.executor_service import ExecutorService
+from services.job_service import Job, JobService
+from services.ml_service import CANDIDATES, MLService
+from services.preprocessing_service import PreparedFeatures
+
+METRICS = {"regression": "r_squared", "classification": "accuracy"}
+
+
+class LeaderboardService:
+    """Ranks candidate estimators by k-fold cross-validation.
+
+    Candidates go through successive halving: every rung cross-validates
+    the surviving candidates on a larger random subsample and keeps the best
+    1/LEADERBOARD_HALVING_FACTOR of them, so clearly losing candidates never
+    reach the full dataset. Each (candidate, fold) fit is a separate task in
+    the heavy pool.
+    """
+
+    @staticmethod
+    def halving_schedule(rows: int, candidates: int, factor: int = LEADERBOARD_HALVING_FACTOR,
+                         min_samples: int = LEADERBOARD_MIN_SAMPLES) -> List[int]:
+        """Rows evaluated at each rung; the last rung uses every row"""
+        rungs = max(1, math.ceil(math.log(candidates, factor))) if candidates > 1 else 1
+        schedule = [
+            min(rows, max(min_samples, rows // factor ** (rungs - 1 - rung)))
+            for rung in range(rungs)
+        ]
+        # Small datasets would repeat the same rows in several rungs
+        return [samples for i, samples in enumerate(schedule) if i == rungs - 1 or samples < schedule[i + 1]]
+
+    @staticmethod
+    def splits(task: str, y: np.ndarray, folds: int) -> List[Any]:
+        """Stratified folds for classification when every class can fill them"""
+        if task == "classification":
+            _, counts = np.unique(y, return_counts=True)
+            if counts.min() >= folds:
+                return list(StratifiedKFold(folds, shuffle=True, random_state=RANDOM_STATE).split(y, y))
+        return list(KFold(folds, shuffle=True, random_state=RANDOM_STATE).split(y))
+
+    @staticmethod
+    def fit_best(task: str, name: str, X: np.ndarray, y: np.ndarray) -> Any:
+        model = MLService.make_estimator(task, name)
+        model.fit(X, y)
+        return model
+
+    @staticmethod
+    async def run(prepared: PreparedFeatures, task: str,
+                  folds: int = LEADERBOARD_CV_FOLDS, job: Optional[Job] = None) -> Dict[str, Any]:
+        """Leaderboard of every candidate for ``task``, best first.
+
+        The winner is refitted on all rows and returned under the estimator
+        key, like the single-model training functions.
+        """
+        X, y = prepared.X, prepared.y
+        if len(X) < 2 * folds:
+            raise ValueError(f"Need at least {2 * folds} rows with a target for {folds}-fold cross-validation")
+
+        names = list(CANDIDATES[task])
+        schedule = LeaderboardService.halving_schedule(len(X), len(names))
+        order = np.random.default_rng(RANDOM_STATE).permutation(len(X))
+        results: Dict[str, Dict[str, Any]] = {}
+        alive = names
+        fold_fits = 0
+        started_at = time.perf_counter()
+
+        for rung, samples in enumerate(schedule):
+            JobService.report(job, 0.1 + 0.7 * rung / len(schedule), f"rung {rung + 1}/{len(schedule)}: {len(alive)} candidates on {samples} rows")
+            rows = np.sort(order[:samples])
+            X_rung, y_rung = X[rows], y[rows]
+            splits = LeaderboardService.splits(task, y_rung, folds)
+
+            tasks = [
+                ExecutorService.run("heavy", MLService.fit_fold, task, name, X_rung, y_rung, train_idx, test_idx)
+                for name in alive for train_idx, test_idx in splits
+            ]
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+            fold_fits += len(tasks)
+
+            for i, name in enumerate(alive):
+                fits = outcomes[i * folds:(i + 1) * folds]
+                errors = [fit for fit in fits if isinstance(fit, BaseException)]
+                entry = {"candidate": name, "rung": rung, "samples": samples}
+                if errors:
+                    entry.update({"mean_score": None, "std_score": None, "fold_scores": [],
+                                  "fit_seconds": 0.0, "mean_fit_seconds": 0.0, "error": str(errors[0])})
+                else:
+                    scores = np.array([fit["score"] for fit in fits])
+                    fit_seconds = [fit["fit_seconds"] for fit in fits]
+                    entry.update({
+                        "mean_score": float(scores.mean()),
+                        "std_score": float(scores.std()),
+                        "fold_scores": scores.tolist(),
+                        "fit_seconds": float(sum(fit_seconds)),
+                        "mean_fit_seconds": float(np.mean(fit_seconds)),
+                    })
+                # Fit time accumulates over every rung the candidate survived
+                entry["fit_seconds"] += results.get(name, {}).get("fit_seconds", 0.0)
+                results[name] = entry
+
+            ranked = sorted(
+                (name for name in alive if results[name]["mean_score"] is not None),
+                key=lambda name: results[name]["mean_score"], reverse=True
+            )
+            if not ranked:
+                raise ValueError("Every candidate failed: " + "; ".join(results[name]["error"] for name in alive))
+            if rung < len(schedule) - 1:
+                alive = ranked[:math.ceil(len(ranked) / LEADERBOARD_HALVING_FACTOR)]
+
+        leaderboard = sorted(
+            results.values(),
+            key=lambda entry: (entry["mean_score"] is not None, entry["rung"], entry["mean_score"] or 0.0),
+            reverse=True
+        )
+        for rank, entry in enumerate(leaderboard, start=1):
+            entry["rank"] = rank
+            entry["pruned"] = entry["rung"] < len(schedule) - 1
+        best = leaderboard[0]
+
+        JobService.report(job, 0.85, f"refitting {best['candidate']} on all rows")
+        estimator = await ExecutorService.run("heavy", LeaderboardService.fit_best, task, best["candidate"], X, y)
+
+        metric = METRICS[task]
+        result = {
+            "model_type": task,
+            "mode": "leaderboard",
+            "target": prepared.target,
+            "metric": metric,
+            metric: best["mean_score"],
+            "best_candidate": best["candidate"],
+            "cv_folds": folds,
+            "leaderboard": leaderboard,
+            "halving": {
+                "factor": LEADERBOARD_HALVING_FACTOR,
+                "rung_samples": schedule,
+                "fold_fits": fold_fits,
+            },
+            "search_seconds": round(time.perf_counter() - started_at, 3),
+            "samples_trained": len(X),
+            **MLService.feature_info(prepared),
+            "estimator": estimator,
+        }
+        if task == "classification":
+            result["classes"] = estimator.classes_.tolist()
+        return result
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from config import LLM_CACHE_DIR, LLM_CACHE_DISK_MAX_ENTRIES, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS
+from services.executor_service import ExecutorService
+
+
+def normalize_question(question: str) -> str:
+    """Case-folded question with whitespace collapsed and trailing
+    punctuation dropped, so trivially different phrasings share a key"""
+    return re.sub(r"[\s?.!]+$", "", " ".join(question.casefold().split()))
+
+
+class LLMResponseCache:
+    """TTL and LRU cache of LLM responses with an optional disk tier.
+
+    Entries live in memory for ``ttl_seconds``, at most ``capacity`` of them,
+    least recently used evicted first. With a ``directory`` each entry is also
+    written there as JSON, so answers survive restarts. Expired files are
+    removed when read and the oldest files once there are more than
+    ``disk_capacity``; the directory is listed once, after which the files
+    are tracked in memory. Identical requests arriving while the first is
+    still waiting on the LLM share its call instead of sending their own.
+    The call runs in its own task, so a caller that is cancelled does not
+    cancel it for the others.
+    """
+
+    def __init__(self, capacity: int, ttl_seconds: float, directory: Optional[str] = None, disk_capacity: int = 0):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory
+        self.disk_capacity = disk_capacity
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        # Keys of the files on disk, oldest first; None until the directory is listed
+        self._disk_keys: "Optional[OrderedDict[str, None]]" = None
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(kind: str, question: str, context: Optional[str], model: str, temperature: float) -> str:
+        context_hash = hashlib.sha256((context or "").encode("utf-8")).hexdigest()
+        parts = [kind, normalize_question(question), context_hash, model, temperature]
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_memory(self, key: str, stored_at: float, value: Dict[str, Any]) -> None:
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _list_disk(self) -> "OrderedDict[str, None]":
+        """Keys of the entries on disk, oldest first"""
+        entries = []
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            if name.endswith(".json"):
+                try:
+                    entries.append((os.path.getmtime(os.path.join(self.directory, name)), name[:-len(".json")]))
+                except FileNotFoundError:
+                    pass
+        return OrderedDict((key, None) for _, key in sorted(entries))
+
+    def _remove_disk(self, key: str) -> None:
+        """Drop an entry's file; call with _disk_lock held"""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        if self._disk_keys is not None:
+            self._disk_keys.pop(key, None)
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if time.time() - entry["stored_at"] > self.ttl_seconds:
+            with self._disk_lock:
+                self._remove_disk(key)
+            self.expired += 1
+            return None
+        return entry["stored_at"], entry["value"]
+
+    def _write_disk(self, key: str, stored_at: float, value: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f"{key}.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"stored_at": stored_at, "value": value}, f)
+
+        with self._disk_lock:
+            if self._disk_keys is None:
+                self._disk_keys = self._list_disk()
+            os.replace(tmp_path, self._path(key))
+            self._disk_keys[key] = None
+            self._disk_keys.move_to_end(key)
+            while len(self._disk_keys) > self.disk_capacity:
+                self._remove_disk(next(iter(self._disk_keys)))
+
+    async def _load(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+        cacheable: Callable[[Dict[str, Any]], bool]
+    ) -> Tuple[Dict[str, Any], str]:
+        """Response for ``key`` from disk or from ``call``, and where it came
+        from: disk, stored (called and cached) or uncached"""
+        if self.directory:
+            entry = await ExecutorService.run("light", self._read_disk, key)
+            if entry is not None:
+                self.disk_hits += 1
+                self._put_memory(key, *entry)
+                return entry[1], "disk"
+
+        self.misses += 1
+        value = await call()
+        if not cacheable(value) or self.ttl_seconds <= 0:
+            return value, "uncached"
+        stored_at = time.time()
+        self._put_memory(key, stored_at, value)
+        if self.directory:
+            await ExecutorService.run("light", self._write_disk, key, stored_at, value)
+        return value, "stored"
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Retrieved here so an error whose callers were all cancelled is not logged
+        if not task.cancelled():
+            task.exception()
+
+    async def get_or_call(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+        cacheable: Callable[[Dict[str, Any]], bool]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Cached response for ``key``, or the result of ``call``, stored
+        when ``cacheable`` accepts it; also returns whether it was served
+        from the cache. A caller that joined another's call counts as cached
+        only when that call's response was stored."""
+        value = self._get_memory(key)
+        if value is not None:
+            self.hits += 1
+            return value, True
+
+        task = self._in_flight.get(key)
+        joined = task is not None
+        if joined:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._load(key, call, cacheable))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+
+        value, source = await asyncio.shield(task)
+        return value, source == "disk" or (joined and source == "stored")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "ttl_seconds": self.ttl_seconds,
+            "disk": self.directory,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+            "in_flight": len(self._in_flight),
+        }
+
+
+# LLM answers and reports keyed by (kind, normalized question, context hash,
+# model, temperature).
+llm_cache = LLMResponseCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS, LLM_CACHE_DIR, LLM_CACHE_DISK_MAX_ENTRIES)
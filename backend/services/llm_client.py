@@ -0,0 +1,167 @@
+import asyncio
+import random
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+from config import (
+    LLM_CONNECT_TIMEOUT,
+    LLM_HTTP2,
+    LLM_KEEPALIVE_SECONDS,
+    LLM_LATENCY_WINDOW,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_RETRY_MAX_SECONDS,
+    LLM_TIMEOUT,
+    OPENROUTER_API_KEY,
+    OPENROUTER_BASE_URL,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Errors raised before the request reached the server; a read or write
+# timeout may come after the (paid) completion was already accepted
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class LLMClient:
+    """The one HTTP client every OpenRouter call goes through.
+
+    It is created on first use and kept for the app's lifetime, so
+    connections are reused (HTTP/2 when h2 is installed). At most
+    LLM_MAX_CONCURRENCY requests are in flight and later callers queue.
+    A 429, a 5xx or a failure to connect (or to get a pooled connection) is
+    retried up to LLM_MAX_RETRIES times with full-jitter exponential
+    backoff, honouring Retry-After. Other transport errors, such as read
+    timeouts, are raised at once so a completion is never paid for twice.
+    The request slot is released while waiting to retry. After the last
+    retry the final response is returned, or the error raised, to the
+    caller.
+    """
+
+    _client: Optional[httpx.AsyncClient] = None
+    _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+    queued = 0
+    in_flight = 0
+    requests = 0
+    attempts = 0
+    retries = 0
+    failures = 0
+    statuses: Counter = Counter()
+    total_wait_seconds = 0.0
+    latencies: Deque[float] = deque(maxlen=LLM_LATENCY_WINDOW)
+
+    @staticmethod
+    def client() -> httpx.AsyncClient:
+        if LLMClient._client is None or LLMClient._client.is_closed:
+            LLMClient._client = httpx.AsyncClient(
+                base_url=OPENROUTER_BASE_URL,
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "HTTP-Referer": "https://analytics-dashboard.app",
+                    "X-Title": "AI Data Analytics Dashboard",
+                },
+                http2=LLM_HTTP2 and H2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_SECONDS,
+                ),
+                timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            )
+        return LLMClient._client
+
+    @staticmethod
+    async def close() -> None:
+        if LLMClient._client is not None:
+            await LLMClient._client.aclose()
+            LLMClient._client = None
+
+    @staticmethod
+    def backoff(retry: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retry number ``retry`` (from 0): the
+        server's Retry-After when it gives seconds, otherwise a uniform draw
+        up to the doubled base delay; both capped at LLM_RETRY_MAX_SECONDS"""
+        if retry_after is not None:
+            try:
+                return min(max(float(retry_after), 0.0), LLM_RETRY_MAX_SECONDS)
+            except ValueError:
+                pass
+        return random.uniform(0, min(LLM_RETRY_BASE_SECONDS * 2 ** retry, LLM_RETRY_MAX_SECONDS))
+
+    @staticmethod
+    async def _attempt(payload: Dict[str, Any]) -> httpx.Response:
+        queued_at = time.perf_counter()
+        LLMClient.queued += 1
+        try:
+            await LLMClient._semaphore.acquire()
+        finally:
+            LLMClient.queued -= 1
+        LLMClient.total_wait_seconds += time.perf_counter() - queued_at
+
+        LLMClient.in_flight += 1
+        LLMClient.attempts += 1
+        try:
+            return await LLMClient.client().post("/chat/completions", json=payload)
+        finally:
+            LLMClient.in_flight -= 1
+            LLMClient._semaphore.release()
+
+    @staticmethod
+    async def chat(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int) -> httpx.Response:
+        """POST a chat completion, retrying transient failures"""
+        payload = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        started_at = time.perf_counter()
+        LLMClient.requests += 1
+        retry = 0
+        while True:
+            try:
+                response = await LLMClient._attempt(payload)
+            except httpx.TransportError as e:
+                LLMClient.statuses["transport_error"] += 1
+                if not isinstance(e, RETRY_ERRORS) or retry >= LLM_MAX_RETRIES:
+                    LLMClient.failures += 1
+                    raise
+                delay = LLMClient.backoff(retry)
+            else:
+                LLMClient.statuses[str(response.status_code)] += 1
+                if response.status_code not in RETRY_STATUSES or retry >= LLM_MAX_RETRIES:
+                    if response.status_code != 200:
+                        LLMClient.failures += 1
+                    LLMClient.latencies.append(time.perf_counter() - started_at)
+                    return response
+                delay = LLMClient.backoff(retry, response.headers.get("Retry-After"))
+
+            LLMClient.retries += 1
+            retry += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        latencies = np.array(LLMClient.latencies) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+        return {
+            "base_url": OPENROUTER_BASE_URL,
+            "http2": LLM_HTTP2 and H2_AVAILABLE,
+            "max_concurrency": LLM_MAX_CONCURRENCY,
+            "queued": LLMClient.queued,
+            "in_flight": LLMClient.in_flight,
+            "requests": LLMClient.requests,
+            "attempts": LLMClient.attempts,
+            "retries": LLMClient.retries,
+            "failures": LLMClient.failures,
+            "statuses": dict(LLMClient.statuses),
+            "avg_wait_ms": LLMClient.total_wait_seconds / LLMClient.attempts * 1000 if LLMClient.attempts else 0.0,
+            "latency_ms": {"p50": float(p50), "p95": float(p95), "p99": float(p99)},
+        }
@@ -1,34 +1,83 @@
-import pandas as pd
+import time
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.ensemble import (
+    RandomForestRegressor, RandomForestClassifier,
+    HistGradientBoostingRegressor, HistGradientBoostingClassifier
+)
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, precision_score, recall_score
-from typing import Dict, Any, Tuple
+from typing import Dict, Any
+
+from config import (
+    LARGE_DATA_GROWTH_FACTOR,
+    LARGE_DATA_INITIAL_SAMPLES,
+    LARGE_DATA_PLATEAU_TOLERANCE,
+    LARGE_DATA_VALIDATION_ROWS,
+    RANDOM_STATE,
+    TEST_SIZE,
+)
+from services.preprocessing_service import PreparedFeatures
+
+# Leaderboard candidates per task, built fresh for every fit
+CANDIDATES = {
+    "regression": {
+        "linear": lambda: LinearRegression(),
+        "random_forest": lambda: RandomForestRegressor(n_estimators=100, random_state=RANDOM_STATE),
+        "hist_gradient_boosting": lambda: HistGradientBoostingRegressor(random_state=RANDOM_STATE),
+    },
+    "classification": {
+        "logistic": lambda: make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000)),
+        "random_forest": lambda: RandomForestClassifier(n_estimators=100, random_state=RANDOM_STATE),
+        "hist_gradient_boosting": lambda: HistGradientBoostingClassifier(random_state=RANDOM_STATE),
+    },
+}
 
 class MLService:
     @staticmethod
-    def train_regression_model(df: pd.DataFrame, target_col: str, model_type: str = "linear") -> Dict[str, Any]:
-        """Train regression model"""
-        # Prepare data
-        X = df.drop(columns=[target_col]).select_dtypes(include=[np.number])
-        y = df[target_col]
-        
-        # Remove rows with NaN
-        mask = ~(X.isna().any(axis=1) | y.isna())
-        X = X[mask]
-        y = y[mask]
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+    def feature_info(prepared: PreparedFeatures) -> Dict[str, Any]:
+        """Input feature schema and preprocessing spec, stored with the model"""
+        return {"features": prepared.input_features, "preprocessing": prepared.spec}
+    
+    @staticmethod
+    def make_estimator(task: str, name: str) -> Any:
+        """Unfitted leaderboard candidate ``name`` for the regression or classification task"""
+        return CANDIDATES[task][name]()
+    
+    @staticmethod
+    def score(task: str, y_true: np.ndarray, y_pred: np.ndarray) -> float:
+        """R² for regression, accuracy for classification; higher is better"""
+        if task == "regression":
+            return float(r2_score(y_true, y_pred))
+        return float(accuracy_score(y_true, y_pred))
+    
+    @staticmethod
+    def fit_fold(task: str, name: str, X: np.ndarray, y: np.ndarray, train_idx: np.ndarray, test_idx: np.ndarray) -> Dict[str, float]:
+        """Fit one candidate on one cross-validation fold and score it on the held-out part"""
+        model = MLService.make_estimator(task, name)
+        started_at = time.perf_counter()
+        model.fit(X[train_idx], y[train_idx])
+        fit_seconds = time.perf_counter() - started_at
+        return {
+            "score": MLService.score(task, y[test_idx], model.predict(X[test_idx])),
+            "fit_seconds": fit_seconds,
+        }
+    
+    @staticmethod
+    def train_regression_model(prepared: PreparedFeatures, model_type: str = "linear") -> Dict[str, Any]:
+        """Train regression model; the fitted model is returned under the estimator key"""
+        # Split the cached encoded matrix
+        train_idx, test_idx = prepared.split()
+        X_train, X_test = prepared.X[train_idx], prepared.X[test_idx]
+        y_train, y_test = prepared.y[train_idx], prepared.y[test_idx]
         
         # Train model
         if model_type == "linear":
             model = LinearRegression()
         else:
-            model = RandomForestRegressor(n_estimators=100, random_state=42)
+            # One core per fit; the heavy pool already runs fits side by side
+            model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=1)
         
         model.fit(X_train, y_train)
         
@@ -40,28 +89,23 @@ class MLService:
         
         return {
             "model_type": model_type,
-            "target": target_col,
+            "target": prepared.target,
             "r_squared": float(r2),
             "rmse": float(rmse),
             "mae": float(mae),
-            "samples_trained": len(X_train)
+            "samples_trained": len(X_train),
+            **MLService.feature_info(prepared),
+            "estimator": model
         }
     
     @staticmethod
-    def train_classification_model(df: pd.DataFrame, target_col: str) -> Dict[str, Any]:
-        """Train classification model"""
-        X = df.drop(columns=[target_col]).select_dtypes(include=[np.number])
-        y = df[target_col]
+    def train_classification_model(prepared: PreparedFeatures) -> Dict[str, Any]:
+        """Train classification model; the fitted model is returned under the estimator key"""
+        train_idx, test_idx = prepared.split()
+        X_train, X_test = prepared.X[train_idx], prepared.X[test_idx]
+        y_train, y_test = prepared.y[train_idx], prepared.y[test_idx]
         
-        mask = ~(X.isna().any(axis=1) | y.isna())
-        X = X[mask]
-        y = y[mask]
-        
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-        
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
+        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=1)
         model.fit(X_train, y_train)
         
         y_pred = model.predict(X_test)
@@ -71,9 +115,93 @@ class MLService:
         
         return {
             "model_type": "classification",
-            "target": target_col,
+            "target": prepared.target,
             "accuracy": float(accuracy),
             "precision": float(precision),
             "recall": float(recall),
-            "samples_trained": len(X_train)
+            "samples_trained": len(X_train),
+            **MLService.feature_info(prepared),
+            "classes": model.classes_.tolist(),
+            "estimator": model
+        }
+    
+    @staticmethod
+    def evaluate(task: str, y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+        """Validation metrics reported by the training endpoints"""
+        if task == "regression":
+            return {
+                "r_squared": float(r2_score(y_true, y_pred)),
+                "rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+                "mae": float(np.mean(np.abs(y_true - y_pred))),
+            }
+        return {
+            "accuracy": float(accuracy_score(y_true, y_pred)),
+            "precision": float(precision_score(y_true, y_pred, average="weighted", zero_division=0)),
+            "recall": float(recall_score(y_true, y_pred, average="weighted", zero_division=0)),
+        }
+    
+    @staticmethod
+    def train_large_model(prepared: PreparedFeatures, task: str) -> Dict[str, Any]:
+        """Train histogram gradient boosting on the float32 feature matrix,
+        growing the training sample until the validation score plateaus.
+
+        Each learning-curve step multiplies the rows by LARGE_DATA_GROWTH_FACTOR
+        and stops once the score gains less than LARGE_DATA_PLATEAU_TOLERANCE;
+        the best step's model is kept. Time saved is the full-data fit time
+        extrapolated linearly from the last step, minus the time the curve
+        actually took. The fitted model is returned under the estimator key.
+        """
+        X, y = prepared.X, prepared.y
+        
+        order = np.random.default_rng(RANDOM_STATE).permutation(len(X))
+        validation_rows = max(1, min(int(len(X) * TEST_SIZE), LARGE_DATA_VALIDATION_ROWS))
+        val_idx, train_idx = order[:validation_rows], order[validation_rows:]
+        X_val, y_val = X[val_idx], y[val_idx]
+        
+        curve = []
+        best = None
+        samples = min(LARGE_DATA_INITIAL_SAMPLES, len(train_idx))
+        while True:
+            rows = np.sort(train_idx[:samples])
+            model = MLService.make_estimator(task, "hist_gradient_boosting")
+            started_at = time.perf_counter()
+            model.fit(X[rows], y[rows])
+            fit_seconds = time.perf_counter() - started_at
+            score = MLService.score(task, y_val, model.predict(X_val))
+            curve.append({"samples": samples, "score": score, "fit_seconds": fit_seconds})
+            
+            plateaued = best is not None and score - best["score"] < LARGE_DATA_PLATEAU_TOLERANCE
+            if best is None or score > best["score"]:
+                best = {"samples": samples, "score": score, "model": model}
+            if plateaued or samples >= len(train_idx):
+                break
+            samples = min(samples * LARGE_DATA_GROWTH_FACTOR, len(train_idx))
+        
+        model = best["model"]
+        spent_seconds = sum(step["fit_seconds"] for step in curve)
+        last = curve[-1]
+        estimated_full_seconds = last["fit_seconds"] * len(train_idx) / last["samples"]
+        
+        result = {
+            "model_type": task,
+            "mode": "large_data",
+            "target": prepared.target,
+            **MLService.evaluate(task, y_val, model.predict(X_val)),
+            "samples_trained": best["samples"],
+            "effective_samples": best["samples"],
+            "available_samples": len(train_idx),
+            "validation_samples": len(val_idx),
+            "plateaued": plateaued,
+            "learning_curve": curve,
+            "fit_seconds": spent_seconds,
+            "estimated_full_fit_seconds": estimated_full_seconds,
+            "time_saved_seconds": max(0.0, estimated_full_seconds - spent_seconds),
+            "feature_dtype": "float32",
+            "feature_bytes": int(X.nbytes),
+            "feature_bytes_saved": int(X.nbytes),
+            **MLService.feature_info(prepared),
+            "estimator": model
         }
+        if task == "classification":
+            result["classes"] = model.classes_.tolist()
+        return result
@@ -0,0 +1,135 @@
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config import MODEL_DIR
+from services.cache_service import model_cache
+from services.preprocessing_service import PreprocessingService
+
+
+class ModelNotFoundError(KeyError):
+    """No registered model with the requested id"""
+
+
+class ModelRegistry:
+    """Fitted estimators persisted with joblib next to a JSON metadata file.
+
+    Metadata records the feature schema, the preprocessing spec, metrics,
+    target and the fingerprint of the dataset the model was trained on. Loaded models are kept in
+    ``model_cache`` so repeated predictions skip deserialization.
+    """
+
+    @staticmethod
+    def model_path(model_id: str) -> str:
+        return os.path.join(MODEL_DIR, f"{model_id}.joblib")
+
+    @staticmethod
+    def metadata_path(model_id: str) -> str:
+        return os.path.join(MODEL_DIR, f"{model_id}.json")
+
+    @staticmethod
+    def register(model: Any, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a fitted model and return its metadata with the new model_id"""
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        model_id = str(uuid.uuid4())
+        metadata = {**metadata, "model_id": model_id, "created_at": datetime.now().isoformat()}
+
+        # Write to temporary paths first so readers never see a partial model
+        for path, write in (
+            (ModelRegistry.model_path(model_id), lambda f: joblib.dump(model, f)),
+            (ModelRegistry.metadata_path(model_id), lambda f: f.write(json.dumps(metadata).encode("utf-8"))),
+        ):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+
+        model_cache.put(model_id, {"model": model, "metadata": metadata})
+        return metadata
+
+    @staticmethod
+    def get_metadata(model_id: str) -> Dict[str, Any]:
+        cached = model_cache.get(model_id)
+        if cached is not None:
+            return cached["metadata"]
+        path = ModelRegistry.metadata_path(model_id)
+        if not os.path.exists(path):
+            raise ModelNotFoundError(f"Model not found: {model_id}")
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def load(model_id: str) -> Dict[str, Any]:
+        """Model and metadata, from the in-memory LRU or from disk"""
+        def read() -> Dict[str, Any]:
+            metadata = ModelRegistry.get_metadata(model_id)
+            return {"model": joblib.load(ModelRegistry.model_path(model_id)), "metadata": metadata}
+
+        return model_cache.get_or_load(model_id, read)
+
+    @staticmethod
+    def list_models() -> List[Dict[str, Any]]:
+        if not os.path.isdir(MODEL_DIR):
+            return []
+        models = []
+        for name in os.listdir(MODEL_DIR):
+            if name.endswith(".json"):
+                with open(os.path.join(MODEL_DIR, name)) as f:
+                    models.append(json.load(f))
+        return sorted(models, key=lambda metadata: metadata["created_at"], reverse=True)
+
+    @staticmethod
+    def delete(model_id: str) -> None:
+        if not os.path.exists(ModelRegistry.metadata_path(model_id)):
+            raise ModelNotFoundError(f"Model not found: {model_id}")
+        model_cache.invalidate(lambda key: key == model_id)
+        for path in (ModelRegistry.model_path(model_id), ModelRegistry.metadata_path(model_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def feature_names(metadata: Dict[str, Any]) -> List[str]:
+        return [feature["name"] for feature in metadata["features"]]
+
+    @staticmethod
+    def check_columns(metadata: Dict[str, Any], columns: List[str]) -> None:
+        """Raise ValueError when ``columns`` lack any of the model's features"""
+        missing = [name for name in ModelRegistry.feature_names(metadata) if name not in columns]
+        if missing:
+            raise ValueError(f"Missing features: {', '.join(missing)}")
+
+    @staticmethod
+    def transform(metadata: Dict[str, Any], rows: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode input rows with the model's preprocessing spec.
+
+        Returns the feature matrix and a mask of the rows that could be
+        encoded. Raises ValueError when feature columns are missing.
+        """
+        ModelRegistry.check_columns(metadata, rows.columns.tolist())
+        spec = metadata.get("preprocessing") or PreprocessingService.numeric_spec(metadata["features"])
+        return PreprocessingService.transform(spec, rows)
+
+    @staticmethod
+    def prepare_features(metadata: Dict[str, Any], rows: pd.DataFrame) -> np.ndarray:
+        """Encode input rows for prediction.
+
+        Raises ValueError when features are missing or a numeric feature
+        holds a value that is not a number.
+        """
+        X, valid = ModelRegistry.transform(metadata, rows)
+        if not valid.all():
+            invalid = np.flatnonzero(~valid)[:10].tolist()
+            raise ValueError(f"Rows with non-numeric values in numeric features: {invalid}")
+        return X
+
+    @staticmethod
+    def predict(model_id: str, X: np.ndarray) -> List[Any]:
+        """Vectorized predictions for feature rows already aligned with prepare_features"""
+        entry = ModelRegistry.load(model_id)
+        return entry["model"].predict(X).tolist()
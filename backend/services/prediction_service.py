@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import PREDICT_BATCH_MAX_ROWS, PREDICT_BATCH_WAIT_MS
+from services.executor_service import ExecutorService
+from services.model_registry import ModelRegistry
+
+
+class PredictionBatcher:
+    """Coalesces concurrent prediction requests for one model.
+
+    The first request opens a batch and waits up to PREDICT_BATCH_WAIT_MS
+    for others to join; the batch is flushed early once it holds
+    PREDICT_BATCH_MAX_ROWS rows. Each flush is one vectorized predict call
+    in the light pool, whose output is split back per request.
+    """
+
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+        self.loop = asyncio.get_running_loop()
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._rows = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+
+    async def predict(self, X: np.ndarray) -> List[Any]:
+        future = self.loop.create_future()
+        self._pending.append((X, future))
+        self._rows += len(X)
+
+        if self._rows >= PREDICT_BATCH_MAX_ROWS:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(PREDICT_BATCH_WAIT_MS / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._rows = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        frames = [X for X, _ in batch]
+        self.batches += 1
+        self.requests += len(batch)
+        self.rows += sum(len(X) for X in frames)
+        try:
+            X = frames[0] if len(frames) == 1 else np.concatenate(frames)
+            predictions = await ExecutorService.run("light", ModelRegistry.predict, self.model_id, X)
+        except BaseException as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        start = 0
+        for X, future in batch:
+            if not future.done():
+                future.set_result(predictions[start:start + len(X)])
+            start += len(X)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "avg_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+        }
+
+
+class PredictionService:
+    batchers: Dict[str, PredictionBatcher] = {}
+
+    @staticmethod
+    async def predict(model_id: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate rows against the model's schema, then predict through its batcher"""
+        entry = await ExecutorService.run("light", ModelRegistry.load, model_id)
+        X = ModelRegistry.prepare_features(entry["metadata"], pd.DataFrame(rows))
+
+        # A batcher's futures belong to one event loop
+        batcher = PredictionService.batchers.get(model_id)
+        if batcher is None or batcher.loop is not asyncio.get_running_loop():
+            batcher = PredictionService.batchers[model_id] = PredictionBatcher(model_id)
+        predictions = await batcher.predict(X)
+        return {"model_id": model_id, "predictions": predictions}
+
+    @staticmethod
+    def forget(model_id: str) -> None:
+        PredictionService.batchers.pop(model_id, None)
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        return {model_id: batcher.stats() for model_id, batcher in PredictionService.batchers.items()}
@@ -0,0 +1,191 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+from sklearn.model_selection import train_test_split
+
+from config import (
+    CATEGORY_MAX_LEVELS,
+    CATEGORY_MIN_FREQUENCY,
+    IDENTIFIER_UNIQUE_RATIO,
+    ONEHOT_MAX_LEVELS,
+    RANDOM_STATE,
+    TEST_SIZE,
+)
+from services.cache_service import feature_cache
+
+MISSING_LEVEL = "__missing__"
+OTHER_LEVEL = "__other__"
+
+
+class PreparedFeatures:
+    """Encoded float32 feature matrix and target of one dataset, with the
+    preprocessing spec that produced it"""
+
+    def __init__(self, X: np.ndarray, y: np.ndarray, spec: Dict[str, Any], input_features: List[Dict[str, str]]):
+        self.X = X
+        self.y = y
+        self.spec = spec
+        self.input_features = input_features
+        self._split: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def target(self) -> str:
+        return self.spec["target"]
+
+    @property
+    def columns(self) -> List[str]:
+        return self.spec["columns"]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.X.nbytes + self.y.nbytes)
+
+    def split(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Train and test row positions, computed once per prepared matrix"""
+        if self._split is None:
+            self._split = tuple(train_test_split(np.arange(len(self.X)), test_size=TEST_SIZE, random_state=RANDOM_STATE))
+        return self._split
+
+
+class PreprocessingService:
+    """Turns raw columns into a compact numeric matrix.
+
+    Numeric and boolean columns keep their values with missing entries
+    filled by the training median. Text and categorical columns keep their
+    levels seen in at least CATEGORY_MIN_FREQUENCY of the rows; rarer and
+    unseen levels share one "other" level and missing values form their
+    own level. Up to ONEHOT_MAX_LEVELS levels are one-hot encoded, more are
+    encoded as ordinal codes. Identifier-like text columns and datetimes are
+    dropped. The spec is plain JSON so the model registry can store it and
+    apply the same transform to prediction rows.
+    """
+
+    @staticmethod
+    def category_keys(series: pd.Series) -> pd.Series:
+        """Values as strings, with missing values as their own level"""
+        return series.astype(str).where(series.notna(), MISSING_LEVEL)
+
+    @staticmethod
+    def fit_spec(df: pd.DataFrame, target_col: str, features: Optional[List[str]] = None,
+                 encoding: str = "auto") -> Dict[str, Any]:
+        """Preprocessing spec learned from ``df``, whose target is never missing"""
+        rows = len(df)
+        spec: Dict[str, Any] = {
+            "target": target_col,
+            "encoding": encoding,
+            "numeric": [],
+            "categorical": [],
+            "dropped": [],
+        }
+        categorical_columns: List[str] = []
+
+        for col in features or [col for col in df.columns if col != target_col]:
+            series = df[col]
+            if is_datetime64_any_dtype(series):
+                spec["dropped"].append({"name": col, "reason": "datetime"})
+            elif is_numeric_dtype(series):
+                values = series.astype(np.float64)
+                if values.isna().all():
+                    spec["dropped"].append({"name": col, "reason": "all values missing"})
+                    continue
+                spec["numeric"].append({"name": col, "fill": float(values.median())})
+            else:
+                counts = PreprocessingService.category_keys(series).value_counts()
+                if rows >= 20 and len(counts) > IDENTIFIER_UNIQUE_RATIO * rows:
+                    spec["dropped"].append({"name": col, "reason": f"identifier-like: {len(counts)} distinct values"})
+                    continue
+                levels = counts[counts >= max(1, CATEGORY_MIN_FREQUENCY * rows)].index[:CATEGORY_MAX_LEVELS].tolist()
+                other = len(levels) < len(counts)
+                kind = encoding
+                if kind == "auto":
+                    kind = "onehot" if len(levels) + other <= ONEHOT_MAX_LEVELS else "ordinal"
+                spec["categorical"].append({"name": col, "encoding": kind, "levels": levels, "other": other})
+                if kind == "onehot":
+                    categorical_columns.extend(f"{col}={level}" for level in levels + ([OTHER_LEVEL] if other else []))
+                else:
+                    categorical_columns.append(col)
+
+        # Matrix layout: numeric columns first, then the categorical encodings
+        spec["columns"] = [feature["name"] for feature in spec["numeric"]] + categorical_columns
+        if not spec["columns"]:
+            raise ValueError("No usable feature columns")
+        return spec
+
+    @staticmethod
+    def numeric_spec(features: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Pass-through spec for models trained before preprocessing existed:
+        numeric features only, with missing values rejected"""
+        names = [feature["name"] for feature in features]
+        return {
+            "numeric": [{"name": name, "fill": None} for name in names],
+            "categorical": [],
+            "columns": names,
+        }
+
+    @staticmethod
+    def transform(spec: Dict[str, Any], rows: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Encoded float32 matrix for ``rows`` and a mask of the rows that are
+        valid: rows with text in a numeric feature (or a missing value where
+        the spec has no fill) are not"""
+        n = len(rows)
+        X = np.empty((n, len(spec["columns"])), dtype=np.float32)
+        valid = np.ones(n, dtype=bool)
+        j = 0
+
+        for feature in spec["numeric"]:
+            raw = rows[feature["name"]]
+            values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            missing = np.isnan(values)
+            valid &= ~(missing & raw.notna().to_numpy())
+            if feature["fill"] is None:
+                valid &= ~missing
+                X[:, j] = values
+            else:
+                X[:, j] = np.where(missing, feature["fill"], values)
+            j += 1
+
+        for feature in spec["categorical"]:
+            keys = PreprocessingService.category_keys(rows[feature["name"]])
+            levels = feature["levels"]
+            codes = pd.Index(levels, dtype=object).get_indexer(keys).astype(np.int64)
+            if feature["encoding"] == "onehot":
+                width = len(levels) + feature["other"]
+                block = np.zeros((n, width), dtype=np.float32)
+                known = codes >= 0
+                block[np.flatnonzero(known), codes[known]] = 1
+                if feature["other"]:
+                    block[~known, width - 1] = 1
+                X[:, j:j + width] = block
+                j += width
+            else:
+                # Rare and unseen levels share the code after the last kept level
+                X[:, j] = np.where(codes >= 0, codes, len(levels))
+                j += 1
+
+        return X, valid
+
+    @staticmethod
+    def prepare(df: pd.DataFrame, target_col: str, features: Optional[List[str]] = None,
+                encoding: str = "auto") -> PreparedFeatures:
+        """Fit a spec on the rows with a target and encode them"""
+        if target_col not in df.columns:
+            raise ValueError(f"Column '{target_col}' not found")
+        features = [col for col in features or [] if col != target_col] or None
+        df = df[df[target_col].notna()]
+        spec = PreprocessingService.fit_spec(df, target_col, features, encoding)
+        X, _ = PreprocessingService.transform(spec, df)
+        used = [feature["name"] for feature in spec["numeric"] + spec["categorical"]]
+        input_features = [{"name": str(col), "dtype": str(df[col].dtype)} for col in used]
+        return PreparedFeatures(X, df[target_col].to_numpy(), spec, input_features)
+
+    @staticmethod
+    def get_prepared(df: pd.DataFrame, dataset_key: str, target_col: str,
+                     features: Optional[List[str]] = None, encoding: str = "auto") -> PreparedFeatures:
+        """Prepared features cached per (dataset, target, feature set, encoding),
+        so repeated trainings and leaderboard runs skip re-encoding"""
+        key = ("features", dataset_key, target_col, tuple(features) if features else None, encoding)
+        return feature_cache.get_or_load(
+            key, lambda: PreprocessingService.prepare(df, target_col, features, encoding)
+        )
@@ -0,0 +1,128 @@
+import pandas as pd
+import numpy as np
+from pandas.api.types import is_integer_dtype
+from typing import Any, Dict, Hashable, Optional
+
+from services.cache_service import result_cache
+
+TOP_VALUES = 100  # category counts kept per column; the most bars /eda/charts serves (top_k <= 100)
+
+
+def _native(value: Any, dtype: np.dtype) -> Any:
+    """Convert a float64 block value back to a Python scalar of the column's type"""
+    return int(value) if is_integer_dtype(dtype) else float(value)
+
+
+class ProfileService:
+    @staticmethod
+    def build_profile(df: pd.DataFrame) -> Dict[str, Any]:
+        """Compute every per-column statistic the EDA endpoints need.
+
+        Numeric columns are converted to one float64 block and sorted once
+        along the row axis; moments, quantiles, min/max, distinct counts,
+        modes, top values and IQR outliers are all derived from that block.
+        Non-numeric columns get one value_counts each.
+        """
+        numeric_df = df.select_dtypes(include=[np.number])
+        numeric_cols = numeric_df.columns.tolist()
+        values = numeric_df.to_numpy(dtype=np.float64, na_value=np.nan)
+
+        numeric: Dict[str, Dict[str, Any]] = {}
+        outliers: Dict[str, np.ndarray] = {}
+
+        if numeric_cols:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                valid = ~np.isnan(values)
+                counts = valid.sum(axis=0)
+                means = np.where(valid, values, 0.0).sum(axis=0) / counts
+                m2 = np.where(valid, values - means, 0.0)
+                m2 = (m2 * m2).sum(axis=0)
+                stds = np.sqrt(m2 / (counts - 1))
+
+                # NaN sorts last, so the first counts[j] rows of each column are its values
+                sorted_values = np.sort(values, axis=0)
+                quantiles = {}
+                for name, q in (("q25", 0.25), ("median", 0.5), ("q75", 0.75)):
+                    position = np.maximum(counts - 1, 0) * q
+                    lower = np.floor(position).astype(np.int64)
+                    upper = np.ceil(position).astype(np.int64)
+                    lower_values = np.take_along_axis(sorted_values, lower[None, :], axis=0)[0]
+                    upper_values = np.take_along_axis(sorted_values, upper[None, :], axis=0)[0]
+                    quantiles[name] = np.where(
+                        counts > 0, lower_values + (upper_values - lower_values) * (position - lower), np.nan
+                    )
+
+                last = np.maximum(counts - 1, 0)
+                mins = np.where(counts > 0, sorted_values[0], np.nan)
+                maxs = np.where(counts > 0, np.take_along_axis(sorted_values, last[None, :], axis=0)[0], np.nan)
+
+                iqr = quantiles["q75"] - quantiles["q25"]
+                lower_bounds = quantiles["q25"] - 1.5 * iqr
+                upper_bounds = quantiles["q75"] + 1.5 * iqr
+                outlier_mask = (values < lower_bounds) | (values > upper_bounds)
+
+            for j, col in enumerate(numeric_cols):
+                dtype = numeric_df.dtypes.iloc[j]
+                column_values = sorted_values[:counts[j], j]
+                if len(column_values):
+                    starts = np.flatnonzero(np.r_[True, column_values[1:] != column_values[:-1]])
+                    run_counts = np.diff(np.r_[starts, len(column_values)])
+                    order = np.argsort(-run_counts, kind="stable")[:TOP_VALUES]
+                    top_values = [(_native(column_values[starts[i]], dtype), int(run_counts[i])) for i in order]
+                else:
+                    starts = column_values
+                    top_values = []
+
+                numeric[col] = {
+                    "count": int(counts[j]),
+                    "mean": float(means[j]),
+                    "std": float(stds[j]),
+                    "min": float(mins[j]),
+                    "q25": float(quantiles["q25"][j]),
+                    "median": float(quantiles["median"][j]),
+                    "q75": float(quantiles["q75"][j]),
+                    "max": float(maxs[j]),
+                    "distinct": int(len(starts)),
+                    "mode": top_values[0][0] if top_values else None,
+                    "top_values": top_values,
+                    "iqr_lower": float(lower_bounds[j]),
+                    "iqr_upper": float(upper_bounds[j]),
+                }
+                outliers[col] = np.flatnonzero(outlier_mask[:, j])
+
+        categorical: Dict[str, Dict[str, Any]] = {}
+        for col in df.columns:
+            if col in numeric:
+                continue
+            value_counts = df[col].value_counts()
+            mode = None
+            if len(value_counts):
+                modes = value_counts.index[value_counts == value_counts.iloc[0]]
+                try:
+                    mode = min(modes)
+                except TypeError:
+                    mode = modes[0]
+            categorical[col] = {
+                "unique": int(len(value_counts)),
+                "mode": str(mode) if mode is not None else None,
+                "top_values": [(str(value), int(count)) for value, count in value_counts.head(TOP_VALUES).items()],
+            }
+
+        return {
+            "row_count": len(df),
+            "column_count": len(df.columns),
+            "memory_bytes": int(df.memory_usage(deep=True).sum()),
+            "missing_values": {col: int(n) for col, n in df.isnull().sum().items()},
+            "data_types": df.dtypes.astype(str).to_dict(),
+            "numeric": numeric,
+            "categorical": categorical,
+            "outlier_positions": outliers,
+            "index": df.index,
+        }
+
+    @staticmethod
+    def get_profile(df: pd.DataFrame, dataset_key: Optional[Hashable] = None) -> Dict[str, Any]:
+        """Profile a dataset, reusing the cached profile when a dataset key is given"""
+        if dataset_key is None:
+            return ProfileService.build_profile(df)
+        return result_cache.get_or_load(("profile", dataset_key), lambda: ProfileService.build_profile(df))
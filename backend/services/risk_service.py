@@ -1,47 +1,106 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from typing import Dict, Any, List
+from typing import Dict, Any, Hashable, Optional
+from services.anomaly_service import TOP_ANOMALIES, AnomalyDetectorService
+from services.cache_service import result_cache
+from services.index_set import IndexSet, fetch_rows, page_order
 
 class RiskService:
     @staticmethod
-    def detect_anomalies(df: pd.DataFrame, contamination: float = 0.1) -> Dict[str, Any]:
-        """Detect anomalies using Isolation Forest"""
-        numeric_df = df.select_dtypes(include=[np.number])
+    def score_anomalies(df: pd.DataFrame, contamination: float = 0.1) -> Optional[Dict[str, np.ndarray]]:
+        """Isolation Forest scores for every row (higher is more anomalous)
+        and the sorted positions of the rows flagged as anomalies, from a
+        detector fitted on ``df`` and not kept"""
+        fitted = AnomalyDetectorService.fit_detector(df, contamination)
+        if fitted is None:
+            return None
         
-        if numeric_df.empty:
-            return {"anomalies": [], "risk_score": 0, "summary": "No numeric columns found"}
-        
-        # Handle missing values
-        numeric_df = numeric_df.fillna(numeric_df.mean())
+        return {
+            "scores": fitted["scores"],
+            "positions": np.flatnonzero(fitted["scores"] > -fitted["detector"].offset_)
+        }
+    
+    @staticmethod
+    def get_anomaly_scores(
+        df: pd.DataFrame,
+        contamination: float = 0.1,
+        dataset_key: Optional[Hashable] = None
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Anomaly scores, from the dataset's persisted detector and cached per
+        dataset and contamination when a key is given"""
+        if dataset_key is None:
+            return RiskService.score_anomalies(df, contamination)
+        return result_cache.get_or_load(
+            ("anomaly_scores", dataset_key, contamination),
+            lambda: AnomalyDetectorService.get_scores(df, dataset_key, contamination)
+        )
+    
+    @staticmethod
+    def detect_anomalies(
+        df: pd.DataFrame,
+        contamination: float = 0.1,
+        dataset_key: Optional[Hashable] = None
+    ) -> Dict[str, Any]:
+        """Detect anomalies using Isolation Forest.
         
-        # Train model
-        iso_forest = IsolationForest(contamination=contamination, random_state=42)
-        predictions = iso_forest.fit_predict(numeric_df)
+        Returns the most anomalous rows, counts and the full anomaly set as a
+        compact IndexSet encoding; further rows are paged with get_anomaly_rows.
+        """
+        scored = RiskService.get_anomaly_scores(df, contamination, dataset_key)
         
-        # Get anomaly indices
-        anomaly_indices = np.where(predictions == -1)[0]
+        if scored is None:
+            return {"anomalies": [], "risk_score": 0, "summary": "No numeric columns found"}
         
-        anomalies = []
-        for idx in anomaly_indices[:10]:  # Limit to 10
-            anomaly_row = df.iloc[idx].to_dict()
-            anomaly_row['row_index'] = int(idx)
-            anomalies.append(anomaly_row)
+        positions = scored["positions"]
+        anomaly_scores = scored["scores"][positions]
+        top = positions[page_order(anomaly_scores, 1, TOP_ANOMALIES)]
         
-        risk_score = len(anomaly_indices) / len(df) * 100  # Percentage
+        risk_score = len(positions) / len(df) * 100  # Percentage
         
         return {
-            "anomalies": anomalies,
-            "total_anomalies": len(anomaly_indices),
+            "anomalies": fetch_rows(df, top, {"anomaly_score": scored["scores"][top]}),
+            "total_anomalies": int(len(positions)),
             "risk_score": float(risk_score),
-            "summary": f"Detected {len(anomaly_indices)} anomalies ({risk_score:.1f}% of data)"
+            "score_threshold": float(anomaly_scores.min()) if len(positions) else None,
+            "anomaly_rows": IndexSet(positions, len(df)).encode(),
+            "summary": f"Detected {len(positions)} anomalies ({risk_score:.1f}% of data)"
         }
     
     @staticmethod
-    def get_data_quality_score(df: pd.DataFrame) -> float:
-        """Calculate data quality score (0-100)"""
-        total_cells = df.shape[0] * df.shape[1]
-        null_cells = df.isnull().sum().sum()
+    def get_anomaly_rows(
+        df: pd.DataFrame,
+        contamination: float = 0.1,
+        dataset_key: Optional[Hashable] = None,
+        page: int = 1,
+        page_size: int = 50,
+        sort: str = "score",
+        orient: str = "records"
+    ) -> Dict[str, Any]:
+        """One page of anomalous rows, highest anomaly score first or in row order"""
+        scored = RiskService.get_anomaly_scores(df, contamination, dataset_key)
+        if scored is None:
+            scored = {"scores": np.zeros(len(df)), "positions": np.empty(0, dtype=np.int64)}
+        positions = scored["positions"]
+        
+        if sort == "score":
+            selected = positions[page_order(scored["scores"][positions], page, page_size)]
+        else:
+            selected = positions[(page - 1) * page_size:page * page_size]
         
+        return {
+            "total": int(len(positions)),
+            "page": page,
+            "page_size": page_size,
+            "rows": fetch_rows(df, selected, {"anomaly_score": scored["scores"][selected]}, orient)
+        }
+    
+    @staticmethod
+    def quality_score(total_cells: int, null_cells: int) -> float:
+        """Share of non-null cells (0-100)"""
         quality_score = ((total_cells - null_cells) / total_cells * 100) if total_cells > 0 else 0
         return float(quality_score)
+
+    @staticmethod
+    def get_data_quality_score(df: pd.DataFrame) -> float:
+        """Calculate data quality score (0-100)"""
+        return RiskService.quality_score(df.shape[0] * df.shape[1], int(df.isnull().sum().sum()))
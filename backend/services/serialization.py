@@ -0,0 +1,113 @@
+import functools
+import inspect
+import json
+import math
+import pandas as pd
+import numpy as np
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+from fastapi.routing import APIRoute
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types the encoder does not handle natively"""
+    if value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, pd.Timedelta):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (np.ndarray, pd.Series, pd.Index)):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _finite(value: Any) -> Any:
+    """NaN and infinities as null, for the stdlib json fallback"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, (np.ndarray, np.generic, pd.Series, pd.Index)):
+        return _finite(_default(value))
+    return value
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize numpy arrays and scalars, pandas timestamps and datetimes
+    directly; NaN and infinities become null"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(_finite(content), default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class FastJSONRoute(APIRoute):
+    """Route whose plain return values go straight to FastJSONResponse.
+
+    FastAPI otherwise runs every untyped return value through
+    jsonable_encoder, which walks the whole payload in Python and rejects
+    numpy scalars. Routes with an explicit response_model keep FastAPI's
+    validation path.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        response_model = kwargs.get("response_model")
+        if (response_model is None or isinstance(response_model, DefaultPlaceholder)) and inspect.iscoroutinefunction(endpoint):
+            endpoint = self._direct(endpoint, kwargs.get("status_code"))
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _direct(endpoint: Callable[..., Any], status_code: Any) -> Callable[..., Any]:
+        @functools.wraps(endpoint)
+        async def direct(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+            return FastJSONResponse(result, status_code=status_code or 200)
+        return direct
+
+
+def split_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Column-oriented form of a list of records: {"columns": [...], "data": [[...], ...]}"""
+    columns = list(dict.fromkeys(key for record in records for key in record))
+    return {"columns": columns, "data": [[record.get(col) for col in columns] for record in records]}
+
+
+def split_matrix(matrix: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Column-oriented form of a nested {row: {column: value}} mapping"""
+    index = list(matrix)
+    columns = list(dict.fromkeys(col for row in matrix.values() for col in row))
+    return {"index": index, "columns": columns, "data": [[matrix[row].get(col) for col in columns] for row in index]}
@@ -0,0 +1,280 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class Moments:
+    """Count, mean, M2, min and max with Welford/Chan merging (exact)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold in a batch of non-null float values"""
+        if len(values) == 0:
+            return
+        batch = Moments()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other: "Moments") -> None:
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+
+class KLLSketch:
+    """KLL quantile sketch.
+
+    Keeps O(k log(n/k)) items in levels whose items carry weight 2**level.
+    With k=200 the normalized rank error of a quantile query is about 1.65%
+    with 99% confidence, independent of the stream length.
+    """
+
+    RANK_ERROR_AT_200 = 0.0165
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def rank_error(self) -> float:
+        return self.RANK_ERROR_AT_200 * 200 / self.k
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold in a batch of non-null float values"""
+        if len(values) == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for height, items in enumerate(other.levels):
+            self.levels[height] = np.concatenate([self.levels[height], items])
+        self.n += other.n
+        self._compress()
+
+    def _capacity(self, height: int) -> int:
+        depth = len(self.levels) - height - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self) -> None:
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            for height, items in enumerate(self.levels):
+                if len(items) < self._capacity(height):
+                    continue
+                if height + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items = np.sort(items)
+                keep = items[:0]
+                if len(items) % 2:
+                    keep, items = items[-1:], items[:-1]
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[height] = keep
+                self.levels[height + 1] = np.concatenate([self.levels[height + 1], promoted])
+                break
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        if self.n == 0:
+            return [math.nan for _ in qs]
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        targets = np.asarray(qs) * cumulative[-1]
+        positions = np.minimum(np.searchsorted(cumulative, targets, side="left"), len(items) - 1)
+        return [float(items[p]) for p in positions]
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit value hashes.
+
+    With precision p the relative standard error is 1.04 / sqrt(2**p),
+    about 1.6% at the default p=12.
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold in a batch of non-null values (numeric or object)"""
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_array(values)
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << bits) - 1)
+
+        leading_zeros = np.full(len(remainder), bits, dtype=np.int64)
+        nonzero = remainder > 0
+        leading_zeros[nonzero] = bits - 1 - np.floor(np.log2(remainder[nonzero].astype(np.float64))).astype(np.int64)
+        np.maximum.at(self.registers, index, (leading_zeros + 1).astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class FrequentItems:
+    """Misra-Gries heavy hitters.
+
+    Reported counts underestimate true counts by at most ``error``, which
+    never exceeds n / (capacity + 1).
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counts: Dict[Any, int] = {}
+        self.n = 0
+        self.error = 0
+
+    def update(self, values: pd.Series) -> None:
+        """Fold in a batch of non-null values"""
+        batch = FrequentItems(self.capacity)
+        batch.counts = {key: int(count) for key, count in values.value_counts().items()}
+        batch.n = len(values)
+        batch._trim()
+        self.merge(batch)
+
+    def merge(self, other: "FrequentItems") -> None:
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.n += other.n
+        self.error += other.error
+        self._trim()
+
+    def _trim(self) -> None:
+        if len(self.counts) <= self.capacity:
+            return
+        ordered = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        cutoff = ordered[self.capacity][1]
+        self.counts = {key: count - cutoff for key, count in ordered[:self.capacity] if count > cutoff}
+        self.error += cutoff
+
+    def top(self, k: int) -> List[Tuple[Any, int]]:
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+class FixedWidthHistogram:
+    """Exact histogram on a grid of bins [origin + i * width, origin + (i + 1) * width).
+
+    Values outside the current bins extend the grid rather than moving its
+    edges, so batches always line up and merge by adding counts. When the
+    grid would span more than ``max_bins`` bins, adjacent pairs are combined
+    and the width doubles; the counts stay exact.
+    """
+
+    def __init__(self, origin: float, width: float, max_bins: int):
+        self.origin = origin
+        self.width = width
+        self.max_bins = max_bins
+        self.start = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    @property
+    def n(self) -> int:
+        return int(self.counts.sum())
+
+    def update(self, values: np.ndarray) -> None:
+        """Fold in a batch of non-null float values"""
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        index = np.floor((values - self.origin) / self.width).astype(np.int64)
+        self._add(index, np.ones(len(index), dtype=np.int64))
+
+    def merge(self, other: "FixedWidthHistogram") -> None:
+        """Add the counts of a histogram with the same origin whose width is
+        this width times a power of two (or the other way round)"""
+        shift = int(round(math.log2(other.width / self.width)))
+        if shift > 0:
+            self._rescale(shift)
+        index = (other.start + np.arange(len(other.counts))) >> max(-shift, 0)
+        self._add(index, other.counts)
+
+    def _rescale(self, shift: int) -> None:
+        if len(self.counts):
+            self._add(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), shift)
+        else:
+            self.width *= 2 ** shift
+
+    def _add(self, index: np.ndarray, weights: np.ndarray, shift: int = 0) -> None:
+        if len(self.counts):
+            index = np.concatenate([np.arange(self.start, self.start + len(self.counts)) >> shift, index])
+            weights = np.concatenate([self.counts, weights])
+            self.width *= 2 ** shift
+        low, high = int(index.min()), int(index.max())
+
+        # Floor division by 2**k keeps bin i inside the doubled bin i // 2
+        doublings = 0
+        while (high >> doublings) - (low >> doublings) + 1 > self.max_bins:
+            doublings += 1
+        if doublings:
+            index = index >> doublings
+            low >>= doublings
+            self.width *= 2 ** doublings
+
+        self.start = low
+        self.counts = np.bincount(index - low, weights=weights).astype(np.int64)
+
+    def coarsened(self, max_bins: int) -> "FixedWidthHistogram":
+        """Copy with adjacent bins combined until at most ``max_bins`` remain"""
+        copy = FixedWidthHistogram(self.origin, self.width, max(int(max_bins), 1))
+        copy.merge(self)
+        return copy
+
+    def bins(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Edges and counts of the bins between the first and last non-empty one"""
+        filled = np.flatnonzero(self.counts)
+        if len(filled) == 0:
+            return np.array([self.origin, self.origin + self.width]), np.zeros(1, dtype=np.int64)
+        counts = self.counts[filled[0]:filled[-1] + 1]
+        first = self.start + filled[0]
+        edges = self.origin + self.width * (first + np.arange(len(counts) + 1))
+        return edges, counts
@@ -0,0 +1,344 @@
+import copy
+import os
+import joblib
+import pandas as pd
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import (
+    CHART_MAX_BINS,
+    CHART_TOP_K,
+    HISTOGRAM_GRID_MAX_BINS,
+    RANDOM_STATE,
+    SKETCH_HLL_PRECISION,
+    SKETCH_KLL_K,
+    SKETCH_TOP_K_CAPACITY,
+    STREAMING_EDA_CHUNK_ROWS,
+    STREAMING_EDA_WORKERS,
+)
+from services.cache_service import result_cache
+from services.file_service import FileService, merge_dtype
+from services.chart_service import ChartService
+from services.risk_service import RiskService
+from services.sketch_service import FixedWidthHistogram, FrequentItems, HyperLogLog, KLLSketch, Moments
+
+
+class ColumnSketch:
+    """Mergeable accumulators for one column"""
+
+    def __init__(self, numeric: bool):
+        self.numeric = numeric
+        self.dtype: Optional[np.dtype] = None
+        self.nulls = 0
+        self.moments = Moments() if numeric else None
+        self.quantiles = KLLSketch(SKETCH_KLL_K, seed=RANDOM_STATE) if numeric else None
+        self.distinct = HyperLogLog(SKETCH_HLL_PRECISION)
+        self.frequent = FrequentItems(SKETCH_TOP_K_CAPACITY)
+
+    def update(self, series: pd.Series) -> None:
+        null_mask = series.isna()
+        null_count = int(null_mask.sum())
+        if null_count < len(series) or self.dtype is None:
+            self.dtype = merge_dtype(self.dtype, series.dtype)
+        self.nulls += null_count
+        values = series[~null_mask]
+
+        if self.numeric:
+            numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+            numbers = numbers[~np.isnan(numbers)]
+            self.moments.update(numbers)
+            self.quantiles.update(numbers)
+            self.distinct.update(numbers)
+        else:
+            self.distinct.update(values.astype(str).to_numpy(dtype=object))
+        self.frequent.update(values)
+
+    def merge(self, other: "ColumnSketch") -> None:
+        self.dtype = other.dtype if self.dtype is None else merge_dtype(self.dtype, other.dtype)
+        self.nulls += other.nulls
+        if self.numeric:
+            self.moments.merge(other.moments)
+            self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+
+
+class StreamingProfile:
+    """Dataset profile built from chunks; partial profiles merge associatively"""
+
+    def __init__(self, columns: Sequence[str], numeric_columns: Sequence[str]):
+        self.rows = 0
+        self.memory_bytes = 0
+        self.columns: Dict[str, ColumnSketch] = {
+            col: ColumnSketch(col in numeric_columns) for col in columns
+        }
+
+    @staticmethod
+    def from_chunk(chunk: pd.DataFrame, numeric_columns: Sequence[str]) -> "StreamingProfile":
+        profile = StreamingProfile(chunk.columns.tolist(), numeric_columns)
+        profile.rows = len(chunk)
+        profile.memory_bytes = int(chunk.memory_usage(deep=True).sum())
+        for col, sketch in profile.columns.items():
+            sketch.update(chunk[col])
+        return profile
+
+    def merge(self, other: "StreamingProfile") -> None:
+        self.rows += other.rows
+        self.memory_bytes += other.memory_bytes
+        for col, sketch in other.columns.items():
+            self.columns[col].merge(sketch)
+
+
+class DatasetAggregates:
+    """Streaming profile and fixed-width histograms of one dataset version.
+
+    Both are mergeable, so the aggregates of a version are its parent's
+    with the appended rows folded in; the parent's rows are never read
+    again.
+    """
+
+    def __init__(self, profile: StreamingProfile, histograms: Dict[str, FixedWidthHistogram]):
+        self.profile = profile
+        self.histograms = histograms
+
+    def extend(self, rows: pd.DataFrame) -> "DatasetAggregates":
+        """New aggregates with ``rows`` appended; this one is left as is"""
+        extended = copy.deepcopy(self)
+        numeric_columns = [col for col, sketch in self.profile.columns.items() if sketch.numeric]
+        extended.profile.merge(StreamingProfile.from_chunk(rows[list(self.profile.columns)], numeric_columns))
+        StreamingEDAService.update_histograms(extended.histograms, rows)
+        return extended
+
+
+class StreamingEDAService:
+    @staticmethod
+    def profile_chunks(chunks, workers: int = STREAMING_EDA_WORKERS) -> StreamingProfile:
+        """Profile an iterator of DataFrames with flat memory use.
+
+        Column kinds are fixed by the first chunk; later values that do not
+        parse as numbers in a numeric column are ignored. Chunks are
+        profiled in parallel with at most 2 * workers in flight, then merged
+        in order so the result is deterministic.
+        """
+        chunks = iter(chunks)
+        first = next(chunks, None)
+        if first is None:
+            return StreamingProfile([], [])
+
+        numeric_columns = first.select_dtypes(include=[np.number]).columns.tolist()
+        profile = StreamingProfile.from_chunk(first, numeric_columns)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="streaming-eda") as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(StreamingProfile.from_chunk, chunk, numeric_columns))
+                if len(pending) >= 2 * workers:
+                    profile.merge(pending.popleft().result())
+            while pending:
+                profile.merge(pending.popleft().result())
+
+        return profile
+
+    @staticmethod
+    def get_profile(file_id: str, filename: str) -> StreamingProfile:
+        """Streaming profile of an upload, cached per file_id; appended
+        versions take theirs from the delta-maintained aggregates"""
+        if FileService.split_version(file_id)[1] > 1:
+            return StreamingEDAService.get_aggregates(file_id, filename).profile
+        return result_cache.get_or_load(
+            ("stream_profile", file_id),
+            lambda: StreamingEDAService.profile_chunks(
+                FileService.iter_chunks(file_id, filename, STREAMING_EDA_CHUNK_ROWS)
+            )
+        )
+
+    @staticmethod
+    def new_histograms(profile: StreamingProfile) -> Dict[str, FixedWidthHistogram]:
+        """Empty histograms for the numeric columns of a profile, on grids
+        with the Freedman-Diaconis width of the profiled data"""
+        histograms = {}
+        for col, sketch in profile.columns.items():
+            if not sketch.numeric or sketch.moments.count == 0:
+                continue
+            low, high = sketch.moments.min, sketch.moments.max
+            q25, q75 = sketch.quantiles.quantiles([0.25, 0.5, 0.75])[::2]
+            bins = ChartService.histogram_bins(
+                sketch.moments.count, sketch.distinct.estimate(), q25, q75, low, high, None
+            )
+            # A hair wider than (high - low) / bins so the maximum lands in the last bin
+            width = (high - low) / bins * (1 + 1e-9) if high > low else 1.0
+            histograms[col] = FixedWidthHistogram(float(low), float(width), HISTOGRAM_GRID_MAX_BINS)
+        return histograms
+
+    @staticmethod
+    def update_histograms(histograms: Dict[str, FixedWidthHistogram], rows: pd.DataFrame) -> None:
+        for col, histogram in histograms.items():
+            values = pd.to_numeric(rows[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            histogram.update(values[~np.isnan(values)])
+
+    @staticmethod
+    def build_aggregates(file_id: str, filename: str) -> DatasetAggregates:
+        """Aggregates of a dataset from its streaming profile and one more
+        pass over its chunks to fill the histograms"""
+        profile = StreamingEDAService.get_profile(file_id, filename)
+        histograms = StreamingEDAService.new_histograms(profile)
+        if histograms:
+            for chunk in FileService.iter_chunks(file_id, filename, STREAMING_EDA_CHUNK_ROWS, list(histograms)):
+                StreamingEDAService.update_histograms(histograms, chunk)
+        return DatasetAggregates(profile, histograms)
+
+    @staticmethod
+    def save_aggregates(key: str, aggregates: DatasetAggregates) -> None:
+        path = FileService.aggregates_path(key)
+        tmp_path = f"{path}.tmp"
+        joblib.dump(aggregates, tmp_path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def get_aggregates(file_id: str, filename: str) -> DatasetAggregates:
+        """Aggregates of a dataset version, cached per key.
+
+        Appended versions persist theirs next to their segment; when that
+        file is missing they are rebuilt from the parent's aggregates and
+        the segment alone. Original uploads are profiled in full once.
+        """
+        def load() -> DatasetAggregates:
+            base_id, version = FileService.split_version(file_id)
+            if version == 1:
+                return StreamingEDAService.build_aggregates(file_id, filename)
+
+            path = FileService.aggregates_path(file_id)
+            if os.path.exists(path):
+                return joblib.load(path)
+            parent = StreamingEDAService.get_aggregates(FileService.version_key(base_id, version - 1), filename)
+            aggregates = parent.extend(pd.read_parquet(FileService.segment_path(file_id)))
+            StreamingEDAService.save_aggregates(file_id, aggregates)
+            return aggregates
+
+        return result_cache.get_or_load(("aggregates", file_id), load)
+
+    @staticmethod
+    def get_histograms(aggregates: DatasetAggregates, bins: Optional[int] = None) -> List[dict]:
+        """Exact histograms from the aggregates, in the format of
+        ChartService.histograms; adjacent bins are combined down to
+        ``bins``, or CHART_MAX_BINS"""
+        charts = []
+        for col, histogram in aggregates.histograms.items():
+            edges, counts = histogram.coarsened(bins or CHART_MAX_BINS).bins()
+            charts.append({
+                "name": col,
+                "type": "histogram",
+                "data": pd.DataFrame({"bin_start": edges[:-1], "bin_end": edges[1:], "count": counts})
+            })
+        return charts
+
+    @staticmethod
+    def get_bars(profile: StreamingProfile, top_k: int = CHART_TOP_K) -> List[dict]:
+        """Top-k category bars from the Misra-Gries counters; counts may
+        undercount by the column's mode_count_error"""
+        charts = []
+        for col, sketch in profile.columns.items():
+            if sketch.numeric:
+                continue
+            top = sketch.frequent.top(top_k)
+            labels = [str(label) for label, _ in top]
+            counts = [count for _, count in top]
+            other = profile.rows - sketch.nulls - sum(counts)
+            if other > 0:
+                labels.append("Other")
+                counts.append(int(other))
+            charts.append({
+                "name": col,
+                "type": "bar",
+                "data": pd.DataFrame({"label": pd.Series(labels, dtype=object), "count": pd.Series(counts, dtype=np.int64)})
+            })
+        return charts
+
+    @staticmethod
+    def get_quality_score(profile: StreamingProfile) -> float:
+        """Data quality score from the profile's null counts, which are exact"""
+        return RiskService.quality_score(
+            profile.rows * len(profile.columns), sum(sketch.nulls for sketch in profile.columns.values())
+        )
+
+    @staticmethod
+    def _error_bounds(sketch: ColumnSketch) -> Dict[str, Any]:
+        bounds = {
+            "unique_relative_error": sketch.distinct.relative_error,
+            "mode_count_error": sketch.frequent.error,
+        }
+        if sketch.numeric:
+            bounds["quantile_rank_error"] = sketch.quantiles.rank_error
+        return bounds
+
+    @staticmethod
+    def get_summary(profile: StreamingProfile) -> dict:
+        """Streaming counterpart of EDAService.get_summary.
+
+        Counts, mean, std, min and max are exact; quantiles come from KLL
+        sketches and carry the rank error reported in ``error_bounds``.
+        """
+        numeric_summary = {}
+        for col, sketch in profile.columns.items():
+            if not sketch.numeric:
+                continue
+            q25, q50, q75 = sketch.quantiles.quantiles([0.25, 0.5, 0.75])
+            numeric_summary[col] = {
+                "count": float(sketch.moments.count),
+                "mean": sketch.moments.mean if sketch.moments.count else float("nan"),
+                "std": sketch.moments.std,
+                "min": sketch.moments.min if sketch.moments.count else float("nan"),
+                "25%": q25,
+                "50%": q50,
+                "75%": q75,
+                "max": sketch.moments.max if sketch.moments.count else float("nan")
+            }
+
+        return {
+            "row_count": profile.rows,
+            "column_count": len(profile.columns),
+            "memory_usage": f"{profile.memory_bytes / 1024**2:.2f} MB",
+            "missing_values": {col: sketch.nulls for col, sketch in profile.columns.items()},
+            "data_types": {col: str(sketch.dtype) for col, sketch in profile.columns.items()},
+            "numeric_summary": numeric_summary,
+            "mode": "stream",
+            "error_bounds": {
+                "quantile_rank_error": KLLSketch(SKETCH_KLL_K).rank_error
+            }
+        }
+
+    @staticmethod
+    def get_column_stats(profile: StreamingProfile) -> Dict[str, Any]:
+        """Streaming counterpart of EDAService.get_column_stats.
+
+        Distinct counts are HyperLogLog estimates and modes come from
+        Misra-Gries counters; each column reports its own error bounds. The
+        stats are wrapped as ``{"mode": "stream", "result": ...}``, like
+        approximate answers, since a column may be named "mode".
+        """
+        stats = {}
+        for col, sketch in profile.columns.items():
+            if sketch.numeric:
+                q25, q50, q75 = sketch.quantiles.quantiles([0.25, 0.5, 0.75])
+                stats[col] = {
+                    "type": "numeric",
+                    "mean": sketch.moments.mean,
+                    "median": q50,
+                    "std": sketch.moments.std,
+                    "min": sketch.moments.min,
+                    "max": sketch.moments.max,
+                    "q25": q25,
+                    "q75": q75,
+                    "error_bounds": StreamingEDAService._error_bounds(sketch)
+                }
+            else:
+                top = sketch.frequent.top(1)
+                stats[col] = {
+                    "type": "categorical",
+                    "unique": sketch.distinct.estimate(),
+                    "mode": str(top[0][0]) if top else None,
+                    "error_bounds": StreamingEDAService._error_bounds(sketch)
+                }
+        return {"mode": "stream", "result": stats}
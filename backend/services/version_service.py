@@ -0,0 +1,153 @@
+import hashlib
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from services.cache_service import result_cache
+from services.file_service import FileService, merge_dtype
+from services.streaming_eda_service import StreamingEDAService
+
+
+class DatasetVersionService:
+    """Append-only versions of an upload.
+
+    The original upload is version 1. Each append stores its rows as a
+    Parquet segment and writes metadata for the new version under the key
+    ``<file_id>@v<n>``: row count, schema, a sha256 chained from the
+    parent's and the rows appended. Versions are never rewritten, so every
+    key keeps addressing the same rows, and caches keyed by dataset key or
+    fingerprint stay valid per version.
+
+    The streaming profile and histograms of a version are its parent's with
+    the appended rows merged in, so null counts, moments, sketches and
+    histograms cost a pass over the new rows only.
+    """
+
+    _locks: Dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    @staticmethod
+    def _lock(file_id: str) -> threading.Lock:
+        with DatasetVersionService._locks_guard:
+            return DatasetVersionService._locks.setdefault(file_id, threading.Lock())
+
+    @staticmethod
+    def parse_batch(path: str, filename: str) -> pd.DataFrame:
+        if filename.endswith(".csv"):
+            return pd.read_csv(path)
+        if filename.endswith(".xlsx"):
+            return pd.read_excel(path)
+        raise ValueError(f"Unsupported file format: {filename}")
+
+    @staticmethod
+    def check_schema(metadata: Dict[str, Any], batch: pd.DataFrame) -> pd.DataFrame:
+        """``batch`` with its columns in the dataset's order; raises
+        ValueError when columns are missing or unknown"""
+        columns = metadata["column_names"]
+        missing = [col for col in columns if col not in batch.columns]
+        unknown = [str(col) for col in batch.columns if col not in columns]
+        if missing or unknown:
+            problems = []
+            if missing:
+                problems.append(f"missing columns: {', '.join(missing)}")
+            if unknown:
+                problems.append(f"unknown columns: {', '.join(unknown)}")
+            raise ValueError(f"Batch does not match the dataset schema ({'; '.join(problems)})")
+        if batch.empty:
+            raise ValueError("Batch has no rows")
+        return batch[columns]
+
+    @staticmethod
+    def merged_dtypes(dtypes: Dict[str, str], batch: pd.DataFrame) -> Dict[str, str]:
+        merged = {}
+        for col, name in dtypes.items():
+            if batch[col].isna().all():
+                merged[col] = name
+                continue
+            try:
+                current = pd.api.types.pandas_dtype(name)
+            except TypeError:
+                current = None
+            merged[col] = str(merge_dtype(current, batch[col].dtype))
+        return merged
+
+    @staticmethod
+    def append(file_id: str, filename: str, batch: pd.DataFrame) -> Dict[str, Any]:
+        """Append ``batch`` as a new version of an upload and return the
+        version's metadata"""
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is required to store dataset versions")
+
+        base_id, _ = FileService.split_version(file_id)
+        with DatasetVersionService._lock(base_id):
+            base = FileService.read_metadata(base_id)
+            if base is None:
+                raise ValueError(f"No metadata for upload {base_id}; only uploads with metadata can be versioned")
+            version = base.get("latest_version", 1) + 1
+            parent_key = FileService.version_key(base_id, version - 1)
+            parent = FileService.read_metadata(parent_key)
+            batch = DatasetVersionService.check_schema(parent, batch)
+
+            key = FileService.version_key(base_id, version)
+            path = FileService.segment_path(key)
+            tmp_path = f"{path}.tmp"
+            try:
+                batch.to_parquet(tmp_path, engine="pyarrow", index=False)
+            except Exception as e:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise ValueError(f"Batch cannot be stored as a segment: {e}")
+            with open(tmp_path, "rb") as f:
+                segment_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+            # The parent's aggregates plus the new rows; nothing older is reread
+            aggregates = StreamingEDAService.get_aggregates(parent_key, filename).extend(batch)
+            os.replace(tmp_path, path)
+            StreamingEDAService.save_aggregates(key, aggregates)
+            result_cache.put(("aggregates", key), aggregates)
+
+            metadata = {
+                **parent,
+                "id": key,
+                "version": version,
+                "parent": parent_key,
+                "rows": parent["rows"] + len(batch),
+                "appended_rows": len(batch),
+                "dtypes": DatasetVersionService.merged_dtypes(parent["dtypes"], batch),
+                "size": parent["size"] + os.path.getsize(path),
+                "sha256": hashlib.sha256(f"{parent['sha256']}:{segment_sha256}".encode("utf-8")).hexdigest(),
+                "upload_time": datetime.now().isoformat(),
+            }
+            metadata.pop("latest_version", None)
+            FileService.write_metadata(key, metadata)
+            FileService.write_metadata(base_id, {**base, "latest_version": version})
+            return metadata
+
+    @staticmethod
+    def list_versions(file_id: str) -> List[Dict[str, Any]]:
+        """Metadata of every version of an upload, oldest first"""
+        base_id, _ = FileService.split_version(file_id)
+        base = FileService.read_metadata(base_id)
+        if base is None:
+            raise ValueError(f"No metadata for upload {base_id}")
+        versions = []
+        for version in range(1, base.get("latest_version", 1) + 1):
+            metadata = FileService.read_metadata(FileService.version_key(base_id, version))
+            metadata.pop("latest_version", None)
+            versions.append({
+                "version": version,
+                "parent": None,
+                "appended_rows": metadata["rows"],
+                **metadata,
+                "id": FileService.version_key(base_id, version),
+            })
+        return versions
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the backend modules the way main.py does, from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import HEAVY_POOL_WORKERS, HEAVY_TASK_TIMEOUT, LIGHT_POOL_WORKERS, LIGHT_TASK_TIMEOUT, UPLOAD_DIR  # noqa: E402
+from services.executor_service import ExecutorService, WorkerPool  # noqa: E402
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory, so uploads, models and detectors (stored
+    under relative paths) are written there"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(UPLOAD_DIR)
+    return tmp_path
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """Fresh worker pools: a pool's semaphore belongs to the first event
+    loop that waits on it, and each test runs its own loop"""
+    fresh = {
+        "light": WorkerPool("light", LIGHT_POOL_WORKERS, LIGHT_TASK_TIMEOUT),
+        "heavy": WorkerPool("heavy", HEAVY_POOL_WORKERS, HEAVY_TASK_TIMEOUT),
+    }
+    monkeypatch.setattr(ExecutorService, "pools", fresh)
+    yield fresh
+    for pool in fresh.values():
+        pool.shutdown()
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import DETECTOR_DIR
+from services.anomaly_service import AnomalyDetectorService
+from services.cache_service import model_cache, result_cache
+from services.file_service import FileService
+from services.risk_service import RiskService
+from services.version_service import DatasetVersionService
+
+
+@pytest.fixture
+def detectors(workdir):
+    model_cache.clear()
+    result_cache.clear()
+    yield
+    model_cache.clear()
+    result_cache.clear()
+
+
+def frame(rows: int = 200, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"amount": rng.normal(100, 10, rows), "count": rng.poisson(5, rows)})
+
+
+def stored_metadata(detector_id: str) -> dict:
+    with open(AnomalyDetectorService.metadata_path(detector_id)) as f:
+        return json.load(f)
+
+
+def test_concurrent_scoring_counts_every_row(detectors):
+    entry, _ = AnomalyDetectorService.fit(frame(), "upload", 0.1)
+    detector_id = entry["metadata"]["detector_id"]
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda _: AnomalyDetectorService.record_scored(entry, 3), range(200)))
+
+    assert stored_metadata(detector_id)["scored_rows"] == 600
+    assert [name for name in os.listdir(DETECTOR_DIR) if name.endswith(".tmp")] == []
+
+
+def test_concurrent_saves_leave_a_complete_detector(detectors):
+    df = frame()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: AnomalyDetectorService.fit(df, "upload", 0.1), range(16)))
+
+    model_cache.clear()
+    entry = AnomalyDetectorService.load("upload", 0.1)
+    assert entry["metadata"]["rows"] == len(df)
+    assert sorted(os.listdir(DETECTOR_DIR)) == ["upload_0.1.joblib", "upload_0.1.json"]
+
+
+def test_scoring_with_a_stale_entry_does_not_undo_a_refit(detectors):
+    stale, _ = AnomalyDetectorService.fit(frame(), "upload", 0.1)
+    refitted, _ = AnomalyDetectorService.fit(frame(300, seed=1), "upload", 0.1)
+    AnomalyDetectorService.record_scored(stale, 5)
+
+    stored = stored_metadata(refitted["metadata"]["detector_id"])
+    assert stored["rows"] == 300
+    assert stored["scored_rows"] == 0
+
+
+def upload(df: pd.DataFrame, filename: str = "data.csv") -> str:
+    content = df.to_csv(index=False).encode("utf-8")
+    file_id = FileService.save_file(content, filename)
+    info = FileService.scan_file_info(file_id, filename)
+    FileService.write_metadata(file_id, {
+        **info, "id": file_id, "filename": filename, "size": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    })
+    return file_id
+
+
+def test_appended_versions_share_the_upload_detector(detectors):
+    file_id = upload(frame())
+    AnomalyDetectorService.fit(FileService.load_dataframe(file_id, "data.csv"), file_id, 0.1)
+    key = DatasetVersionService.append(file_id, "data.csv", frame(50, seed=1))["id"]
+    assert key == f"{file_id}@v2"
+
+    result = AnomalyDetectorService.score_rows(FileService.resolve(file_id), 0.1, [{"amount": 500.0, "count": 5}])
+    assert result["detector_id"] == f"{file_id}_0.1"
+    assert result["is_anomaly"] == [True]
+    assert result["refit_due"] == "dataset changed"
+    assert [detector["detector_id"] for detector in AnomalyDetectorService.list_detectors(key)] == [f"{file_id}_0.1"]
+
+
+def test_analysis_of_the_latest_version_refits_and_older_versions_keep_it(detectors):
+    file_id = upload(frame())
+    RiskService.get_anomaly_scores(FileService.load_dataframe(file_id, "data.csv"), 0.1, file_id)
+    key = DatasetVersionService.append(file_id, "data.csv", frame(50, seed=1))["id"]
+
+    scored = RiskService.get_anomaly_scores(FileService.load_dataframe(key, "data.csv"), 0.1, key)
+    assert len(scored["scores"]) == 250
+    metadata = AnomalyDetectorService.load(key, 0.1)["metadata"]
+    assert (metadata["version"], metadata["dataset_key"], metadata["rows"]) == (2, key, 250)
+    assert AnomalyDetectorService.refit_reason(metadata, AnomalyDetectorService.current_fingerprint(metadata)) is None
+
+    result_cache.clear()
+    older = RiskService.get_anomaly_scores(FileService.load_dataframe(file_id, "data.csv"), 0.1, file_id)
+    assert len(older["scores"]) == 200
+    assert AnomalyDetectorService.load(file_id, 0.1)["metadata"]["version"] == 2
+
+
+def test_non_string_column_labels(detectors):
+    # Numeric Excel headers come back as integer labels
+    df = frame().rename(columns={"amount": 2023, "count": 2024})
+    entry, scores = AnomalyDetectorService.fit(df, "upload", 0.1)
+    assert entry["metadata"]["columns"] == ["2023", "2024"]
+
+    model_cache.clear()
+    result_cache.clear()
+    scored = AnomalyDetectorService.get_scores(df, "upload", 0.1)
+    np.testing.assert_allclose(scored["scores"], scores)
+
+    rows = pd.DataFrame({"2023": [100.0, 500.0], "2024": [5, 40]})
+    assert AnomalyDetectorService.score_frame(entry, rows)[1] > AnomalyDetectorService.score_frame(entry, rows)[0]
+    with pytest.raises(ValueError, match="2024"):
+        AnomalyDetectorService.score_frame(entry, rows[["2023"]])
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import approx_service
+from services.approx_service import ApproxService
+from services.cache_service import result_cache
+from services.index_set import ROW_INDEX, IndexSet
+
+ROWS = 120_000
+
+
+@pytest.fixture(autouse=True)
+def cache():
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+@pytest.fixture(scope="module")
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    x = rng.normal(50, 10, ROWS)
+    df = pd.DataFrame({
+        "x": x,
+        "y": 0.6 * x + rng.normal(0, 8, ROWS),
+        "z": rng.exponential(5.0, ROWS),
+        "segment": rng.choice(["a", "b", "c"], ROWS, p=[0.6, 0.3, 0.1]),
+    })
+    df.loc[rng.random(ROWS) < 0.05, "z"] = np.nan
+    return df
+
+
+def contains(interval, value) -> bool:
+    low, high = interval
+    return low <= value <= high
+
+
+def test_sample_is_drawn_once_and_reproducibly(df):
+    sample = ApproxService.get_sample(df, "data@v1")
+    assert ApproxService.get_sample(df, "data@v1") is sample
+    result_cache.clear()
+    again = ApproxService.get_sample(df, "data@v1")
+
+    assert len(sample["positions"]) == approx_service.APPROX_SAMPLE_SIZE
+    np.testing.assert_array_equal(sample["positions"], again["positions"])
+    assert np.all(np.diff(sample["positions"]) > 0)
+
+
+def test_summary_intervals_cover_the_exact_values(df):
+    envelope = ApproxService.compute_approx("summary", df, "data@v1")
+    assert envelope["mode"] == "approx"
+    assert envelope["population_size"] == ROWS
+    assert envelope["sample_size"] == approx_service.APPROX_SAMPLE_SIZE
+    summary, intervals = envelope["result"], envelope["confidence_intervals"]
+
+    assert summary["row_count"] == ROWS
+    for col in ["x", "y", "z"]:
+        series = df[col]
+        ci = intervals["numeric_summary"][col]
+        assert contains(ci["mean"], series.mean())
+        assert contains(ci["25%"], series.quantile(0.25))
+        assert contains(ci["50%"], series.median())
+        assert contains(ci["75%"], series.quantile(0.75))
+    assert contains(intervals["missing_values"]["z"], df["z"].isna().sum())
+    assert summary["missing_values"]["x"] == 0
+
+
+def test_correlation_intervals_cover_the_exact_matrix(df):
+    envelope = ApproxService.compute_approx("correlation", df, "data@v1", method="pearson", dtype="float64")
+    exact = df[["x", "y", "z"]].corr()
+
+    for a, row in envelope["confidence_intervals"].items():
+        for b, interval in row.items():
+            assert contains(interval, exact.loc[a, b]) or a == b
+
+
+def test_outliers_apply_sample_bounds_to_every_row(df):
+    envelope = ApproxService.compute_approx("outliers", df, "data@v1")
+    outliers = envelope["result"]["z"]
+
+    positions = IndexSet.decode(outliers["rows"]).positions
+    expected = np.flatnonzero(((df["z"] < outliers["lower"]) | (df["z"] > outliers["upper"])).to_numpy())
+    np.testing.assert_array_equal(positions, expected)
+    q25, q75 = df["z"].quantile([0.25, 0.75])
+    assert contains(envelope["confidence_intervals"]["bounds"]["z"]["upper"], q75 + 1.5 * (q75 - q25))
+
+
+def test_sampled_anomalies_point_at_population_rows(df):
+    envelope = ApproxService.compute_approx("anomalies", df, "data@v1", contamination=0.05)
+    result = envelope["result"]
+    sample_positions = set(ApproxService.get_sample(df, "data@v1")["positions"].tolist())
+
+    assert all(anomaly[ROW_INDEX] in sample_positions for anomaly in result["anomalies"])
+    assert set(IndexSet.decode(result["anomaly_rows"]).positions.tolist()) <= sample_positions
+    assert contains(envelope["confidence_intervals"]["total_anomalies"], result["total_anomalies"])
+    assert result["total_anomalies"] == pytest.approx(0.05 * ROWS, rel=0.05)
+
+
+def test_exact_result_replaces_the_sample_once_cached(df):
+    exact = ApproxService.compute_exact("stats", df, "data@v1")
+    envelope = ApproxService.compute_approx("stats", df, "data@v1")
+
+    assert envelope["mode"] == "exact"
+    assert envelope["result"] is exact
+    assert envelope["sample_size"] == ROWS
+    assert exact["x"]["median"] == df["x"].median()
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import PAGE_SIZE_MAX_JSON
+from services.arrow_service import ARROW_METADATA_KEY, ARROW_STREAM_MEDIA_TYPE, ArrowService
+from services.serialization import dumps
+
+ARROW = {"Accept": ARROW_STREAM_MEDIA_TYPE}
+
+
+def read_stream(content: bytes) -> pa.Table:
+    return pa.ipc.open_stream(content).read_all()
+
+
+def test_frames_round_trip_in_record_batches():
+    frame = pd.DataFrame({
+        "position": np.arange(10, dtype=np.int64),
+        "value": np.linspace(0, 1, 10),
+        "label": [f"row{i}" for i in range(10)],
+    })
+    table = ArrowService.to_table(frame, {"total": np.int64(10), "columns": ["value"]})
+
+    chunks = list(ArrowService.iter_ipc(table, batch_rows=4))
+    result = read_stream(b"".join(chunks))
+
+    assert len(chunks) == 5  # schema, three batches, end of stream
+    pd.testing.assert_frame_equal(result.to_pandas(), frame)
+    assert result.schema.metadata == {ARROW_METADATA_KEY: dumps({"total": 10, "columns": ["value"]})}
+
+
+@pytest.fixture
+def upload(workdir, pools):
+    """A test client and the query parameters of an uploaded dataset"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"amount": rng.normal(0, 1, 3_000), "units": rng.integers(0, 5, 3_000)})
+    df.loc[:49, "amount"] = rng.normal(0, 1, 50) * 10
+    with TestClient(main.app) as client:
+        uploaded = client.post(
+            "/api/upload", files={"file": ("data.csv", df.to_csv(index=False).encode(), "text/csv")}
+        ).json()
+        yield client, {"file_id": uploaded["id"], "filename": "data.csv"}
+
+
+def test_arrow_rows_match_the_json_page(upload):
+    client, dataset = upload
+    params = {**dataset, "column": "amount", "page_size": 20, "orient": "split"}
+    page = client.get("/api/eda/outliers/rows", params=params).json()
+    response = client.get("/api/eda/outliers/rows", params=params, headers=ARROW)
+
+    assert response.headers["content-type"] == ARROW_STREAM_MEDIA_TYPE
+    table = read_stream(response.content)
+    assert table.column_names == page["rows"]["columns"]
+    assert table.to_pandas().to_numpy().tolist() == page["rows"]["data"]
+    metadata = {key: value for key, value in page.items() if key != "rows"}
+    assert table.schema.metadata[ARROW_METADATA_KEY] == dumps(metadata)
+
+
+def test_large_pages_require_arrow(upload):
+    client, dataset = upload
+    params = {**dataset, "column": "amount", "page_size": PAGE_SIZE_MAX_JSON + 1}
+    assert client.get("/api/eda/outliers/rows", params=params).status_code == 400
+    assert client.get("/api/eda/outliers/rows", params=params, headers=ARROW).status_code == 200
+
+
+def test_chart_points_stream_as_one_long_table(upload):
+    client, dataset = upload
+    charts = client.get("/api/eda/charts", params=dataset).json()["charts"]
+    table = read_stream(client.get("/api/eda/charts", params=dataset, headers=ARROW).content)
+
+    frame = table.to_pandas()
+    assert frame.groupby("chart", observed=True).size().to_dict() == {
+        chart["name"]: len(chart["data"]) for chart in charts
+    }
+    histogram = frame[frame["chart"] == "amount"]
+    assert histogram["count"].tolist() == [point["count"] for point in charts[0]["data"]]
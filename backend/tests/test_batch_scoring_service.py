@@ -0,0 +1,93 @@
+import asyncio
+import hashlib
+import os
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from config import UPLOAD_DIR
+from services.batch_scoring_service import PREDICTION_COLUMN, BatchScoringService
+from services.cache_service import dataframe_cache, model_cache
+from services.file_service import FileService
+from services.model_registry import ModelRegistry
+
+CHUNK_ROWS = 7
+
+
+@pytest.fixture
+def scoring(workdir):
+    dataframe_cache.clear()
+    model_cache.clear()
+    yield
+    dataframe_cache.clear()
+    model_cache.clear()
+
+
+def dataset(rows: int = 40) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "city": rng.choice(["Oslo", "Bergen", "Tromsø"], rows),
+        "a": rng.normal(size=rows).round(3),
+        "count": rng.integers(0, 9, rows).astype(float),
+        "b": rng.normal(size=rows).round(3).astype(object),
+    })
+    df.loc[rows - 3, "count"] = np.nan  # only the last chunk has a null count
+    df.loc[5, "b"] = "oops"  # text in a numeric feature, so its prediction is null
+    df.loc[rows - 1, "b"] = np.nan
+    df.loc[rows - 5, "b"] = 2.0  # "2.0" in the text column, whichever dtype its chunk infers
+    return df
+
+
+def upload(df: pd.DataFrame, filename: str = "data.csv") -> str:
+    content = df.to_csv(index=False).encode("utf-8")
+    file_id = FileService.save_file(content, filename)
+    info = FileService.scan_file_info(file_id, filename)
+    FileService.write_metadata(file_id, {
+        **info, "id": file_id, "filename": filename, "size": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    })
+    return file_id
+
+
+def register_model() -> str:
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(100, 2))
+    model = LinearRegression().fit(X, X[:, 0] * 2 - X[:, 1])
+    return ModelRegistry.register(model, {"features": [{"name": "a"}, {"name": "b"}], "target": "y"})["model_id"]
+
+
+def score(model_id: str, file_id: str, chunk_rows: int, monkeypatch) -> Tuple[dict, str]:
+    defaults = BatchScoringService.iter_scored.__defaults__
+    monkeypatch.setattr(BatchScoringService.iter_scored, "__defaults__", (chunk_rows,) + defaults[1:])
+    report = asyncio.run(BatchScoringService.score_to_dataset(model_id, file_id, "data.csv"))
+    monkeypatch.setattr(BatchScoringService.iter_scored, "__defaults__", defaults)
+    return report, FileService.columnar_path(report["file_id"])
+
+
+def test_chunked_output_matches_a_single_pass(scoring, monkeypatch):
+    df = dataset()
+    file_id = upload(df)
+    model_id = register_model()
+
+    chunked_report, chunked_path = score(model_id, file_id, CHUNK_ROWS, monkeypatch)
+    single_report, single_path = score(model_id, file_id, len(df), monkeypatch)
+    chunked, single = pq.read_table(chunked_path), pq.read_table(single_path)
+
+    assert chunked_report["chunks"] == 6 and single_report["chunks"] == 1
+    assert chunked.schema.equals(single.schema)
+    assert chunked.equals(single)
+
+    # Rows stay in file order, with a single-pass predict's values for valid rows
+    scored = chunked.to_pandas()
+    source = pd.read_csv(os.path.join(UPLOAD_DIR, f"{file_id}_data.csv"))
+    pd.testing.assert_series_equal(scored["city"], source["city"])
+    entry = ModelRegistry.load(model_id)
+    X, valid = ModelRegistry.transform(entry["metadata"], source)
+    np.testing.assert_array_equal(scored[PREDICTION_COLUMN].to_numpy()[valid], entry["model"].predict(X[valid]))
+    assert scored[PREDICTION_COLUMN].isna().to_numpy()[~valid].all()
+    assert chunked_report["invalid_rows"] == 2
+    assert [str(field.type) for field in chunked.schema] == ["string", "double", "double", "string", "double"]
@@ -0,0 +1,101 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.cache_service import LRUCache, frame_nbytes
+
+
+def test_evicts_least_recently_used_past_the_byte_budget():
+    cache = LRUCache(100, weigh=len)
+    cache.put("a", b"x" * 40)
+    cache.put("b", b"x" * 40)
+    assert cache.get("a") is not None  # "b" is now least recently used
+
+    cache.put("c", b"x" * 40)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["weight"] == 80
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entry_heavier_than_capacity_is_not_stored():
+    cache = LRUCache(100, weigh=len)
+    cache.put("a", b"x" * 40)
+
+    assert cache.get_or_load("big", lambda: b"x" * 101) == b"x" * 101
+    assert cache.get("big") is None
+    assert cache.get("a") is not None
+
+
+def test_replacing_an_entry_reweighs_it():
+    cache = LRUCache(100, weigh=len)
+    cache.put("a", b"x" * 90)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 80)
+
+    assert cache.stats()["weight"] == 90
+    assert cache.stats()["evictions"] == 0
+
+
+def test_frames_are_weighed_by_their_deep_size():
+    df = pd.DataFrame({"x": np.arange(1000, dtype=np.int64), "s": ["text"] * 1000})
+    cache = LRUCache(frame_nbytes(df) * 2 - 1, weigh=frame_nbytes)
+    cache.put("one", df)
+    cache.put("two", df.copy())
+
+    assert cache.get("one") is None
+    assert cache.stats()["weight"] == frame_nbytes(df)
+
+
+def test_concurrent_get_or_load_runs_the_loader_once():
+    cache = LRUCache(10)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda _: cache.get_or_load("key", loader), range(16)))
+
+    assert results == ["value"] * 16
+    assert len(calls) == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 15
+    assert cache.stats()["loading"] == 0
+
+
+def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = LRUCache(10)
+    release = threading.Event()
+
+    def loader():
+        release.wait(5)
+        raise RuntimeError("load failed")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(cache.get_or_load, "key", loader) for _ in range(4)]
+        time.sleep(0.05)
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="load failed"):
+                future.result()
+
+    assert cache.get("key") is None
+    assert cache.get_or_load("key", lambda: "retried") == "retried"
+
+
+def test_invalidate_drops_matching_keys():
+    cache = LRUCache(10)
+    for key in [("profile", "a"), ("profile", "b"), ("sample", "a")]:
+        cache.put(key, key)
+
+    assert cache.invalidate(lambda key: key[1] == "a") == 2
+    assert cache.get(("profile", "b")) is not None
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.chart_service import ChartService, lttb
+from services.profile_service import ProfileService
+
+
+def frame(rows: int = 2_000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "amount": rng.normal(100, 15, rows),
+        "rating": rng.integers(1, 4, rows),
+        "flat": np.full(rows, 7.0),
+        "city": rng.choice([f"city{i}" for i in range(15)], rows),
+        "day": pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%Y-%m-%d %H:%M"),
+    })
+    df.loc[rng.choice(rows, 100, replace=False), "amount"] = np.nan
+    df.loc[rng.choice(rows, 50, replace=False), "city"] = None
+    return df
+
+
+def charts_by_name(df: pd.DataFrame, **params) -> dict:
+    charts = ChartService.build_chart_frames(df, ProfileService.build_profile(df), **params)
+    return {chart["name"]: chart for chart in charts}
+
+
+@pytest.mark.parametrize("bins", [None, 7, 30])
+def test_histogram_counts_match_numpy(bins):
+    df = frame()
+    histogram = charts_by_name(df, bins=bins)["amount"]["data"]
+    values = df["amount"].dropna().to_numpy()
+
+    counts, edges = np.histogram(values, bins=len(histogram), range=(values.min(), values.max()))
+    np.testing.assert_array_equal(histogram["count"].to_numpy(), counts)
+    np.testing.assert_allclose(histogram["bin_start"].to_numpy(), edges[:-1])
+    assert histogram["bin_end"].iloc[-1] == values.max()
+    if bins:
+        assert len(histogram) == bins
+
+
+def test_bin_count_never_exceeds_distinct_values():
+    charts = charts_by_name(frame())
+    assert len(charts["rating"]["data"]) <= 3
+    assert charts["rating"]["data"]["count"].sum() == 2_000
+    assert charts["flat"]["data"]["count"].tolist() == [2_000]
+    assert ChartService.histogram_bins(100, 100, 0, 1, 0, 10, bins=10_000) == 50
+
+
+def test_bars_keep_top_k_and_group_the_rest():
+    df = frame()
+    bars = charts_by_name(df, top_k=5)["city"]["data"]
+    counts = df["city"].value_counts()
+
+    assert bars["label"].tolist()[:5] == counts.index[:5].tolist()
+    assert bars["count"].tolist()[:5] == counts.iloc[:5].tolist()
+    assert bars["label"].iloc[-1] == "Other"
+    assert bars["count"].sum() == df["city"].notna().sum()
+
+
+def test_text_dates_become_downsampled_series():
+    df = frame()
+    charts = charts_by_name(df, max_points=100)
+
+    line = charts["amount over day"]
+    assert line["type"] == "line"
+    assert len(line["data"]) == 100
+    assert line["data"]["x"].is_monotonic_increasing
+    assert "day" not in charts  # a date column is not charted as categories
+
+
+def test_lttb_keeps_the_ends_and_the_extremes():
+    x = np.arange(1_000, dtype=np.float64)
+    y = np.sin(x / 50)
+    y[613] = 25.0
+
+    kept = lttb(x, y, 50)
+
+    assert len(kept) == 50
+    assert kept[0] == 0 and kept[-1] == 999
+    assert np.all(np.diff(kept) > 0)
+    assert 613 in kept
+    np.testing.assert_array_equal(lttb(x[:20], y[:20], 50), np.arange(20))
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.correlation_service import CorrelationService
+
+
+def correlated_frame(rows: int = 200, missing: float = 0.0, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=rows)
+    df = pd.DataFrame({
+        "a": base,
+        "b": base + rng.normal(scale=0.5, size=rows),
+        "c": np.exp(base) + rng.normal(scale=0.1, size=rows),
+        "d": rng.normal(size=rows),
+        "e": rng.integers(0, 5, rows).astype(float),
+        "label": ["x"] * rows,
+    })
+    if missing:
+        for col in "abcde":
+            df.loc[rng.random(rows) < missing, col] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("method", ["pearson", "spearman"])
+@pytest.mark.parametrize("missing", [0.0, 0.3])
+@pytest.mark.parametrize("block_columns", [2, 64])
+def test_matrix_matches_pandas_pairwise(method, missing, block_columns):
+    df = correlated_frame(missing=missing)
+    result = CorrelationService.compute(df, method, "float64", block_columns)
+
+    expected = df.select_dtypes(include=[np.number]).corr(method=method)
+    assert result["columns"] == expected.columns.tolist()
+    np.testing.assert_allclose(result["matrix"], expected.to_numpy(), atol=1e-10)
+
+    valid = df[result["columns"]].notna().to_numpy().astype(int)
+    np.testing.assert_array_equal(result["pair_counts"], valid.T @ valid)
+
+
+def test_spearman_reranks_pairs_over_their_shared_rows():
+    df = correlated_frame(missing=0.3, seed=4)
+    result = CorrelationService.compute(df, "spearman", "float64")
+    names = result["columns"]
+
+    for a, b in [("a", "b"), ("a", "c"), ("b", "e")]:
+        shared = df[[a, b]].dropna()
+        expected = shared[a].rank().corr(shared[b].rank())
+        assert result["matrix"][names.index(a), names.index(b)] == pytest.approx(expected)
+
+
+def test_float32_stays_close_to_float64():
+    df = correlated_frame(missing=0.1)
+    single = CorrelationService.compute(df, "pearson", "float32")["matrix"]
+    double = CorrelationService.compute(df, "pearson", "float64")["matrix"]
+    assert single.dtype == np.float32
+    np.testing.assert_allclose(single, double, atol=1e-5)
+
+
+def test_pairs_with_fewer_than_two_shared_rows_are_nan():
+    df = pd.DataFrame({"a": [1.0, 2.0, np.nan, np.nan], "b": [np.nan, np.nan, 1.0, 2.0], "c": [1.0, 3.0, 2.0, 4.0]})
+    matrix = CorrelationService.compute(df, "pearson", "float64")["matrix"]
+    assert np.isnan(matrix[0, 1])
+    assert matrix[0, 2] == pytest.approx(1.0)
+
+
+def test_top_pairs_are_sorted_by_strength():
+    result = CorrelationService.compute(correlated_frame(), "pearson", "float64")
+    pairs = CorrelationService.top_pairs(result, k=3)
+
+    assert len(pairs) == 3
+    strengths = [abs(pair["correlation"]) for pair in pairs]
+    assert strengths == sorted(strengths, reverse=True)
+    assert {pairs[0]["column_a"], pairs[0]["column_b"]} == {"a", "b"}
+    assert CorrelationService.top_pairs(result, k=10, threshold=0.99) == []
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        CorrelationService.compute(correlated_frame(), "kendall")
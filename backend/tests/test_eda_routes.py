@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from routes import eda
+
+CSV = b"price,city\n1.5,Oslo\n2.5,Bergen\n3.5,Oslo\n4.5,Oslo\n"
+
+
+@pytest.fixture
+def client(workdir, monkeypatch):
+    # Every version is over the threshold, so requests without a mode stream
+    monkeypatch.setattr(eda, "STREAMING_EDA_THRESHOLD_BYTES", 0)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _upload(client):
+    uploaded = client.post("/api/upload", files={"file": ("data.csv", CSV, "text/csv")}).json()
+    return {"file_id": uploaded["id"], "filename": "data.csv"}
+
+
+def test_large_versions_stream_without_mode(client):
+    params = _upload(client)
+
+    summary = client.get("/api/eda/summary", params=params).json()
+    assert summary["mode"] == "stream"
+    assert "quantile_rank_error" in summary["error_bounds"]
+
+    stats = client.get("/api/eda/stats", params=params).json()
+    assert stats["mode"] == "stream"
+    assert stats["result"]["city"]["mode"] == "Oslo"
+
+
+def test_exact_mode_is_never_streamed(client):
+    params = {**_upload(client), "mode": "exact"}
+
+    summary = client.get("/api/eda/summary", params=params).json()
+    assert "mode" not in summary
+    assert summary["numeric_summary"]["price"]["50%"] == 3.0
+
+    stats = client.get("/api/eda/stats", params=params).json()
+    assert stats["price"]["median"] == 3.0
+    assert stats["city"]["mode"] == "Oslo"
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.ets_service import ETSService
+from services.forecast_service import ForecastService
+
+
+def test_holt_recovers_a_linear_trend():
+    t = np.arange(60, dtype=float)
+    fit = ETSService.fit(10 + 2 * t, model="holt")
+    mean, _, _ = fit.forecast(5)
+
+    assert fit.models[0] == "holt"
+    assert fit.trend[0] == pytest.approx(2, abs=0.05)
+    np.testing.assert_allclose(mean[0], 10 + 2 * np.arange(60, 65), atol=0.1)
+
+
+def test_holt_winters_recovers_trend_and_season():
+    season = np.array([3.0, -1.0, -4.0, 2.0])
+    y = 20 + 0.5 * np.arange(48) + np.tile(season, 12)
+    fit = ETSService.fit(y, season_length=4)
+    mean, _, _ = fit.forecast(8)
+
+    assert fit.describe()["model"] == "holt_winters"
+    assert fit.trend[0] == pytest.approx(0.5, abs=0.05)
+    # Indexed by phase (t % 4) the season is the pattern, up to a constant the level absorbs
+    np.testing.assert_allclose(fit.season[0] - fit.season[0].mean(), season, atol=0.05)
+    np.testing.assert_allclose(mean[0], 20 + 0.5 * np.arange(48, 56) + np.tile(season, 2), atol=0.2)
+
+
+def test_auto_prefers_simple_for_a_flat_series():
+    rng = np.random.default_rng(1)
+    fit = ETSService.fit(50 + rng.normal(0, 1, 80))
+    assert fit.models[0] == "simple"
+
+
+@pytest.mark.parametrize("width", [0.8, 0.95])
+def test_one_step_interval_coverage_matches_its_width(width):
+    rng = np.random.default_rng(0)
+    Y = 50 + rng.normal(0, 2, (1000, 81))
+    fit = ETSService.fit(Y[:, :80], model="simple")
+    _, lower, upper = fit.forecast(1, width)
+
+    covered = (Y[:, 80] >= lower[:, 0]) & (Y[:, 80] <= upper[:, 0])
+    assert covered.mean() == pytest.approx(width, abs=0.04)
+
+
+def test_multi_step_interval_coverage_on_random_walks():
+    rng = np.random.default_rng(2)
+    Y = np.cumsum(rng.normal(0, 1, (1000, 90)), axis=1)
+    fit = ETSService.fit(Y[:, :80], model="simple")
+    _, lower, upper = fit.forecast(10)
+
+    covered = ((Y[:, 80:] >= lower) & (Y[:, 80:] <= upper)).mean(axis=0)
+    np.testing.assert_allclose(covered, 0.8, atol=0.05)
+    # Intervals widen with the horizon
+    assert np.all(np.diff(upper - lower, axis=1) > 0)
+
+
+def test_ragged_rows_match_single_row_fits():
+    rng = np.random.default_rng(3)
+    series = [rng.normal(0, 1, n).cumsum() + 0.3 * np.arange(n) for n in (10, 25, 40)]
+    batch = ETSService.fit(ETSService.align(series), season_length=7)
+    batch_forecast = batch.forecast(6)
+
+    for row, values in enumerate(series):
+        single = ETSService.fit(values, season_length=7)
+        assert batch.describe(row) == single.describe()
+        for batched, alone in zip(batch_forecast, single.forecast(6)):
+            np.testing.assert_allclose(batched[row], alone[0])
+
+
+def test_rows_with_too_few_observations_have_no_model():
+    fit = ETSService.fit(ETSService.align([np.array([1.0, 2.0]), np.arange(10, dtype=float)]))
+    mean, _, _ = fit.forecast(3)
+
+    assert fit.describe(0)["model"] is None
+    assert np.isnan(mean[0]).all()
+    assert not np.isnan(mean[1]).any()
+
+
+def test_backtest_scores_each_origin_on_its_held_out_window():
+    dates = pd.date_range("2012-01-01", periods=96, freq="MS")
+    season = np.tile([3.0, -1.0, -4.0, 2.0, 0.0, 1.0, -2.0, 4.0, -3.0, 0.5, -0.5, 0.0], 8)
+    df = pd.DataFrame({"month": dates, "sales": 100 + np.arange(96) + season})
+    result = ForecastService.backtest(df, "month", "sales", horizon=6, origins=3)
+
+    assert result["train_sizes"] == [78, 84, 90]
+    ets = result["methods"]["exponential_smoothing"]
+    assert [model["model"] for model in ets["models"]] == ["holt_winters"] * 3
+    assert ets["mae"] < 0.5
+    assert ets["mae"] == pytest.approx(np.mean(ets["origin_mae"]))
+
+    # Each origin forecasts exactly what a fit on the values before it does
+    values = df["sales"].to_numpy()
+    for origin, end in enumerate(result["train_sizes"]):
+        mean, _, _ = ETSService.fit(values[:end], season_length=12).forecast(6)
+        assert np.abs(mean[0] - values[end:end + 6]).mean() == pytest.approx(ets["origin_mae"][origin])
+
+
+def test_backtest_needs_enough_history():
+    df = pd.DataFrame({"day": pd.date_range("2021-01-01", periods=20), "y": np.arange(20.0)})
+    with pytest.raises(ValueError):
+        ForecastService.backtest(df, "day", "y", horizon=6, origins=3)
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.approx_service import ApproxService
+from services.executor_service import ExecutorService, TaskTimeoutError, WorkerPool
+
+
+def test_run_returns_result_and_counts():
+    pool = WorkerPool("test", 2, timeout=5)
+
+    async def run():
+        return await asyncio.gather(*(pool.run(pow, n, 2) for n in range(4)))
+
+    try:
+        assert asyncio.run(run()) == [0, 1, 4, 9]
+        assert pool.stats()["completed"] == 4
+        assert pool.stats()["running"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_timeout_releases_caller_but_keeps_slot():
+    pool = WorkerPool("test", 1, timeout=0.05)
+    release = threading.Event()
+
+    async def run():
+        with pytest.raises(TaskTimeoutError):
+            await pool.run(release.wait, 5)
+        # The timed-out worker still occupies the only slot
+        assert pool.running == 1
+        waiting = asyncio.ensure_future(pool.run(lambda: "next", timeout=5))
+        await asyncio.sleep(0.05)
+        assert pool.queued == 1
+        release.set()
+        return await waiting
+
+    try:
+        assert asyncio.run(run()) == "next"
+        assert pool.stats()["timed_out"] == 1
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_route_returns_504_on_pool_timeout(workdir, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setitem(ExecutorService.pools, "heavy", WorkerPool("heavy", 1, timeout=0.05))
+    monkeypatch.setattr(ApproxService, "compute_exact", lambda *args, **kwargs: release.wait(5))
+
+    try:
+        with TestClient(main.app) as client:
+            uploaded = client.post(
+                "/api/upload", files={"file": ("data.csv", b"a,b\n1,2\n3,4\n5,6\n", "text/csv")}
+            ).json()
+            response = client.post(
+                "/api/risk/analyze", params={"file_id": uploaded["id"], "filename": "data.csv"}
+            )
+    finally:
+        release.set()
+
+    assert response.status_code == 504
+    assert "heavy pool" in response.json()["detail"]
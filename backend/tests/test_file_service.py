@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from config import UPLOAD_DIR
+from services import file_service
+from services.cache_service import dataframe_cache
+from services.file_service import FileService, FileTooLargeError
+from services.version_service import DatasetVersionService
+
+CSV = (
+    "id,price,city,active,sold_on\n"
+    "1,9.5,Oslo,true,2024-01-03\n"
+    "2,,Bergen,false,2024-01-04\n"
+    "3,12.25,,true,\n"
+    "4,7.0,Oslo,false,2024-01-06\n"
+)
+BATCHES = [
+    "id,price,city,active,sold_on\n5,8.5,Tromsø,true,2024-02-01\n",
+    "id,price,city,active,sold_on\n6,,Oslo,false,2024-02-02\n7,3.0,Bergen,true,\n",
+]
+
+
+@pytest.fixture
+def files(workdir):
+    dataframe_cache.clear()
+    yield
+    dataframe_cache.clear()
+
+
+def upload(content: str, filename: str = "data.csv") -> str:
+    data = content.encode("utf-8")
+    file_id = FileService.save_file(data, filename)
+    info = FileService.scan_file_info(file_id, filename)
+    FileService.write_metadata(file_id, {
+        **info, "id": file_id, "filename": filename, "size": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    })
+    return file_id
+
+
+def read_csv(content: str, **kwargs) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO(content), **kwargs)
+
+
+def test_columnar_sidecar_reads_back_as_the_csv(files):
+    file_id = upload(CSV)
+    assert FileService.build_columnar(file_id, "data.csv")
+    assert os.path.exists(FileService.columnar_path(file_id))
+
+    pd.testing.assert_frame_equal(FileService._read_file(file_id, "data.csv"), read_csv(CSV))
+    pd.testing.assert_frame_equal(
+        FileService._read_file(file_id, "data.csv", ["city", "price"]), read_csv(CSV)[["city", "price"]]
+    )
+    chunks = list(FileService.iter_chunks(file_id, "data.csv", 3))
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), read_csv(CSV))
+
+
+def test_column_subsets_keep_the_requested_order_without_a_sidecar(files):
+    file_id = upload(CSV)
+
+    expected = read_csv(CSV)[["city", "price"]]
+    pd.testing.assert_frame_equal(FileService._read_file(file_id, "data.csv", ["city", "price"]), expected)
+    chunks = FileService.iter_chunks(file_id, "data.csv", 3, ["city", "price"])
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+
+def test_appended_segments_read_back_as_the_concatenated_csv(files):
+    file_id = upload(CSV)
+    FileService.build_columnar(file_id, "data.csv")
+    for batch in BATCHES:
+        DatasetVersionService.append(file_id, "data.csv", read_csv(batch))
+
+    combined = CSV + "".join(batch.split("\n", 1)[1] for batch in BATCHES)
+    key = FileService.resolve(file_id)
+    assert key == f"{file_id}@v3"
+
+    pd.testing.assert_frame_equal(FileService._read_file(key, "data.csv"), read_csv(combined))
+    pd.testing.assert_frame_equal(
+        pd.concat(FileService.iter_chunks(key, "data.csv", 2), ignore_index=True), read_csv(combined)
+    )
+    # Earlier versions keep their rows
+    pd.testing.assert_frame_equal(
+        FileService._read_file(FileService.resolve(file_id, 2), "data.csv"),
+        read_csv(CSV + BATCHES[0].split("\n", 1)[1])
+    )
+
+
+def reader(content: bytes):
+    """An UploadFile.read stand-in that records the size of every read"""
+    position = 0
+    reads = []
+
+    async def read(size: int) -> bytes:
+        nonlocal position
+        reads.append(size)
+        chunk = content[position:position + size]
+        position += len(chunk)
+        return chunk
+
+    return read, reads
+
+
+def test_save_stream_writes_in_chunks(files, monkeypatch):
+    monkeypatch.setattr(file_service, "UPLOAD_CHUNK_SIZE", 16)
+    content = CSV.encode("utf-8")
+    read, reads = reader(content)
+
+    file_id, size, sha256 = asyncio.run(FileService.save_stream(read, "data.csv"))
+
+    assert size == len(content) and sha256 == hashlib.sha256(content).hexdigest()
+    assert set(reads) == {16} and len(reads) == -(-len(content) // 16) + 1
+    with open(os.path.join(UPLOAD_DIR, f"{file_id}_data.csv"), "rb") as f:
+        assert f.read() == content
+
+
+def test_save_stream_stops_at_the_size_limit(files, monkeypatch):
+    monkeypatch.setattr(file_service, "UPLOAD_CHUNK_SIZE", 16)
+    monkeypatch.setattr(file_service, "MAX_FILE_SIZE", 40)
+    read, reads = reader(CSV.encode("utf-8"))
+
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(FileService.save_stream(read, "data.csv"))
+    assert len(reads) == 3
+    assert os.listdir(UPLOAD_DIR) == []
+
+
+def test_scan_merges_chunk_dtypes_like_a_full_read(files, monkeypatch):
+    monkeypatch.setattr(file_service, "SCAN_CHUNK_ROWS", 3)
+    content = "count,ratio,label,mixed,late_null,flag\n" + "".join(
+        f"{k},{k / 2},x{k},{k if k < 5 else 'text'},{k if k < 5 else ''},{k % 2 == 0}\n" for k in range(10)
+    )
+    file_id = FileService.save_file(content.encode("utf-8"), "data.csv")
+
+    info = FileService.scan_file_info(file_id, "data.csv")
+
+    full = read_csv(content)
+    assert info["rows"] == 10
+    assert info["column_names"] == full.columns.tolist()
+    assert info["dtypes"] == full.dtypes.astype(str).to_dict()
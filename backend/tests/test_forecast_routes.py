@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from routes import forecast
+from services import forecast_service
+from services.forecast_service import ForecastService
+
+CONFIG = {"date_column": "day", "value_column": "sales", "periods": 3, "group_by": "store"}
+
+
+@pytest.fixture
+def client(workdir, pools, monkeypatch):
+    monkeypatch.setattr(forecast_service, "PROPHET_AVAILABLE", False)
+    # One group per heavy task, so batches can finish out of order
+    monkeypatch.setattr(forecast, "GROUP_FORECAST_BATCH_GROUPS", 1)
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _upload(client):
+    frames = [
+        pd.DataFrame({"day": pd.date_range("2024-01-01", periods=n), "sales": np.arange(n, dtype=float), "store": key})
+        for key, n in {"c": 8, "a": 2, "b": 6}.items()
+    ]
+    body = pd.concat(frames).to_csv(index=False).encode()
+    uploaded = client.post("/api/upload", files={"file": ("sales.csv", body, "text/csv")}).json()
+    return {"file_id": uploaded["id"], "filename": "sales.csv"}
+
+
+def test_grouped_forecast_keeps_group_order(client, monkeypatch):
+    forecast_groups = ForecastService.forecast_groups
+    delays = {"a": 0.2, "b": 0.1, "c": 0.0}
+
+    def slow_forecast_groups(groups, *args):
+        # The first group finishes last
+        time.sleep(delays[groups[0][0]])
+        return forecast_groups(groups, *args)
+
+    monkeypatch.setattr(ForecastService, "forecast_groups", staticmethod(slow_forecast_groups))
+
+    response = client.post("/api/forecast", params=_upload(client), json=CONFIG)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["groups"] == 3
+    assert body["methods"] == {"exponential_smoothing": 2, "last_value": 1}
+    assert body["failed"] == []
+    table = pd.DataFrame(body["forecast"]["data"], columns=body["forecast"]["columns"])
+    assert table["group"].tolist() == ["a"] * 3 + ["b"] * 3 + ["c"] * 3
+    assert table["step"].tolist() == [1, 2, 3] * 3
+
+
+def test_grouped_forecast_rejects_unknown_group_column(client):
+    response = client.post("/api/forecast", params=_upload(client), json={**CONFIG, "group_by": "region"})
+
+    assert response.status_code == 400
+    assert "region" in response.json()["detail"]
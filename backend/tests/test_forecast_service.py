@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import forecast_service
+from services.cache_service import forecast_cache
+from services.file_service import FileService
+from services.forecast_service import ForecastService
+
+
+class FakeProphet:
+    """Stands in for Prophet: records the init it was fitted from"""
+
+    fits = []
+
+    def __init__(self, **settings):
+        self.settings = settings
+
+    def fit(self, series, init=None):
+        self.init = init
+        slope = float(np.polyfit(np.arange(len(series)), series["y"], 1)[0])
+        self.params = {
+            "k": np.array([[slope]]),
+            "m": np.array([[float(series["y"].iloc[0])]]),
+            "sigma_obs": np.array([[0.1]]),
+            "delta": np.zeros((1, 25)),
+            "beta": np.zeros((1, 6)),
+        }
+        FakeProphet.fits.append(self)
+        return self
+
+
+@pytest.fixture
+def fake_prophet(monkeypatch, workdir):
+    FakeProphet.fits = []
+    monkeypatch.setattr(forecast_service, "Prophet", FakeProphet, raising=False)
+    monkeypatch.setattr(forecast_service, "PROPHET_AVAILABLE", True)
+    forecast_cache.clear()
+    yield FakeProphet
+    forecast_cache.clear()
+
+
+def daily(values):
+    return pd.DataFrame({"day": pd.date_range("2024-01-01", periods=len(values)), "sales": values})
+
+
+def test_repeated_request_reuses_the_fitted_model(fake_prophet):
+    FileService.write_metadata("upload", {"sha256": "a"})
+    df = daily(np.arange(30.0))
+
+    _, first = ForecastService.get_prophet_model(df, "day", "sales", "upload")
+    _, second = ForecastService.get_prophet_model(df, "day", "sales", "upload")
+
+    assert first["cached"] is False and first["warm_start"] is False
+    assert second["cached"] is True
+    assert len(fake_prophet.fits) == 1
+
+
+def test_appended_version_warm_starts_from_the_previous_fit(fake_prophet):
+    FileService.write_metadata("upload", {"sha256": "a", "latest_version": 2})
+    FileService.write_metadata(FileService.version_key("upload", 2), {"sha256": "b"})
+    df = daily(np.arange(30.0))
+    appended = daily(np.arange(40.0))
+
+    ForecastService.get_prophet_model(df, "day", "sales", "upload")
+    model, fit_info = ForecastService.get_prophet_model(appended, "day", "sales", "upload@v2")
+
+    assert fit_info == {"cached": False, "warm_start": True, "fit_seconds": fit_info["fit_seconds"]}
+    assert model.init["k"] == pytest.approx(1.0)
+    assert len(fake_prophet.fits) == 2
+
+
+def test_other_uploads_and_columns_do_not_share_a_lineage(fake_prophet):
+    FileService.write_metadata("upload", {"sha256": "a"})
+    FileService.write_metadata("other", {"sha256": "b"})
+    df = daily(np.arange(30.0)).assign(units=np.arange(30.0))
+
+    ForecastService.get_prophet_model(df, "day", "sales", "upload")
+    _, other_upload = ForecastService.get_prophet_model(df, "day", "sales", "other")
+    _, other_column = ForecastService.get_prophet_model(df, "day", "units", "upload")
+
+    assert other_upload["warm_start"] is False
+    assert other_column["warm_start"] is False
+
+
+def long_frame(lengths):
+    return pd.concat(
+        [daily(np.arange(n, dtype=float) + 10 * i).assign(store=key) for i, (key, n) in enumerate(lengths.items())],
+        ignore_index=True
+    )
+
+
+def test_forecast_groups_picks_a_method_per_series(monkeypatch):
+    monkeypatch.setattr(forecast_service, "PROPHET_AVAILABLE", False)
+    groups = ForecastService.partition(long_frame({"b": 12, "a": 2, "c": 0, "d": 5}), "store", "day")
+
+    frame, errors = ForecastService.forecast_groups(groups, "day", "sales", 4)
+
+    assert list(frame.columns) == forecast_service.GROUP_FORECAST_COLUMNS
+    assert frame["group"].unique().tolist() == ["a", "b", "d"]
+    assert frame.groupby("group")["method"].first().to_dict() == {
+        "a": "last_value", "b": "exponential_smoothing", "d": "exponential_smoothing"
+    }
+    assert frame.groupby("group")["step"].apply(list).map(lambda steps: steps == [1, 2, 3, 4]).all()
+    carried = frame[frame["group"] == "a"]
+    assert (carried["yhat"] == 11.0).all() and carried["yhat_lower"].isna().all()
+    assert errors == []
+
+
+def test_forecast_groups_reports_series_without_values(monkeypatch):
+    monkeypatch.setattr(forecast_service, "PROPHET_AVAILABLE", False)
+    df = long_frame({"a": 3, "b": 3})
+    df.loc[df["store"] == "b", "sales"] = np.nan
+
+    frame, errors = ForecastService.forecast_groups(ForecastService.partition(df, "store", "day"), "day", "sales", 2)
+
+    assert frame["group"].unique().tolist() == ["a"]
+    assert errors == [{"group": "b", "error": "No values to forecast"}]
+
+
+def test_long_series_use_prophet_and_fall_back_when_it_fails(monkeypatch):
+    monkeypatch.setattr(forecast_service, "PROPHET_AVAILABLE", True)
+    monkeypatch.setattr(forecast_service, "GROUP_FORECAST_MIN_POINTS", 10)
+
+    def prophet_frame(series, date_col, value_col, periods, *args):
+        if series[value_col].iloc[0] >= 10:
+            raise RuntimeError("fit failed")
+        return pd.DataFrame({
+            "ds": ForecastService.future_dates(series[date_col], periods).to_numpy(),
+            "yhat": 0.0, "yhat_lower": -1.0, "yhat_upper": 1.0,
+        }), {}
+
+    monkeypatch.setattr(ForecastService, "prophet_frame", staticmethod(prophet_frame))
+    groups = ForecastService.partition(long_frame({"a": 12, "b": 12, "c": 5}), "store", "day")
+
+    frame, _ = ForecastService.forecast_groups(groups, "day", "sales", 3)
+
+    assert frame.groupby("group")["method"].first().to_dict() == {
+        "a": "prophet", "b": "exponential_smoothing", "c": "exponential_smoothing"
+    }
+
+
+def test_partition_rejects_too_many_groups(monkeypatch):
+    monkeypatch.setattr(forecast_service, "GROUP_FORECAST_MAX_GROUPS", 2)
+
+    with pytest.raises(ValueError, match="exceed the limit"):
+        ForecastService.partition(long_frame({"a": 3, "b": 3, "c": 3}), "store", "day")
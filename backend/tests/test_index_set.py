@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.index_set import ROW_INDEX, IndexSet, fetch_rows, page_order
+
+
+@pytest.mark.parametrize("positions, size", [
+    ([], 0),
+    ([], 100),
+    ([0], 1),
+    ([3, 4, 5, 9, 10, 99], 100),
+    (list(range(0, 1000, 2)), 1000),
+    (list(range(200, 800)), 1000),
+])
+def test_encoding_round_trips(positions, size):
+    index_set = IndexSet(positions, size)
+    encoded = index_set.encode()
+    decoded = IndexSet.decode(encoded)
+
+    assert decoded.size == size
+    np.testing.assert_array_equal(decoded.positions, positions)
+
+
+def test_encode_picks_the_smaller_form():
+    clustered = IndexSet(range(100, 5000), 10_000).encode()
+    scattered = IndexSet(range(0, 10_000, 3), 10_000).encode()
+    assert clustered == {"encoding": "runs", "size": 10_000, "runs": [[100, 4900]]}
+    assert scattered["encoding"] == "bitmap"
+
+
+def test_both_forms_decode_to_the_same_set():
+    rng = np.random.default_rng(0)
+    positions = np.sort(rng.choice(5000, 700, replace=False))
+    index_set = IndexSet(positions, 5000)
+
+    from_runs = IndexSet.decode({"encoding": "runs", "size": 5000, "runs": index_set.runs()})
+    from_bitmap = IndexSet.decode({"encoding": "bitmap", "size": 5000, "bitmap": index_set.bitmap()})
+    np.testing.assert_array_equal(from_runs.positions, positions)
+    np.testing.assert_array_equal(from_bitmap.positions, positions)
+
+
+def test_page_order_ranks_scores_and_pages_through_them():
+    scores = np.array([0.1, 0.9, np.nan, 0.5, 0.9, 0.3])
+    assert page_order(scores, 1, 2).tolist() == [1, 4]
+    assert page_order(scores, 2, 2).tolist() == [3, 5]
+    assert page_order(scores, 3, 2).tolist() == [0, 2]
+    assert page_order(scores, 4, 2).tolist() == []
+    assert page_order(scores, 1, 3, descending=False).tolist() == [0, 5, 3]
+
+
+def test_fetched_rows_keep_columns_named_like_the_added_fields():
+    df = pd.DataFrame({"row_index": [10, 11, 12], "severity": ["low", "high", "low"], "value": [1.5, None, 3.0]})
+    records = fetch_rows(df, np.array([1, 2]), {"severity": np.array([2.5, 0.5])})
+
+    assert records == [
+        {"row_index": 11, "severity": "high", "value": None, ROW_INDEX: 1, "_severity": 2.5},
+        {"row_index": 12, "severity": "low", "value": 3.0, ROW_INDEX: 2, "_severity": 0.5},
+    ]
+
+
+def test_fetched_rows_in_split_and_frame_form():
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    split = fetch_rows(df, np.array([2, 0]), orient="split")
+    frame = fetch_rows(df, np.array([2, 0]), orient="frame")
+
+    assert split == {"columns": ["a", "b", ROW_INDEX], "data": [[3, "z", 2], [1, "x", 0]]}
+    assert frame["a"].dtype == np.int64
+    assert frame[ROW_INDEX].tolist() == [2, 0]
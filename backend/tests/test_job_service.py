@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from services import job_service
+from services.job_service import JobService
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    JobService.jobs.clear()
+    JobService.jobs_by_key.clear()
+    yield
+    JobService.jobs.clear()
+    JobService.jobs_by_key.clear()
+
+
+def test_identical_submissions_share_one_job():
+    calls = []
+
+    async def work(job):
+        calls.append(job.id)
+        job.report(0.5, "halfway")
+        await asyncio.sleep(0.01)
+        return {"rows": 3}
+
+    async def run():
+        first = JobService.submit("risk_analyze", {"file_id": "a", "contamination": 0.1}, work)
+        second = JobService.submit("risk_analyze", {"contamination": 0.1, "file_id": "a"}, work)
+        other = JobService.submit("risk_analyze", {"file_id": "a", "contamination": 0.2}, work)
+        assert second is first and other is not first
+        await JobService.wait(first, 5)
+        # A finished job keeps serving identical submissions until it expires
+        assert JobService.submit("risk_analyze", {"file_id": "a", "contamination": 0.1}, work) is first
+        await JobService.wait(other, 5)
+        return first
+
+    job = asyncio.run(run())
+    assert job.status == "succeeded"
+    assert job.progress == 1.0
+    assert job.to_dict()["result"] == {"rows": 3}
+    assert len(calls) == 2
+
+
+def test_failed_jobs_are_not_coalesced():
+    async def fail(job):
+        raise ValueError("No numeric columns found")
+
+    async def succeed(job):
+        return "ok"
+
+    async def run():
+        failed = JobService.submit("refit", {"file_id": "a"}, fail)
+        await JobService.wait(failed, 5)
+        retried = JobService.submit("refit", {"file_id": "a"}, succeed)
+        await JobService.wait(retried, 5)
+        return failed, retried
+
+    failed, retried = asyncio.run(run())
+    assert failed.status == "failed"
+    assert failed.error == "No numeric columns found"
+    assert retried is not failed and retried.result == "ok"
+
+
+def test_cancel_running_job():
+    started = []
+
+    async def work(job):
+        started.append(job.id)
+        await asyncio.sleep(10)
+
+    async def run():
+        job = JobService.submit("forecast", {"file_id": "a"}, work)
+        await asyncio.sleep(0.01)
+        JobService.cancel(job.id)
+        await JobService.wait(job, 5)
+        # A cancelled job does not absorb the next identical submission
+        replacement = JobService.submit("forecast", {"file_id": "a"}, work)
+        JobService.cancel(replacement.id)
+        await JobService.wait(replacement, 5)
+        return job, replacement
+
+    job, replacement = asyncio.run(run())
+    assert started == [job.id]
+    assert job.status == "cancelled" and job.finished_at is not None
+    assert replacement is not job
+
+
+def test_cancel_before_the_job_starts():
+    async def work(job):
+        return "never"
+
+    async def run():
+        job = JobService.submit("forecast", {"file_id": "a"}, work)
+        JobService.cancel(job.id)
+        return await JobService.wait(job, 1)
+
+    job = asyncio.run(run())
+    assert job.status == "cancelled"
+    assert job.done.is_set()
+    assert job.result is None
+
+
+def test_expired_results_are_swept(monkeypatch):
+    async def work(job):
+        return "ok"
+
+    async def run():
+        job = JobService.submit("forecast", {"file_id": "a"}, work)
+        await JobService.wait(job, 5)
+        return job
+
+    job = asyncio.run(run())
+    monkeypatch.setattr(job_service, "JOB_RESULT_TTL_SECONDS", -1)
+    assert JobService.get(job.id) is None
+    assert JobService.jobs_by_key == {}
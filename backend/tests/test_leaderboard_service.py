@@ -0,0 +1,88 @@
+import asyncio
+
+import numpy as np
+import pytest
+from sklearn.dummy import DummyRegressor
+
+from services import ml_service
+from services.leaderboard_service import LeaderboardService
+from services.ml_service import MLService
+from services.preprocessing_service import PreparedFeatures
+
+SCORES = {"a": 0.9, "b": 0.8, "c": 0.7, "d": 0.6}
+
+
+def prepared(rows: int, classes: int = 0) -> PreparedFeatures:
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, 3)).astype(np.float32)
+    y = X @ np.array([1.0, -2.0, 0.5]) + rng.normal(scale=0.1, size=rows)
+    if classes:
+        y = np.digitize(y, np.quantile(y, np.linspace(0, 1, classes + 1)[1:-1]))
+    spec = {"target": "y", "columns": ["x0", "x1", "x2"]}
+    return PreparedFeatures(X, y, spec, [{"name": name, "type": "numeric"} for name in spec["columns"]])
+
+
+@pytest.mark.parametrize("rows, candidates, expected", [
+    (10_000, 3, [5_000, 10_000]),
+    (10_000, 5, [2_500, 5_000, 10_000]),
+    (3_000, 5, [1_000, 1_500, 3_000]),
+    (800, 5, [800]),
+    (10_000, 1, [10_000]),
+])
+def test_halving_schedule(rows, candidates, expected):
+    assert LeaderboardService.halving_schedule(rows, candidates) == expected
+
+
+def test_losing_candidates_are_eliminated_each_rung(pools, monkeypatch):
+    fits = []
+
+    def fit_fold(task, name, X, y, train_idx, test_idx):
+        fits.append((name, len(X)))
+        if name == "broken":
+            raise ValueError("cannot fit")
+        return {"score": SCORES[name], "fit_seconds": 0.01}
+
+    candidates = {name: DummyRegressor for name in [*SCORES, "broken"]}
+    monkeypatch.setitem(ml_service.CANDIDATES, "regression", candidates)
+    monkeypatch.setattr(MLService, "fit_fold", fit_fold)
+
+    result = asyncio.run(LeaderboardService.run(prepared(10_000), "regression", folds=5))
+
+    # Rung 1: five candidates, "broken" fails and the best two of the other four survive
+    assert sorted({name for name, rows in fits if rows == 2_500}) == ["a", "b", "broken", "c", "d"]
+    assert sorted({name for name, rows in fits if rows == 5_000}) == ["a", "b"]
+    assert sorted({name for name, rows in fits if rows == 10_000}) == ["a"]
+    assert result["halving"]["fold_fits"] == len(fits) == (5 + 2 + 1) * 5
+
+    leaderboard = {entry["candidate"]: entry for entry in result["leaderboard"]}
+    assert [entry["candidate"] for entry in result["leaderboard"]] == ["a", "b", "c", "d", "broken"]
+    assert [entry["rank"] for entry in result["leaderboard"]] == [1, 2, 3, 4, 5]
+    assert [leaderboard[name]["rung"] for name in ["a", "b", "c", "d", "broken"]] == [2, 1, 0, 0, 0]
+    assert not leaderboard["a"]["pruned"] and leaderboard["b"]["pruned"]
+    assert leaderboard["broken"]["error"] == "cannot fit"
+    assert leaderboard["a"]["fit_seconds"] == pytest.approx(0.15)
+    assert result["best_candidate"] == "a" and result["r_squared"] == 0.9
+    assert isinstance(result["estimator"], DummyRegressor)
+
+
+def test_every_candidate_failing_raises(pools, monkeypatch):
+    def fit_fold(task, name, X, y, train_idx, test_idx):
+        raise ValueError(f"{name} failed")
+
+    monkeypatch.setattr(MLService, "fit_fold", fit_fold)
+    with pytest.raises(ValueError, match="Every candidate failed"):
+        asyncio.run(LeaderboardService.run(prepared(100), "regression", folds=5))
+
+
+@pytest.mark.parametrize("task, classes, metric", [("regression", 0, "r_squared"), ("classification", 3, "accuracy")])
+def test_real_candidates_are_ranked_and_the_winner_refitted(pools, task, classes, metric):
+    data = prepared(300, classes)
+    result = asyncio.run(LeaderboardService.run(data, task, folds=3))
+
+    scores = [entry["mean_score"] for entry in result["leaderboard"]]
+    assert scores == sorted(scores, reverse=True)
+    assert len(result["leaderboard"]) == 3
+    assert result[metric] == scores[0]
+    assert len(result["estimator"].predict(data.X)) == 300
+    if classes:
+        assert result["classes"] == [0, 1, 2]
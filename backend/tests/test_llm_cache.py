@@ -0,0 +1,149 @@
+import asyncio
+import os
+
+import pytest
+
+from services.llm_cache import LLMResponseCache, normalize_question
+
+
+def answer(text: str) -> dict:
+    return {"answer": text}
+
+
+def cacheable(value: dict) -> bool:
+    return "error" not in value
+
+
+class SlowCall:
+    """Counts its calls and answers once ``release`` is set"""
+
+    def __init__(self, value: dict):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> dict:
+        self.calls += 1
+        await self.release.wait()
+        return self.value
+
+
+def test_normalize_question_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize_question("  What is the  AVERAGE salary?? ") == "what is the average salary"
+    assert LLMResponseCache.key("chat", "Mean age?", "ctx", "m", 0.7) == LLMResponseCache.key("chat", "mean age", "ctx", "m", 0.7)
+    assert LLMResponseCache.key("chat", "mean age", "ctx", "m", 0.7) != LLMResponseCache.key("chat", "mean age", "other", "m", 0.7)
+
+
+def test_identical_requests_share_one_call():
+    async def run():
+        cache = LLMResponseCache(10, 60)
+        call = SlowCall(answer("42"))
+        requests = [asyncio.ensure_future(cache.get_or_call("k", call, cacheable)) for _ in range(5)]
+        await asyncio.sleep(0)
+        call.release.set()
+        results = await asyncio.gather(*requests)
+        again = await cache.get_or_call("k", call, cacheable)
+        return cache, call, results, again
+
+    cache, call, results, again = asyncio.run(run())
+    assert call.calls == 1
+    assert results[0] == (answer("42"), False)
+    assert results[1:] == [(answer("42"), True)] * 4
+    assert again == (answer("42"), True)
+    assert cache.stats()["coalesced"] == 4 and cache.stats()["in_flight"] == 0
+
+
+def test_joined_callers_of_an_uncacheable_response_are_not_marked_cached():
+    async def run():
+        cache = LLMResponseCache(10, 60)
+        call = SlowCall({"error": "upstream failed"})
+        requests = [asyncio.ensure_future(cache.get_or_call("k", call, cacheable)) for _ in range(3)]
+        await asyncio.sleep(0)
+        call.release.set()
+        return cache, await asyncio.gather(*requests)
+
+    cache, results = asyncio.run(run())
+    assert [cached for _, cached in results] == [False, False, False]
+    assert cache.stats()["entries"] == 0
+
+
+def test_cancelling_the_first_caller_does_not_cancel_the_shared_call():
+    async def run():
+        cache = LLMResponseCache(10, 60)
+        call = SlowCall(answer("42"))
+        first = asyncio.ensure_future(cache.get_or_call("k", call, cacheable))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(cache.get_or_call("k", call, cacheable))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        call.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return cache, call, await second
+
+    cache, call, second = asyncio.run(run())
+    assert second == (answer("42"), True)
+    assert call.calls == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        cache = LLMResponseCache(10, 60)
+        results = await asyncio.gather(
+            *(cache.get_or_call("k", failing, cacheable) for _ in range(3)), return_exceptions=True
+        )
+        return cache, results
+
+    cache, results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats()["entries"] == 0 and cache.stats()["in_flight"] == 0
+
+
+def test_disk_tier_survives_a_new_cache_and_keeps_the_newest_files(tmp_path, monkeypatch):
+    async def fill(cache: LLMResponseCache, count: int):
+        for i in range(count):
+            await cache.get_or_call(f"k{i}", lambda i=i: asyncio.sleep(0, answer(str(i))), cacheable)
+
+    listings = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, "listdir", lambda path: listings.append(path) or listdir(path))
+
+    directory = str(tmp_path / "llm")
+    asyncio.run(fill(LLMResponseCache(100, 60, directory, disk_capacity=3), 6))
+    assert len(listings) == 1
+    assert sorted(listdir(directory)) == ["k3.json", "k4.json", "k5.json"]
+
+    async def reload():
+        cache = LLMResponseCache(100, 60, directory, disk_capacity=3)
+        return cache, await cache.get_or_call("k5", lambda: asyncio.sleep(0, answer("new")), cacheable)
+
+    cache, result = asyncio.run(reload())
+    assert result == (answer("5"), True)
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_eviction_tolerates_files_removed_by_others(tmp_path):
+    directory = str(tmp_path / "llm")
+    cache = LLMResponseCache(100, 60, directory, disk_capacity=2)
+    cache._write_disk("a", 1.0, answer("a"))
+    cache._write_disk("b", 2.0, answer("b"))
+    os.remove(os.path.join(directory, "a.json"))
+
+    cache._write_disk("c", 3.0, answer("c"))
+    assert sorted(os.listdir(directory)) == ["b.json", "c.json"]
+
+
+def test_expired_disk_entries_are_removed_when_read(tmp_path):
+    directory = str(tmp_path / "llm")
+    cache = LLMResponseCache(100, 60, directory, disk_capacity=10)
+    cache._write_disk("old", 0.0, answer("old"))
+
+    assert cache._read_disk("old") is None
+    assert os.listdir(directory) == []
+    assert cache.stats()["expired"] == 1
@@ -0,0 +1,120 @@
+import asyncio
+from collections import deque
+
+import httpx
+import pytest
+
+import mock_openrouter
+from services import llm_client
+from services.llm_client import LLMClient
+
+MESSAGES = [{"role": "user", "content": "How many rows?"}]
+# Errors that can happen once the provider has the request
+AFTER_SENDING = (httpx.ReadTimeout, httpx.WriteTimeout, httpx.RemoteProtocolError)
+
+
+class FaultTransport(httpx.AsyncBaseTransport):
+    """Forwards requests to the mock OpenRouter app, raising the queued
+    transport errors: connect and pool errors before the request is sent,
+    AFTER_SENDING errors once the mock has answered it"""
+
+    def __init__(self, *faults):
+        self.faults = deque(faults)
+        self.app = httpx.ASGITransport(app=mock_openrouter.app)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        fault = self.faults.popleft() if self.faults else None
+        if fault is not None and not issubclass(fault, AFTER_SENDING):
+            raise fault("injected", request=request)
+        response = await self.app.handle_async_request(request)
+        if fault is not None:
+            raise fault("injected", request=request)
+        return response
+
+
+class SequenceRandom:
+    """Replaces the mock's random module with a fixed sequence of draws"""
+
+    def __init__(self, *draws):
+        self.draws = deque(draws)
+
+    def random(self) -> float:
+        return self.draws.popleft()
+
+
+@pytest.fixture
+def mock_llm(monkeypatch):
+    monkeypatch.setattr(mock_openrouter, "MOCK_LLM_LATENCY_MS", 0.0)
+    monkeypatch.setattr(mock_openrouter, "stats", {"requests": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0})
+    monkeypatch.setattr(llm_client, "LLM_RETRY_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(LLMClient, "_client", None)
+    monkeypatch.setattr(LLMClient, "_semaphore", asyncio.Semaphore(2))
+    return mock_openrouter.stats
+
+
+def chat(transport: httpx.AsyncBaseTransport, count: int = 1):
+    """Send ``count`` concurrent chat requests through LLMClient and return
+    the responses, or the error of the first failed one"""
+    async def send():
+        LLMClient._client = httpx.AsyncClient(transport=transport, base_url="http://mock/api/v1")
+        try:
+            return await asyncio.gather(*(LLMClient.chat(MESSAGES, "mock", 0.0, 100) for _ in range(count)))
+        finally:
+            await LLMClient.close()
+
+    return asyncio.run(send())
+
+
+def test_rate_limited_and_unavailable_responses_are_retried(mock_llm, monkeypatch):
+    # 429, then 503, then an answer
+    monkeypatch.setattr(mock_openrouter, "MOCK_LLM_FAILURE_RATE", 0.5)
+    monkeypatch.setattr(mock_openrouter, "random", SequenceRandom(0.0, 0.0, 0.0, 0.9, 0.9))
+    retries = LLMClient.retries
+
+    [response] = chat(FaultTransport())
+
+    assert response.status_code == 200
+    assert response.json()["choices"][0]["message"]["content"] == "Mock answer to: How many rows?"
+    assert mock_llm["requests"] == 3
+    assert LLMClient.retries - retries == 2
+
+
+def test_last_failure_is_returned_after_the_retries(mock_llm, monkeypatch):
+    monkeypatch.setattr(mock_openrouter, "MOCK_LLM_FAILURE_RATE", 1.0)
+    monkeypatch.setattr(mock_openrouter, "random", SequenceRandom(*[0.0, 0.9] * 3))
+    monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 2)
+
+    [response] = chat(FaultTransport())
+
+    assert response.status_code == 503
+    assert mock_llm["requests"] == 3
+
+
+@pytest.mark.parametrize("error", [httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout])
+def test_errors_before_sending_are_retried(mock_llm, error):
+    [response] = chat(FaultTransport(error, error))
+
+    assert response.status_code == 200
+    assert mock_llm["requests"] == 1
+
+
+@pytest.mark.parametrize("error", AFTER_SENDING)
+def test_errors_after_sending_are_not_retried(mock_llm, error):
+    attempts = LLMClient.attempts
+
+    with pytest.raises(error):
+        chat(FaultTransport(error))
+
+    assert LLMClient.attempts - attempts == 1
+    assert mock_llm["requests"] == 1
+
+
+def test_requests_in_flight_stay_within_the_concurrency_limit(mock_llm, monkeypatch):
+    monkeypatch.setattr(mock_openrouter, "MOCK_LLM_LATENCY_MS", 20.0)
+
+    responses = chat(FaultTransport(), count=8)
+
+    assert [response.status_code for response in responses] == [200] * 8
+    assert mock_llm["requests"] == 8
+    assert mock_llm["max_in_flight"] == 2
+    assert LLMClient.in_flight == 0 and LLMClient.queued == 0
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+
+from services import ml_service
+from services.ml_service import MLService
+from services.preprocessing_service import PreparedFeatures
+
+ROWS = 6_000
+
+
+@pytest.fixture(autouse=True)
+def small_curve(monkeypatch):
+    monkeypatch.setattr(ml_service, "LARGE_DATA_INITIAL_SAMPLES", 250)
+    monkeypatch.setattr(ml_service, "LARGE_DATA_VALIDATION_ROWS", 800)
+
+
+def prepared(classification: bool = False) -> PreparedFeatures:
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(ROWS, 4)).astype(np.float32)
+    y = 3 * X[:, 0] - 2 * X[:, 1] + rng.normal(scale=0.1, size=ROWS)
+    if classification:
+        y = (y > 0).astype(np.int64)
+    spec = {"target": "y", "columns": [f"x{i}" for i in range(4)]}
+    return PreparedFeatures(X, y, spec, [{"name": name, "type": "numeric"} for name in spec["columns"]])
+
+
+def test_learning_curve_doubles_until_the_score_plateaus(monkeypatch):
+    monkeypatch.setattr(ml_service, "LARGE_DATA_PLATEAU_TOLERANCE", 0.01)
+    result = MLService.train_large_model(prepared(), "regression")
+
+    samples = [step["samples"] for step in result["learning_curve"]]
+    assert samples[:3] == [250, 500, 1_000]
+    assert result["plateaued"]
+    assert samples[-1] < result["available_samples"] == ROWS - 800
+    best = max(result["learning_curve"], key=lambda step: step["score"])
+    assert result["samples_trained"] == best["samples"]
+    assert result["validation_samples"] == 800
+    assert isinstance(result["estimator"], HistGradientBoostingRegressor)
+    assert result["feature_dtype"] == "float32"
+
+
+def test_without_a_plateau_the_curve_reaches_every_row(monkeypatch):
+    monkeypatch.setattr(ml_service, "LARGE_DATA_PLATEAU_TOLERANCE", float("-inf"))
+    result = MLService.train_large_model(prepared(), "regression")
+
+    samples = [step["samples"] for step in result["learning_curve"]]
+    assert samples == [250, 500, 1_000, 2_000, 4_000, ROWS - 800]
+    assert not result["plateaued"]
+    assert result["estimated_full_fit_seconds"] == pytest.approx(result["learning_curve"][-1]["fit_seconds"])
+
+
+def test_classification_reports_classes():
+    result = MLService.train_large_model(prepared(classification=True), "classification")
+
+    assert isinstance(result["estimator"], HistGradientBoostingClassifier)
+    assert result["classes"] == [0, 1]
+    assert result["accuracy"] > 0.9
@@ -0,0 +1,95 @@
+import asyncio
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from services import prediction_service
+from services.cache_service import model_cache
+from services.model_registry import ModelRegistry
+from services.prediction_service import PredictionBatcher, PredictionService
+
+
+@pytest.fixture
+def batched_predict(monkeypatch):
+    """ModelRegistry.predict replaced by ten times the first feature,
+    recording the size of every batch"""
+    batches = []
+
+    def predict(model_id, X):
+        batches.append(len(X))
+        return (X[:, 0] * 10).tolist()
+
+    monkeypatch.setattr(ModelRegistry, "predict", predict)
+    monkeypatch.setattr(prediction_service, "PREDICT_BATCH_WAIT_MS", 20)
+    return batches
+
+
+def rows(start: int, count: int) -> np.ndarray:
+    return np.arange(start, start + count, dtype=np.float32).reshape(-1, 1)
+
+
+def test_concurrent_requests_share_a_batch_and_get_their_own_rows(batched_predict):
+    async def run():
+        batcher = PredictionBatcher("model")
+        requests = [rows(100 * i, i + 1) for i in range(8)]
+        results = await asyncio.gather(*(batcher.predict(X) for X in requests))
+        return batcher, requests, results
+
+    batcher, requests, results = asyncio.run(run())
+    for X, predictions in zip(requests, results):
+        assert predictions == (X[:, 0] * 10).tolist()
+    assert batched_predict == [sum(range(1, 9))]
+    assert batcher.stats()["avg_requests_per_batch"] == 8
+
+
+def test_full_batch_flushes_without_waiting(batched_predict, monkeypatch):
+    monkeypatch.setattr(prediction_service, "PREDICT_BATCH_MAX_ROWS", 4)
+    monkeypatch.setattr(prediction_service, "PREDICT_BATCH_WAIT_MS", 10_000)
+
+    async def run():
+        batcher = PredictionBatcher("model")
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.predict(rows(0, 2)), batcher.predict(rows(10, 2)), batcher.predict(rows(20, 5))),
+            5
+        )
+
+    results = asyncio.run(run())
+    assert results == [[0.0, 10.0], [100.0, 110.0], [200.0, 210.0, 220.0, 230.0, 240.0]]
+    assert batched_predict == [4, 5]
+
+
+def test_failed_batch_fails_every_request(monkeypatch):
+    def predict(model_id, X):
+        raise ValueError("bad model")
+
+    monkeypatch.setattr(ModelRegistry, "predict", predict)
+
+    async def run():
+        batcher = PredictionBatcher("model")
+        return await asyncio.gather(batcher.predict(rows(0, 1)), batcher.predict(rows(1, 2)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [str(result) for result in results] == ["bad model", "bad model"]
+
+
+def test_predictions_match_the_model(workdir):
+    model_cache.clear()
+    X = np.random.default_rng(0).normal(size=(50, 2))
+    model = LinearRegression().fit(X, X[:, 0] * 3 + X[:, 1])
+    metadata = ModelRegistry.register(model, {"features": [{"name": "a"}, {"name": "b"}], "target": "y"})
+
+    async def run():
+        return await asyncio.gather(*(
+            PredictionService.predict(metadata["model_id"], [{"a": float(a), "b": float(a + 1)}, {"a": 0.0, "b": 0.0}])
+            for a in range(6)
+        ))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        PredictionService.forget(metadata["model_id"])
+        model_cache.clear()
+    for a, result in enumerate(results):
+        np.testing.assert_allclose(result["predictions"], [3 * a + a + 1, 0.0], atol=1e-6)
+    assert PredictionService.stats() == {}
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.preprocessing_service import MISSING_LEVEL, OTHER_LEVEL, PreprocessingService
+
+
+def training_frame() -> pd.DataFrame:
+    # "city" has three common levels and one level rarer than 1% of the rows
+    cities = ["paris"] * 100 + ["rome"] * 60 + ["oslo"] * 39 + ["lima"]
+    return pd.DataFrame({
+        "city": cities,
+        "size": np.arange(200, dtype=float),
+        "target": np.arange(200) % 2,
+    })
+
+
+def test_fit_spec_keeps_common_levels_and_marks_other():
+    spec = PreprocessingService.fit_spec(training_frame(), "target")
+    city = spec["categorical"][0]
+    assert city["levels"] == ["paris", "rome", "oslo"]
+    assert city["other"] is True
+    assert city["encoding"] == "onehot"
+    assert spec["columns"] == ["size", "city=paris", "city=rome", "city=oslo", f"city={OTHER_LEVEL}"]
+
+
+def test_onehot_maps_rare_unseen_and_missing_levels_to_other():
+    spec = PreprocessingService.fit_spec(training_frame(), "target")
+    rows = pd.DataFrame({"city": ["rome", "lima", "tokyo", None], "size": [1.0, 2.0, 3.0, 4.0]})
+    X, valid = PreprocessingService.transform(spec, rows)
+
+    assert valid.all()
+    np.testing.assert_array_equal(X[:, 1:], [
+        [0, 1, 0, 0],
+        [0, 0, 0, 1],  # rare at fit time
+        [0, 0, 0, 1],  # never seen
+        [0, 0, 0, 1],  # missing was not a kept level either
+    ])
+
+
+def test_onehot_without_other_level_leaves_unseen_rows_all_zero():
+    df = pd.DataFrame({"color": ["red", "blue"] * 50, "target": np.arange(100)})
+    spec = PreprocessingService.fit_spec(df, "target")
+    assert spec["categorical"][0]["other"] is False
+
+    X, valid = PreprocessingService.transform(spec, pd.DataFrame({"color": ["blue", "green"]}))
+    assert valid.all()
+    np.testing.assert_array_equal(X, [[0, 1], [0, 0]])
+
+
+def test_ordinal_gives_rare_and_unseen_levels_the_code_after_the_kept_ones():
+    df = training_frame()
+    spec = PreprocessingService.fit_spec(df, "target", features=["city"], encoding="ordinal")
+    assert spec["columns"] == ["city"]
+
+    X, _ = PreprocessingService.transform(spec, pd.DataFrame({"city": ["paris", "oslo", "lima", "tokyo", None]}))
+    np.testing.assert_array_equal(X[:, 0], [0, 2, 3, 3, 3])
+
+
+def test_missing_values_form_their_own_level_when_common():
+    df = pd.DataFrame({"color": ["red", None] * 50, "target": np.arange(100)})
+    spec = PreprocessingService.fit_spec(df, "target")
+    assert MISSING_LEVEL in spec["categorical"][0]["levels"]
+
+    X, _ = PreprocessingService.transform(spec, pd.DataFrame({"color": [None, "red"]}))
+    missing = spec["categorical"][0]["levels"].index(MISSING_LEVEL)
+    assert X[0, missing] == 1
+    assert X[1, missing] == 0
+
+
+def test_numeric_fill_and_invalid_text():
+    spec = PreprocessingService.fit_spec(training_frame(), "target")
+    rows = pd.DataFrame({"city": ["rome"] * 3, "size": [5.0, None, "big"]})
+    X, valid = PreprocessingService.transform(spec, rows)
+
+    assert X[0, 0] == 5.0
+    assert X[1, 0] == pytest.approx(99.5)  # training median
+    np.testing.assert_array_equal(valid, [True, True, False])
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.cache_service import result_cache
+from services.eda_service import EDAService
+from services.profile_service import ProfileService
+
+
+def frame(rows: int = 500) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "amount": rng.normal(100, 15, rows),
+        "units": rng.integers(0, 12, rows),
+        "score": rng.exponential(2.0, rows).astype(np.float32),
+        "empty": np.full(rows, np.nan),
+        "region": rng.choice(["north", "south", "east"], rows, p=[0.5, 0.3, 0.2]),
+    })
+    df.loc[rng.choice(rows, 40, replace=False), "amount"] = np.nan
+    df.loc[[3, 7], "amount"] = [400.0, -250.0]
+    df.loc[rng.choice(rows, 25, replace=False), "region"] = None
+    return df
+
+
+@pytest.mark.parametrize("col", ["amount", "units", "score"])
+def test_numeric_statistics_match_pandas(col):
+    df = frame()
+    stats = ProfileService.build_profile(df)["numeric"][col]
+    series = df[col].astype(np.float64)
+
+    for key, expected in [
+        ("count", series.count()), ("mean", series.mean()), ("std", series.std()), ("min", series.min()),
+        ("q25", series.quantile(0.25)), ("median", series.median()), ("q75", series.quantile(0.75)),
+        ("max", series.max()), ("distinct", series.nunique()),
+    ]:
+        assert stats[key] == pytest.approx(expected, rel=1e-12), key
+    assert stats["mode"] == df[col].mode().min()
+    counts = series.value_counts()
+    assert [count for _, count in stats["top_values"][:10]] == counts.head(10).tolist()
+
+
+def test_iqr_outliers_match_pandas_bounds():
+    df = frame()
+    profile = ProfileService.build_profile(df)
+
+    for col in ["amount", "units", "score"]:
+        series = df[col].astype(np.float64)
+        q25, q75 = series.quantile([0.25, 0.75])
+        lower, upper = q25 - 1.5 * (q75 - q25), q75 + 1.5 * (q75 - q25)
+        expected = np.flatnonzero(((series < lower) | (series > upper)).to_numpy())
+        np.testing.assert_array_equal(profile["outlier_positions"][col], expected)
+    assert {3, 7} <= set(profile["outlier_positions"]["amount"].tolist())
+
+
+def test_all_missing_and_categorical_columns():
+    df = frame()
+    profile = ProfileService.build_profile(df)
+
+    empty = profile["numeric"]["empty"]
+    assert empty["count"] == 0 and np.isnan(empty["mean"]) and empty["mode"] is None
+    assert len(profile["outlier_positions"]["empty"]) == 0
+
+    region = profile["categorical"]["region"]
+    counts = df["region"].value_counts()
+    assert region["unique"] == 3
+    assert region["mode"] == "north"
+    assert region["top_values"] == [(str(value), int(count)) for value, count in counts.items()]
+    assert profile["missing_values"] == df.isnull().sum().to_dict()
+
+
+def test_endpoints_share_one_cached_profile(monkeypatch):
+    result_cache.clear()
+    builds = []
+    build = ProfileService.build_profile
+    monkeypatch.setattr(ProfileService, "build_profile", lambda df: builds.append(1) or build(df))
+    df = frame()
+
+    try:
+        profile = ProfileService.get_profile(df, "dataset@v1")
+        assert ProfileService.get_profile(df, "dataset@v1") is profile
+        summary = EDAService.get_summary(df, profile)
+        stats = EDAService.get_column_stats(df, profile)
+    finally:
+        result_cache.clear()
+
+    assert builds == [1]
+    assert summary["numeric_summary"]["units"]["50%"] == stats["units"]["median"] == df["units"].median()
+    assert stats["region"] == {"type": "categorical", "unique": 3, "mode": "north"}
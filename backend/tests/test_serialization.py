@@ -0,0 +1,75 @@
+import datetime
+import json
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from services import serialization
+from services.serialization import FastJSONRoute, dumps, split_matrix, split_records
+
+PAYLOAD = {
+    "ints": np.arange(3, dtype=np.int32),
+    "floats": np.array([1.5, np.nan, np.inf]),
+    "scalar": np.float32(0.25),
+    "flag": np.bool_(True),
+    "nested": [{"when": pd.Timestamp("2024-05-01 12:30"), "missing": pd.NaT}, (np.int64(7), -np.inf)],
+    "day": datetime.date(2024, 5, 1),
+    "price": Decimal("9.75"),
+    "tags": {"only"},
+    "series": pd.Series([1, 2]),
+}
+EXPECTED = {
+    "ints": [0, 1, 2],
+    "floats": [1.5, None, None],
+    "scalar": 0.25,
+    "flag": True,
+    "nested": [{"when": "2024-05-01T12:30:00", "missing": None}, [7, None]],
+    "day": "2024-05-01",
+    "price": 9.75,
+    "tags": ["only"],
+    "series": [1, 2],
+}
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param and not serialization.ORJSON_AVAILABLE:
+        pytest.skip("orjson is not installed")
+    monkeypatch.setattr(serialization, "ORJSON_AVAILABLE", request.param)
+
+
+def test_numpy_and_pandas_values_serialize_alike(backend):
+    assert json.loads(dumps(PAYLOAD)) == EXPECTED
+
+
+def test_unknown_types_are_rejected(backend):
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_routes_return_numpy_payloads_directly(backend):
+    router = APIRouter(route_class=FastJSONRoute)
+
+    @router.get("/values", status_code=201)
+    async def values():
+        return PAYLOAD
+
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).get("/values")
+
+    assert response.status_code == 201
+    assert response.json() == EXPECTED
+
+
+def test_split_forms():
+    assert split_records([{"a": 1, "b": 2}, {"b": 3, "c": 4}]) == {
+        "columns": ["a", "b", "c"], "data": [[1, 2, None], [None, 3, 4]]
+    }
+    assert split_matrix({"x": {"x": 1.0, "y": 0.5}, "y": {"x": 0.5, "y": 1.0}}) == {
+        "index": ["x", "y"], "columns": ["x", "y"], "data": [[1.0, 0.5], [0.5, 1.0]]
+    }
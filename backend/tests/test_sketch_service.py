@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from services.sketch_service import FixedWidthHistogram
+
+
+def one_pass_counts(hist: FixedWidthHistogram, values: np.ndarray) -> np.ndarray:
+    """Counts of ``values`` on the final grid of ``hist``, computed directly"""
+    edges, _ = hist.bins()
+    counts, _ = np.histogram(values, bins=edges)
+    return counts
+
+
+@pytest.mark.parametrize("max_bins", [8, 50, 200])
+def test_batches_merged_equal_one_pass_counts(max_bins):
+    rng = np.random.default_rng(0)
+    # Later batches fall outside the earlier range, forcing the grid to grow and coarsen
+    batches = [rng.normal(0, 1, 1000), rng.normal(5, 2, 500), rng.uniform(-40, 3, 200)]
+
+    merged = FixedWidthHistogram(0.0, 0.1, max_bins)
+    for batch in batches:
+        part = FixedWidthHistogram(0.0, 0.1, max_bins)
+        part.update(batch)
+        merged.merge(part)
+
+    values = np.concatenate(batches)
+    edges, counts = merged.bins()
+    assert merged.n == len(values)
+    assert len(counts) <= max_bins
+    np.testing.assert_array_equal(counts, one_pass_counts(merged, values))
+
+    single = FixedWidthHistogram(0.0, 0.1, max_bins)
+    single.update(values)
+    assert single.width == merged.width
+    np.testing.assert_array_equal(single.bins()[0], edges)
+    np.testing.assert_array_equal(single.bins()[1], counts)
+
+
+def test_update_in_batches_equals_one_update():
+    rng = np.random.default_rng(1)
+    values = rng.exponential(3, 5000)
+    batched = FixedWidthHistogram(0.0, 0.25, 64)
+    for batch in np.array_split(values, 7):
+        batched.update(batch)
+    single = FixedWidthHistogram(0.0, 0.25, 64)
+    single.update(values)
+
+    np.testing.assert_array_equal(batched.bins()[1], single.bins()[1])
+    np.testing.assert_array_equal(batched.bins()[1], one_pass_counts(batched, values))
+
+
+def test_merge_accepts_a_coarser_histogram():
+    fine = FixedWidthHistogram(0.0, 1.0, 100)
+    fine.update(np.arange(0, 10, 0.5))
+    coarse = FixedWidthHistogram(0.0, 1.0, 4)
+    coarse.update(np.arange(0, 40, 0.5))
+    assert coarse.width == 16.0
+
+    fine.merge(coarse)
+    values = np.concatenate([np.arange(0, 10, 0.5), np.arange(0, 40, 0.5)])
+    assert fine.width == coarse.width
+    np.testing.assert_array_equal(fine.bins()[1], one_pass_counts(fine, values))
+
+
+def test_coarsened_keeps_counts_exact():
+    rng = np.random.default_rng(2)
+    values = rng.normal(10, 3, 2000)
+    hist = FixedWidthHistogram(0.0, 0.05, 500)
+    hist.update(values)
+    width, counts_before = hist.width, hist.counts.copy()
+
+    coarse = hist.coarsened(20)
+    edges, counts = coarse.bins()
+    assert len(counts) <= 20
+    assert counts.sum() == len(values)
+    np.testing.assert_array_equal(counts, np.histogram(values, bins=edges)[0])
+    # The original is left as it was
+    assert hist.width == width
+    np.testing.assert_array_equal(hist.counts, counts_before)
+
+
+def test_non_finite_values_are_ignored():
+    hist = FixedWidthHistogram(0.0, 1.0, 10)
+    hist.update(np.array([np.nan, np.inf, -np.inf, 2.5]))
+    edges, counts = hist.bins()
+    np.testing.assert_array_equal(edges, [2.0, 3.0])
+    np.testing.assert_array_equal(counts, [1])
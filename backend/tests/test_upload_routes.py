@@ -0,0 +1,63 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import UPLOAD_DIR
+from services import file_service
+from services.file_service import FileService
+
+CSV = b"amount,region\n1.5,north\n2.5,south\n"
+BATCHES = [b"amount,region\n3.5,east\n", b"region,amount\nwest,4.5\nnorth,5.5\n"]
+
+
+@pytest.fixture
+def client(workdir):
+    with TestClient(main.app) as client:
+        yield client
+
+
+def _upload(client) -> str:
+    return client.post("/api/upload", files={"file": ("data.csv", CSV, "text/csv")}).json()["id"]
+
+
+def test_appended_versions_read_back_as_the_concatenated_csv(client):
+    file_id = _upload(client)
+    before = set(os.listdir(UPLOAD_DIR))
+
+    for batch in BATCHES:
+        response = client.post(
+            f"/api/upload/{file_id}/append", params={"filename": "data.csv"},
+            files={"file": ("batch.csv", batch, "text/csv")}
+        )
+        assert response.status_code == 200
+
+    expected = pd.concat(
+        [pd.read_csv(io.BytesIO(CSV))] + [pd.read_csv(io.BytesIO(batch))[["amount", "region"]] for batch in BATCHES],
+        ignore_index=True
+    )
+    df = FileService._read_file(FileService.resolve(file_id), "data.csv")
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    assert [version["version"] for version in client.get(f"/api/upload/{file_id}/versions").json()["versions"]] == [1, 2, 3]
+    # The streamed batches are parsed from disk and removed; only segments remain
+    assert not any(name.endswith("_batch.csv") for name in os.listdir(UPLOAD_DIR))
+    assert set(os.listdir(UPLOAD_DIR)) - before == {
+        f"{file_id}@v{n}.{suffix}" for n in (2, 3) for suffix in ("json", "segment.parquet", "aggregates.joblib")
+    }
+
+
+def test_oversized_batch_is_rejected_without_leaving_files(client, monkeypatch):
+    file_id = _upload(client)
+    before = set(os.listdir(UPLOAD_DIR))
+    monkeypatch.setattr(file_service, "MAX_FILE_SIZE", 8)
+
+    response = client.post(
+        f"/api/upload/{file_id}/append", params={"filename": "data.csv"},
+        files={"file": ("batch.csv", BATCHES[0], "text/csv")}
+    )
+
+    assert response.status_code == 413
+    assert set(os.listdir(UPLOAD_DIR)) == before